@@ -0,0 +1,164 @@
+"""
+Module Name: autosave
+
+Description:
+    Crash-safe saving for game.py. Save files are written atomically: the data goes to a
+    temporary file in the same folder, is flushed to disk with fsync and then renamed
+    over the save, so a crash leaves either the old save or the new one, never half of
+    each. AutoSaver runs the json encoding and the writing on a background thread. The
+    game hands it a snapshot after every turn and returns straight away. Snapshots that
+    arrive while a write is running, or within minInterval of the last write, replace
+    each other, and only the newest one is written.
+
+Functions:
+    - writeAtomic(fileName, text):
+        Replaces fileName with text in one step.
+
+Classes:
+    - AutoSaver(fileName, minInterval=1.0, save=None):
+        Writes the newest game snapshot to fileName in the background.
+
+Examples:
+    >>> writeAtomic('save.json', json.dumps(gameData))
+    >>> autoSaver = AutoSaver('autosave.json')
+    >>> autoSaver = AutoSaver('autosave.json', save=openJournal('autosave.json').save)  # Journaled
+    >>> autoSaver.update(gameData)  # Every turn, returns immediately
+    >>> autoSaver.close()  # Writes the last snapshot and stops the thread
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def writeAtomic(fileName, text):
+    """
+    Replaces fileName with text in one step: readers (and a crash) only ever see the old or the new content.
+
+    Args:
+        fileName (str): The file to write.
+        text (str or bytes): The new content (bytes are written as they are).
+
+    Returns:
+        None
+    """
+    folder = os.path.dirname(os.path.abspath(fileName))
+    descriptor, tempName = tempfile.mkstemp(dir=folder, prefix=os.path.basename(fileName) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb' if isinstance(text, bytes) else 'w') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tempName, fileName)
+    except BaseException:
+        os.unlink(tempName)
+        raise
+
+    # Make the rename itself durable (not possible on every platform)
+    try:
+        folderDescriptor = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(folderDescriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(folderDescriptor)
+
+
+class AutoSaver:
+    """Writes the newest game snapshot to a file on a background thread.
+
+    Attributes:
+        fileName (str): The autosave file.
+        minInterval (float): Minimum seconds between two writes, snapshots in between are coalesced.
+        save (callable): Called on the background thread with each snapshot to write. Defaults to
+            writing it as json with writeAtomic (e.g. savejournal.SaveJournal.save appends only what changed).
+        updates (int): How many snapshots were handed in.
+        saves (int): How many were written.
+        lastError (Exception): The last error (None if every write worked). Autosaving goes on after an error.
+    """
+
+    def __init__(self, fileName, minInterval=1.0, save=None):
+        self.fileName = fileName
+        self.minInterval = minInterval
+        self.save = save or self._writeJson
+        self.updates = 0
+        self.saves = 0
+        self.lastError = None
+        self._pending = None
+        self._writing = False
+        self._closed = False
+        self._lastWrite = float('-inf')
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='autosave', daemon=True)
+        self._thread.start()
+
+    def update(self, gameData):
+        """
+        Hands in a new snapshot to save. Never waits for the disk.
+
+        Args:
+            gameData (dict): The game state. It must not be changed afterwards (pass a copy, see game.snapshotGame).
+
+        Returns:
+            None
+        """
+        with self._condition:
+            if self._closed:
+                raise ValueError("The autosaver is closed.")
+            self._pending = gameData
+            self.updates += 1
+            self._condition.notify()
+
+    def flush(self):
+        """Waits until the last snapshot handed in is written."""
+        with self._condition:
+            self._lastWrite = float('-inf')  # Do not wait for minInterval
+            self._condition.notify()
+            self._condition.wait_for(lambda: self._pending is None and not self._writing)
+
+    def close(self):
+        """Writes the last snapshot handed in and stops the background thread."""
+        with self._condition:
+            self._closed = True
+            self._lastWrite = float('-inf')
+            self._condition.notify()
+        self._thread.join()
+
+    def _writeJson(self, gameData):
+        writeAtomic(self.fileName, json.dumps(gameData))
+
+    def _run(self):
+        condition = self._condition
+        while True:
+            with condition:
+                condition.wait_for(lambda: self._pending is not None or self._closed)
+                # Leave time for more snapshots to come in, only the newest is written
+                wait = self._lastWrite + self.minInterval - time.monotonic()
+                while wait > 0 and not self._closed:
+                    condition.wait(wait)
+                    wait = self._lastWrite + self.minInterval - time.monotonic()
+                gameData, self._pending = self._pending, None
+                if gameData is None:
+                    return  # Closed with nothing left to write
+                self._writing = True
+
+            error = None
+            try:
+                self.save(gameData)
+            except Exception as saveError:  # E.g. disk errors or data json cannot encode, autosaving goes on
+                error = saveError
+            finally:
+                # Even if the thread dies, flush and close must not wait for this write forever
+                with condition:
+                    self._writing = False
+                    self._lastWrite = time.monotonic()
+                    if error is None:
+                        self.saves += 1
+                    else:
+                        self.lastError = error
+                    condition.notify_all()
@@ -0,0 +1,344 @@
+"""
+Module Name: balancesim
+
+Description:
+    Headless Monte Carlo balance simulator for the text adventure in game.py. It plays
+    complete game.main sessions (one random monster, fights, sleeping for 5 gold,
+    milkshakes, the magic potion and sword durability) with a scripted policy choosing
+    the menu options, spreads the sessions over a process pool, and streams the
+    aggregated win rates, gold curves and causes of death while it runs.
+
+    Sessions are simulated in chunks. Every chunk gets its own seed spawned from the
+    master seed, so results are the same for a given seed no matter how many workers
+    are used or in which order the chunks finish.
+
+Usage:
+    python balancesim.py --sessions 1000000 --policy cautious --seed 7
+    python balancesim.py --sessions 200000 --policy armed --zone bridge --json report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+import numpy as np
+
+from combat import resolveFight
+from gamefunctions import new_random_monsters
+
+# Starting values from game.main
+START_HEALTH = 100
+START_GOLD = 10
+START_ATTACK_POWER = 10
+START_SWORD_DURABILITY = 25
+START_MILKSHAKES = 3
+START_POTIONS = 1
+MAX_HEALTH = 100
+SLEEP_COST = 5
+SLEEP_RESTORE = 15
+MILKSHAKE_RESTORE = 10
+SWORD_ATTACK_BOOST = 10
+
+# Session outcomes
+WON_FIGHT = 'won fight'
+WON_WITH_POTION = 'won with potion'
+DIED = 'died'
+QUIT = 'quit'
+OUT_OF_TURNS = 'out of turns'
+
+
+class Session:
+    """The state of one simulated game.main session (what the policies get to look at)."""
+
+    __slots__ = ('monsterName', 'monsterHealth', 'monsterPower', 'playerHealth', 'playerGold', 'playerAttackPower',
+                 'swordDurability', 'swordEquipped', 'milkshakes', 'potions', 'outcome')
+
+    def __init__(self, monsterName, monsterHealth, monsterPower):
+        self.monsterName = monsterName
+        self.monsterHealth = monsterHealth
+        self.monsterPower = monsterPower
+        self.playerHealth = START_HEALTH
+        self.playerGold = START_GOLD
+        self.playerAttackPower = START_ATTACK_POWER
+        self.swordDurability = START_SWORD_DURABILITY
+        self.swordEquipped = False
+        self.milkshakes = START_MILKSHAKES
+        self.potions = START_POTIONS
+        self.outcome = None
+
+
+def recklessPolicy(session):
+    """Fights straight away with bare hands."""
+    return 'fight'
+
+
+def armedPolicy(session):
+    """Equips the sword, then fights."""
+    if not session.swordEquipped and session.swordDurability > 0:
+        return 'sword'
+    return 'fight'
+
+
+def cautiousPolicy(session):
+    """Equips the sword and only fights a fight it is sure to win, healing up or using the potion otherwise."""
+    if not session.swordEquipped and session.swordDurability > 0:
+        return 'sword'
+    forecast = resolveFight(session.monsterHealth, session.monsterPower, session.playerHealth, session.playerAttackPower)
+    if forecast.winner == 'player':
+        return 'fight'
+    if session.playerHealth < MAX_HEALTH and session.milkshakes > 0:
+        return 'milkshake'
+    if session.playerHealth < MAX_HEALTH and session.playerGold >= SLEEP_COST:
+        return 'sleep'
+    if session.potions > 0:
+        return 'potion'
+    return 'quit'
+
+
+POLICIES = {
+    'reckless': recklessPolicy,
+    'armed': armedPolicy,
+    'cautious': cautiousPolicy,
+}
+
+
+def playTurn(session, action):
+    """
+    Applies one menu choice to the session, following the rules of game.main.
+
+    Parameters:
+        session (Session): The session to update.
+        action (str): One of 'fight', 'sleep', 'milkshake', 'sword', 'potion' or 'quit'.
+
+    Returns:
+        None
+    """
+    if action == 'fight':
+        result = resolveFight(session.monsterHealth, session.monsterPower, session.playerHealth, session.playerAttackPower)
+        session.monsterHealth = result.monsterHealth
+        session.playerHealth = result.playerHealth
+        if session.playerHealth <= 0:
+            session.outcome = DIED
+            return
+        session.swordDurability -= 1  # Reduce durability after fighting
+        if session.swordDurability <= 0:
+            session.swordEquipped = False  # Broken swords are unequipped (the attack boost stays, as in game.main)
+        if session.monsterHealth <= 0:
+            session.outcome = WON_FIGHT
+
+    elif action == 'sleep':
+        if session.playerGold >= SLEEP_COST:
+            session.playerGold -= SLEEP_COST
+            session.playerHealth = min(session.playerHealth + SLEEP_RESTORE, MAX_HEALTH)
+
+    elif action == 'milkshake':
+        if session.milkshakes > 0:
+            session.milkshakes -= 1
+            session.playerHealth = min(session.playerHealth + MILKSHAKE_RESTORE, MAX_HEALTH)
+
+    elif action == 'sword':
+        if session.swordDurability > 0:
+            session.playerAttackPower += SWORD_ATTACK_BOOST
+            session.swordEquipped = True
+
+    elif action == 'potion':
+        if session.potions > 0:
+            session.potions -= 1
+            session.outcome = WON_WITH_POTION
+
+    elif action == 'quit':
+        session.outcome = QUIT
+
+    else:
+        raise ValueError(f'Unknown action: {action}')
+
+
+class SimulationStats:
+    """Aggregated results of many sessions. Stats from different chunks are combined with merge()."""
+
+    def __init__(self, maxTurns):
+        self.sessions = 0
+        self.outcomes = Counter()
+        self.encounters = Counter()
+        self.wins = Counter()
+        self.deathCauses = Counter()
+        self.finalGold = Counter()
+        self.healthLeftTotal = 0
+        self.turnsTotal = 0
+        self.goldByTurn = [0] * (maxTurns + 1)  # Total gold after each turn (finished sessions keep their final gold)
+
+    def record(self, session, turns, goldHistory):
+        self.sessions += 1
+        self.outcomes[session.outcome] += 1
+        self.encounters[session.monsterName] += 1
+        if session.outcome in (WON_FIGHT, WON_WITH_POTION):
+            self.wins[session.monsterName] += 1
+            self.healthLeftTotal += session.playerHealth
+        elif session.outcome == DIED:
+            self.deathCauses[session.monsterName] += 1
+        self.finalGold[session.playerGold] += 1
+        self.turnsTotal += turns
+        for turn, gold in enumerate(goldHistory):
+            self.goldByTurn[turn] += gold
+        for turn in range(len(goldHistory), len(self.goldByTurn)):
+            self.goldByTurn[turn] += session.playerGold
+
+    def merge(self, other):
+        self.sessions += other.sessions
+        self.outcomes.update(other.outcomes)
+        self.encounters.update(other.encounters)
+        self.wins.update(other.wins)
+        self.deathCauses.update(other.deathCauses)
+        self.finalGold.update(other.finalGold)
+        self.healthLeftTotal += other.healthLeftTotal
+        self.turnsTotal += other.turnsTotal
+        self.goldByTurn = [total + otherTotal for total, otherTotal in zip(self.goldByTurn, other.goldByTurn)]
+
+    def winRate(self):
+        wins = self.outcomes[WON_FIGHT] + self.outcomes[WON_WITH_POTION]
+        return wins / self.sessions if self.sessions else 0.0
+
+    def report(self):
+        """Returns the aggregated results as a json friendly dictionary."""
+        sessions = max(self.sessions, 1)
+        wins = sum(self.wins.values())
+        return {
+            'sessions': self.sessions,
+            'winRate': self.winRate(),
+            'outcomes': {outcome: count / sessions for outcome, count in self.outcomes.items()},
+            'winRateByMonster': {name: self.wins[name] / count for name, count in self.encounters.items()},
+            'deathCauses': dict(self.deathCauses.most_common()),
+            'meanTurns': self.turnsTotal / sessions,
+            'meanHealthLeftAfterWin': self.healthLeftTotal / wins if wins else None,
+            'meanFinalGold': sum(gold * count for gold, count in self.finalGold.items()) / sessions,
+            'finalGold': {str(gold): count for gold, count in sorted(self.finalGold.items())},
+            'goldCurve': [total / sessions for total in self.goldByTurn],
+        }
+
+
+def simulateChunk(task):
+    """
+    Plays one chunk of sessions. Runs inside the worker processes.
+
+    Parameters:
+        task (tuple): (policy name, number of sessions, numpy SeedSequence, zone, max turns).
+
+    Returns:
+        SimulationStats: The aggregated results of the chunk.
+    """
+    policyName, sessions, seedSequence, zone, maxTurns = task
+    policy = POLICIES[policyName]
+    stats = SimulationStats(maxTurns)
+
+    # Every monster of the chunk is rolled in one batch
+    batch = new_random_monsters(sessions, rng=np.random.default_rng(seedSequence), zone=zone)
+    names = [batch.names[typeId] for typeId in batch.name_index.tolist()]
+    healths = batch.health.tolist()
+    powers = batch.power.tolist()
+
+    for index in range(sessions):
+        session = Session(names[index], healths[index], powers[index])
+        goldHistory = [session.playerGold]
+        turns = 0
+        while session.outcome is None and turns < maxTurns:
+            playTurn(session, policy(session))
+            turns += 1
+            goldHistory.append(session.playerGold)
+        if session.outcome is None:
+            session.outcome = OUT_OF_TURNS
+        stats.record(session, turns, goldHistory)
+
+    return stats
+
+
+def runSimulation(sessions, policyName='armed', seed=0, workers=None, chunkSize=10000, zone='default', maxTurns=20, progress=None):
+    """
+    Plays many sessions across a process pool and aggregates the results.
+
+    Parameters:
+        sessions (int): How many sessions to play.
+        policyName (str, optional): Key of POLICIES choosing the menu options. Defaults to 'armed'.
+        seed (int, optional): Master seed, every chunk gets a seed spawned from it. Defaults to 0.
+        workers (int, optional): Worker processes. Defaults to None (one per core). 1 runs in this process.
+        chunkSize (int, optional): Sessions per chunk of work. Defaults to 10000.
+        zone (str, optional): Spawn table the monsters come from. Defaults to 'default'.
+        maxTurns (int, optional): Turns after which a session is stopped. Defaults to 20.
+        progress (callable, optional): Called with the running SimulationStats after every chunk.
+
+    Returns:
+        SimulationStats: The aggregated results.
+    """
+    if policyName not in POLICIES:
+        raise ValueError(f'Unknown policy: {policyName}')
+    if sessions < 0 or chunkSize < 1:
+        raise ValueError('Sessions cannot be negative and chunks need at least one session.')
+
+    chunkSizes = [chunkSize] * (sessions // chunkSize)
+    if sessions % chunkSize:
+        chunkSizes.append(sessions % chunkSize)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunkSizes))
+    tasks = [(policyName, size, chunkSeed, zone, maxTurns) for size, chunkSeed in zip(chunkSizes, seeds)]
+
+    total = SimulationStats(maxTurns)
+
+    def collect(results):
+        for stats in results:
+            total.merge(stats)
+            if progress:
+                progress(total)
+
+    if workers == 1:
+        collect(map(simulateChunk, tasks))
+    else:
+        with Pool(workers) as pool:
+            collect(pool.imap_unordered(simulateChunk, tasks))
+    return total
+
+
+def main(argv=None):
+    """Command line entry point, see the module docstring for usage."""
+    parser = argparse.ArgumentParser(description='Simulate many game.py sessions to answer balance questions.')
+    parser.add_argument('--sessions', type=int, default=100000, help='number of sessions to play')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='armed', help='scripted policy choosing the menu options')
+    parser.add_argument('--seed', type=int, default=0, help='master seed (same seed, same results)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='sessions per chunk of work')
+    parser.add_argument('--zone', default='default', help='spawn table the monsters come from')
+    parser.add_argument('--max-turns', type=int, default=20, help='turns after which a session is stopped')
+    parser.add_argument('--json', help='also write the final report to this json file')
+    args = parser.parse_args(argv)
+
+    startTime = time.perf_counter()
+
+    def showProgress(stats):
+        deaths = ', '.join(f'{name} {count}' for name, count in stats.deathCauses.most_common(3))
+        print(f'{stats.sessions}/{args.sessions} sessions  win rate {stats.winRate():.2%}  deaths: {deaths or "none"}', file=sys.stderr)
+
+    stats = runSimulation(args.sessions, args.policy, args.seed, args.workers, args.chunk_size, args.zone, args.max_turns,
+                          progress=showProgress)
+    report = stats.report()
+    report.update({'policy': args.policy, 'seed': args.seed, 'zone': args.zone, 'seconds': time.perf_counter() - startTime})
+
+    print(f"Policy: {args.policy}  Sessions: {report['sessions']}  Time: {report['seconds']:.1f}s ({os.cpu_count()} cores)")
+    print(f"Win rate: {report['winRate']:.2%}")
+    for outcome, share in sorted(report['outcomes'].items()):
+        print(f'  {outcome}: {share:.2%}')
+    print('Win rate by monster:')
+    for name, share in report['winRateByMonster'].items():
+        print(f'  {name}: {share:.2%}')
+    print('Causes of death:', ', '.join(f'{name} {count}' for name, count in report['deathCauses'].items()) or 'none')
+    print(f"Mean final gold: {report['meanFinalGold']:.2f}")
+    print('Mean gold by turn:', ' '.join(f'{gold:.1f}' for gold in report['goldCurve']))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f'Report saved to {args.json}.')
+
+
+if __name__ == '__main__':
+    main()
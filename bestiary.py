@@ -0,0 +1,224 @@
+"""
+Module Name: bestiary
+
+Description:
+    Loads the monster templates from bestiary.json once and keeps them in a frozen,
+    name-indexed registry. The stat rolls of every monster type are also packed into
+    read-only arrays so that many monsters can be rolled with array indexing, and the
+    weighted spawn and loot tables of every zone are built once into alias tables.
+
+Functions:
+    - load_bestiary(fileName=BESTIARY_FILE):
+        Loads (once) and returns the Bestiary stored in fileName.
+    - get_bestiary():
+        Returns the default Bestiary shared by the text game and the pygame game.
+
+Examples:
+    >>> bestiary = get_bestiary()
+    >>> bestiary['troll'].power
+    (25, 30, 35)
+    >>> bestiary.names[bestiary.spawn_tables['bridge'].draw()]
+    'troll'  # Output will vary
+"""
+
+import json
+import os
+import random
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+from spawntables import AliasTable
+
+BESTIARY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bestiary.json')
+
+# Order of the stats in Bestiary.stats / Bestiary.roll_counts
+STAT_NAMES = ('health', 'power', 'money')
+
+# Zone used when no zone is asked for, its spawn weights come from each monster's 'spawnWeight'
+DEFAULT_ZONE = 'default'
+
+# How a monster type moves ("behavior" in bestiary.json): wandering at random (the default), or chasing the player
+BEHAVIORS = ('wander', 'chase')
+
+# One monster template, the stats are tuples of the values that monster can roll.
+# move_interval ("moveInterval" in bestiary.json) is how many ticks the monster waits between two steps
+# (1, the default, moves every tick)
+MonsterType = namedtuple('MonsterType', ['name', 'description', 'image', 'health', 'power', 'money', 'spawn_weight',
+                                         'behavior', 'move_interval'],
+                         defaults=[1, 'wander', 1])
+
+
+class Bestiary:
+    """A frozen registry of monster types.
+
+    Attributes:
+        types (tuple): Every MonsterType, in file order. The position of a type is its type id.
+        names (tuple): The name of every type, indexed by type id.
+        descriptions (tuple): The description of every type, indexed by type id.
+        stats (numpy.ndarray): Read-only array of shape (types, 3, rolls) holding the possible
+            health, power and money of every type. Short roll lists are padded with their last value.
+        roll_counts (numpy.ndarray): Read-only array of shape (types, 3) with how many values each stat can roll.
+        chases (numpy.ndarray): Read-only boolean array, True for the types that chase the player.
+        move_intervals (numpy.ndarray): Read-only array of the ticks each type waits between two steps.
+        spawn_tables (mappingproxy): Zone name -> AliasTable of type ids, weighted by how often each type spawns there.
+        loot_tables (mappingproxy): Zone name -> AliasTable of item names.
+    """
+
+    def __init__(self, monsterTypes, zones=None, lootTables=None):
+        monsterTypes = tuple(monsterTypes)
+        if not monsterTypes:
+            raise ValueError("A bestiary needs at least one monster type.")
+
+        by_name = {}
+        for type_id, monster_type in enumerate(monsterTypes):
+            if monster_type.name in by_name:
+                raise ValueError(f"Duplicate monster name in bestiary: {monster_type.name}")
+            for stat in STAT_NAMES:
+                if not getattr(monster_type, stat):
+                    raise ValueError(f"Monster {monster_type.name} has no {stat} values.")
+            if monster_type.behavior not in BEHAVIORS:
+                raise ValueError(f"Monster {monster_type.name} has an unknown behavior: {monster_type.behavior}")
+            if monster_type.move_interval < 1:
+                raise ValueError(f"Monster {monster_type.name} needs a move interval of at least 1 tick.")
+            by_name[monster_type.name] = type_id
+
+        max_rolls = max(len(getattr(monster_type, stat)) for monster_type in monsterTypes for stat in STAT_NAMES)
+        stats = np.empty((len(monsterTypes), len(STAT_NAMES), max_rolls), dtype=np.int64)
+        roll_counts = np.empty((len(monsterTypes), len(STAT_NAMES)), dtype=np.int64)
+        for type_id, monster_type in enumerate(monsterTypes):
+            for stat_id, stat in enumerate(STAT_NAMES):
+                values = getattr(monster_type, stat)
+                stats[type_id, stat_id, :len(values)] = values
+                stats[type_id, stat_id, len(values):] = values[-1]
+                roll_counts[type_id, stat_id] = len(values)
+        stats.flags.writeable = False
+        roll_counts.flags.writeable = False
+        chases = np.array([monster_type.behavior == 'chase' for monster_type in monsterTypes])
+        chases.flags.writeable = False
+        move_intervals = np.array([monster_type.move_interval for monster_type in monsterTypes], dtype=np.int64)
+        move_intervals.flags.writeable = False
+
+        # Build every weighted table once, the default zone uses each monster's own spawn weight
+        zones = dict(zones or {})
+        zones.setdefault(DEFAULT_ZONE, {monster_type.name: monster_type.spawn_weight for monster_type in monsterTypes})
+        spawn_tables = {}
+        for zone, weights in zones.items():
+            for name in weights:
+                if name not in by_name:
+                    raise ValueError(f"Spawn table {zone} names an unknown monster: {name}")
+            spawn_tables[zone] = AliasTable((by_name[name] for name in weights), weights.values())
+        loot_tables = {zone: AliasTable(weights.keys(), weights.values()) for zone, weights in (lootTables or {}).items()}
+
+        set_attribute = super().__setattr__
+        set_attribute('types', monsterTypes)
+        set_attribute('names', tuple(monster_type.name for monster_type in monsterTypes))
+        set_attribute('descriptions', tuple(monster_type.description for monster_type in monsterTypes))
+        set_attribute('stats', stats)
+        set_attribute('roll_counts', roll_counts)
+        set_attribute('chases', chases)
+        set_attribute('move_intervals', move_intervals)
+        set_attribute('spawn_tables', MappingProxyType(spawn_tables))
+        set_attribute('loot_tables', MappingProxyType(loot_tables))
+        set_attribute('_by_name', MappingProxyType(by_name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("The bestiary is frozen and cannot be changed.")
+
+    def __len__(self):
+        return len(self.types)
+
+    def __iter__(self):
+        return iter(self.types)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __getitem__(self, name):
+        return self.types[self._by_name[name]]
+
+    def type_id(self, name):
+        """Returns the type id (position in types) of the monster called name."""
+        return self._by_name[name]
+
+    def spawn_type(self, zone=DEFAULT_ZONE, rng=random):
+        """Draws the type id of one monster spawning in zone, in O(1)."""
+        return self.spawn_tables[zone].draw(rng)
+
+    def spawn_types(self, n, zone=DEFAULT_ZONE, rng=None):
+        """Draws the type ids of n monsters spawning in zone at once (numpy.ndarray)."""
+        return self.spawn_tables[zone].draw_many(n, rng)
+
+    def roll(self, typeId, rng=random):
+        """Rolls one monster of the given type.
+
+        Args:
+            typeId (int): The type id of the monster to roll.
+            rng (random.Random, optional): Random generator to roll with. Defaults to the random module.
+
+        Returns:
+            dict: The monster's 'name', 'description', 'health', 'power' and 'money'.
+        """
+        monster_type = self.types[typeId]
+        return {'name': monster_type.name,
+                'description': monster_type.description,
+                'health': rng.choice(monster_type.health),
+                'power': rng.choice(monster_type.power),
+                'money': rng.choice(monster_type.money)}
+
+    def roll_many(self, typeIds, rng):
+        """Rolls the stats of many monsters at once.
+
+        Args:
+            typeIds (numpy.ndarray): The type id of every monster to roll.
+            rng (numpy.random.Generator): Random generator to roll with.
+
+        Returns:
+            numpy.ndarray: Array of shape (3, len(typeIds)) holding the health, power and money rows.
+        """
+        counts = self.roll_counts[typeIds].T
+        rolls = (rng.random(counts.shape) * counts).astype(np.int64)
+        stat_ids = np.arange(len(STAT_NAMES))[:, None]
+        return self.stats[typeIds[None, :], stat_ids, rolls]
+
+
+@lru_cache(maxsize=None)
+def load_bestiary(fileName=BESTIARY_FILE):
+    """Loads the bestiary stored in fileName. Each file is only read and parsed once.
+
+    Args:
+        fileName (str, optional): Path of the bestiary json file. Defaults to the bestiary.json next to this module.
+
+    Returns:
+        Bestiary: The frozen bestiary.
+    """
+    with open(fileName, 'r') as file:
+        data = json.load(file)
+
+    return Bestiary((MonsterType(name=monster['name'],
+                                 description=monster['description'],
+                                 image=monster.get('image'),
+                                 health=tuple(monster['health']),
+                                 power=tuple(monster['power']),
+                                 money=tuple(monster['money']),
+                                 spawn_weight=monster.get('spawnWeight', 1),
+                                 behavior=monster.get('behavior', 'wander'),
+                                 move_interval=monster.get('moveInterval', 1))
+                     for monster in data['monsters']),
+                    zones=data.get('zones'),
+                    lootTables=data.get('lootTables'))
+
+
+def get_bestiary():
+    """Returns the default bestiary (bestiary.json), loading it on first use."""
+    return load_bestiary(BESTIARY_FILE)
+
+
+if __name__ == '__main__':
+    bestiary = get_bestiary()
+    for monster_type in bestiary:
+        print(monster_type.name, monster_type.health, monster_type.power, monster_type.money)
+    for zone, table in bestiary.spawn_tables.items():
+        print(zone, [bestiary.names[type_id] for type_id in bestiary.spawn_types(5, zone)])
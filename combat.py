@@ -0,0 +1,136 @@
+"""
+Module Name: combat
+
+Description:
+    Resolves fights between the player and a monster without playing them out
+    round by round. Every round the player attacks first; if the monster survives it
+    hits back. Because both sides always deal the same damage, the number of rounds
+    each side needs to win can be worked out directly from health and power.
+
+Functions:
+    - resolveFight(monsterHealth, monsterPower, playerHealth, playerAttackPower, maxRounds=None):
+        Resolves one fight and returns a FightResult.
+    - resolveFights(monsterHealth, monsterPower, playerHealth, playerAttackPower, maxRounds=None):
+        Resolves whole arrays of fights at once and returns a FightResult of arrays.
+
+Examples:
+    >>> resolveFight(1200, 120, 100, 10)
+    FightResult(rounds=1, playerHealth=-20, monsterHealth=1190, damageTaken=120, winner='monster')
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# Result of a fight. For resolveFights every field is an array and winner holds
+# PLAYER_WINS, MONSTER_WINS or NO_WINNER instead of 'player', 'monster' or None.
+FightResult = namedtuple('FightResult', ['rounds', 'playerHealth', 'monsterHealth', 'damageTaken', 'winner'])
+
+PLAYER_WINS = 1
+MONSTER_WINS = -1
+NO_WINNER = 0
+
+# Stands in for "never" when a side deals no damage
+_NEVER = np.iinfo(np.int64).max
+
+
+def _roundsToKill(health, damage):
+    # Rounds of damage it takes to bring health to 0 or below
+    if health <= 0:
+        return 0
+    if damage <= 0:
+        return None
+    return -(-health // damage)
+
+
+def resolveFight(monsterHealth, monsterPower, playerHealth, playerAttackPower, maxRounds=None):
+    """
+    Works out the outcome of a fight without playing it round by round.
+
+    Parameters:
+        monsterHealth (int): The monster's current health.
+        monsterPower (int): The damage the monster deals each round it survives.
+        playerHealth (int): The player's current health.
+        playerAttackPower (int): The damage the player deals each round.
+        maxRounds (int, optional): Stop after this many rounds even if nobody has won. Defaults to None (fight to the end).
+
+    Returns:
+        FightResult: rounds fought, health left on both sides, damage the player took,
+        and the winner ('player', 'monster' or None if the fight was stopped by maxRounds).
+
+    Raises:
+        ValueError: If neither side can hurt the other and maxRounds is None.
+    """
+    if monsterHealth <= 0:
+        return FightResult(0, playerHealth, monsterHealth, 0, 'player')
+    if playerHealth <= 0:
+        return FightResult(0, playerHealth, monsterHealth, 0, 'monster')
+
+    # The player wins in round playerRounds, taking a hit in every round before it.
+    # The monster wins in round monsterRounds, if the player has not won by then.
+    playerRounds = _roundsToKill(monsterHealth, playerAttackPower)
+    monsterRounds = _roundsToKill(playerHealth, monsterPower)
+
+    if playerRounds is not None and (monsterRounds is None or playerRounds <= monsterRounds):
+        rounds, hitsTaken, winner = playerRounds, playerRounds - 1, 'player'
+    elif monsterRounds is not None:
+        rounds, hitsTaken, winner = monsterRounds, monsterRounds, 'monster'
+    elif maxRounds is None:
+        raise ValueError('Neither side can ever win this fight.')
+    else:
+        rounds, hitsTaken, winner = maxRounds, maxRounds, None
+
+    if maxRounds is not None and maxRounds < rounds:
+        rounds, hitsTaken, winner = maxRounds, maxRounds, None
+
+    damageTaken = hitsTaken * monsterPower
+    return FightResult(rounds, playerHealth - damageTaken, monsterHealth - rounds * playerAttackPower, damageTaken, winner)
+
+
+def resolveFights(monsterHealth, monsterPower, playerHealth, playerAttackPower, maxRounds=None):
+    """
+    Vectorized resolveFight: resolves arrays of fights at once. Arguments broadcast against each other.
+
+    Parameters:
+        monsterHealth (array_like): Each monster's health.
+        monsterPower (array_like): Each monster's power.
+        playerHealth (array_like): The player's health in each fight.
+        playerAttackPower (array_like): The player's attack power in each fight.
+        maxRounds (array_like, optional): Round limit of each fight. Defaults to None (fight to the end).
+
+    Returns:
+        FightResult: Arrays of rounds, playerHealth, monsterHealth and damageTaken, and a winner
+        array holding PLAYER_WINS, MONSTER_WINS or NO_WINNER. A fight nobody can win without a
+        round limit is reported with NO_WINNER and 0 rounds.
+    """
+    monsterHealth, monsterPower, playerHealth, playerAttackPower = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.int64) for value in (monsterHealth, monsterPower, playerHealth, playerAttackPower)))
+
+    # Same rules as _roundsToKill, with _NEVER for "cannot win"
+    with np.errstate(divide='ignore', invalid='ignore'):
+        playerRounds = np.where(playerAttackPower > 0, -(-monsterHealth // np.maximum(playerAttackPower, 1)), _NEVER)
+        monsterRounds = np.where(monsterPower > 0, -(-playerHealth // np.maximum(monsterPower, 1)), _NEVER)
+    playerRounds = np.where(monsterHealth <= 0, 0, playerRounds)
+    monsterRounds = np.where(playerHealth <= 0, 0, monsterRounds)
+
+    playerWins = (playerRounds != _NEVER) & (playerRounds <= monsterRounds)
+    monsterWins = ~playerWins & (monsterRounds != _NEVER)
+    rounds = np.where(playerWins, playerRounds, np.where(monsterWins, monsterRounds, 0))
+    hitsTaken = np.where(playerWins, np.maximum(playerRounds - 1, 0), rounds)
+    winner = np.where(playerWins, PLAYER_WINS, np.where(monsterWins, MONSTER_WINS, NO_WINNER))
+
+    if maxRounds is not None:
+        maxRounds = np.broadcast_to(np.asarray(maxRounds, dtype=np.int64), rounds.shape)
+        stopped = (winner == NO_WINNER) | (maxRounds < rounds)
+        rounds = np.where(stopped, maxRounds, rounds)
+        hitsTaken = np.where(stopped, maxRounds, hitsTaken)
+        winner = np.where(stopped, NO_WINNER, winner)
+
+    damageTaken = hitsTaken * monsterPower
+    return FightResult(rounds, playerHealth - damageTaken, monsterHealth - rounds * playerAttackPower, damageTaken, winner)
+
+
+if __name__ == '__main__':
+    print(resolveFight(14, 2, 100, 10))
+    print(resolveFight(1200, 120, 100, 20))
+    print(resolveFights([14, 18, 1200], [2, 30, 120], 100, 10))
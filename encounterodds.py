@@ -0,0 +1,136 @@
+"""
+Module Name: encounterodds
+
+Description:
+    Exact odds for an encounter, worked out instead of sampled. A monster's health and
+    power are drawn from a few values each, and its type from a weighted spawn table, so
+    every possible monster can be listed with its probability and every fight resolved
+    with combat.resolveFights. The answers are memoized per player state, so asking
+    again (e.g. every turn from game.displayMenu) is a dictionary lookup.
+
+Functions:
+    - encounterOdds(playerHealth, playerAttackPower, playerGold=0, potions=0, monsterName=None,
+                    monsterHealth=None, monsterPower=None, zone='default'):
+        Returns the win probability and expected HP loss of 'fight', 'potion' and 'sleep then fight'.
+    - formatOdds(odds):
+        Formats the result of encounterOdds as one line for the menu.
+
+Examples:
+    >>> encounterOdds(100, 10)['fight']
+    Odds(winProbability=0.6666666666666665, expectedHealthLoss=47.333333333333336)
+    >>> encounterOdds(100, 20, monsterName='troll')['fight'].winProbability
+    1.0
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from bestiary import DEFAULT_ZONE, get_bestiary
+from combat import PLAYER_WINS, resolveFights
+
+# Sleeping rules from game.main
+SLEEP_COST = 5
+SLEEP_RESTORE = 15
+MAX_HEALTH = 100
+
+# Chance of winning and the HP the player can expect to lose (negative means HP gained)
+Odds = namedtuple('Odds', ['winProbability', 'expectedHealthLoss'])
+
+
+@lru_cache(maxsize=None)
+def _monsterOutcomes(zone, monsterName, monsterHealth, monsterPower):
+    # Every monster that can show up as (health, power, probability) arrays
+    bestiary = get_bestiary()
+    if monsterName is None:
+        table = bestiary.spawn_tables[zone]
+        total = sum(table.weights)
+        types = [(typeId, weight / total) for typeId, weight in zip(table.items, table.weights) if weight > 0]
+    else:
+        types = [(bestiary.type_id(monsterName), 1.0)]
+
+    healths, powers, probabilities = [], [], []
+    for typeId, typeProbability in types:
+        monsterType = bestiary.types[typeId]
+        healthValues = (monsterHealth,) if monsterHealth is not None else monsterType.health
+        powerValues = (monsterPower,) if monsterPower is not None else monsterType.power
+        probability = typeProbability / (len(healthValues) * len(powerValues))
+        for health in healthValues:
+            for power in powerValues:
+                healths.append(health)
+                powers.append(power)
+                probabilities.append(probability)
+
+    return np.array(healths), np.array(powers), np.array(probabilities)
+
+
+@lru_cache(maxsize=65536)
+def _fightOdds(playerHealth, playerAttackPower, zone, monsterName, monsterHealth, monsterPower):
+    healths, powers, probabilities = _monsterOutcomes(zone, monsterName, monsterHealth, monsterPower)
+    results = resolveFights(healths, powers, playerHealth, playerAttackPower)
+    winProbability = float(probabilities[results.winner == PLAYER_WINS].sum())
+    healthLeft = np.maximum(results.playerHealth, 0)
+    return Odds(winProbability, float(playerHealth - (probabilities * healthLeft).sum()))
+
+
+@lru_cache(maxsize=65536)
+def encounterOdds(playerHealth, playerAttackPower, playerGold=0, potions=0, monsterName=None,
+                  monsterHealth=None, monsterPower=None, zone=DEFAULT_ZONE):
+    """
+    Works out the exact odds of each way to deal with a monster.
+
+    Anything not known about the monster (its type, health or power) is averaged over
+    everything the bestiary and the zone's spawn table allow.
+
+    Parameters:
+        playerHealth (int): The player's current health.
+        playerAttackPower (int): The player's current attack power.
+        playerGold (int, optional): The player's gold, used to check if sleeping is possible. Defaults to 0.
+        potions (int, optional): How many magic potions the player has. Defaults to 0.
+        monsterName (str, optional): The monster's name if known. Defaults to None (any monster of the zone).
+        monsterHealth (int, optional): The monster's health if known. Defaults to None.
+        monsterPower (int, optional): The monster's power if known. Defaults to None.
+        zone (str, optional): Spawn table the monster comes from when its name is unknown. Defaults to 'default'.
+
+    Returns:
+        dict: 'fight', 'potion' and 'sleep then fight' mapped to Odds, or to None if that
+        option is not available (no potion, or not enough gold to sleep).
+    """
+    if monsterHealth is not None and monsterHealth <= 0:
+        fight = Odds(1.0, 0.0)
+    else:
+        fight = _fightOdds(playerHealth, playerAttackPower, zone, monsterName, monsterHealth, monsterPower)
+
+    potion = Odds(1.0, 0.0) if potions > 0 else None
+
+    sleepThenFight = None
+    if playerGold >= SLEEP_COST:
+        restoredHealth = min(playerHealth + SLEEP_RESTORE, MAX_HEALTH)
+        afterSleep = encounterOdds(restoredHealth, playerAttackPower, 0, 0, monsterName, monsterHealth, monsterPower, zone)['fight']
+        sleepThenFight = Odds(afterSleep.winProbability, afterSleep.expectedHealthLoss - (restoredHealth - playerHealth))
+
+    return {'fight': fight, 'potion': potion, 'sleep then fight': sleepThenFight}
+
+
+def formatOdds(odds):
+    """
+    Formats the result of encounterOdds as one line, e.g. "fight 67% (-47 HP), potion 100% (+0 HP)".
+
+    Parameters:
+        odds (dict): The result of encounterOdds.
+
+    Returns:
+        str: The formatted odds of every available option.
+    """
+    return ', '.join(f'{option} {choice.winProbability:.0%} ({0.0 - choice.expectedHealthLoss:+.0f} HP)'
+                     for option, choice in odds.items() if choice is not None)
+
+
+if __name__ == '__main__':
+    print('Any monster:', formatOdds(encounterOdds(100, 10, playerGold=10, potions=1)))
+    print('Armed, any monster:', formatOdds(encounterOdds(100, 20, playerGold=10, potions=1)))
+    for zone in get_bestiary().spawn_tables:
+        print(f'Armed, {zone}:', formatOdds(encounterOdds(100, 20, zone=zone)))
+    for name in get_bestiary().names:
+        print(f'Armed at 50 HP vs {name}:', formatOdds(encounterOdds(50, 20, playerGold=10, monsterName=name)))
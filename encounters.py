@@ -0,0 +1,169 @@
+"""
+Module Name: encounters
+
+Description:
+    Event-driven encounters between the player and the monsters of a MonsterStore.
+    Instead of testing every monster against the player on every tick, the tracker is
+    told when the player or some monsters change cell, and only compares those with
+    the set of monsters currently sharing the player's cell. The monsters it is told
+    about are kept in a spatialgrid.CellIndex, so when the player steps onto a cell its
+    monsters are looked up instead of searched for. It raises an 'enter' event
+    for the monsters that come into contact, 'stay' for the monsters that moved (or
+    tried to) and are still in contact, and 'exit' for those whose contact ended. An
+    event carries every monster concerned as an array of rows, so a batch of moves
+    raises at most one event of each kind however many monsters pile onto the player.
+    The events go to an EventQueue that the game processes once per tick.
+
+Classes:
+    - EncounterEvent(kind, rows):
+        One encounter event: its kind (ENTER, STAY or EXIT) and the monsters' rows.
+    - EventQueue():
+        FIFO of events, dispatched to handlers by kind.
+    - EncounterTracker(store, queue):
+        Turns player and monster moves into encounter events.
+
+Examples:
+    >>> queue = EventQueue()
+    >>> tracker = EncounterTracker(monsters, queue)
+    >>> tracker.move_player((4, 7))
+    >>> tracker.monsters_moved(due_rows)
+    >>> queue.process({ENTER: monster_attacks, STAY: monster_attacks})  # Once per tick
+    2
+"""
+
+from collections import deque, namedtuple
+
+import numpy as np
+
+from spatialgrid import CellIndex
+
+# Kinds of encounter events
+ENTER = 'enter'
+STAY = 'stay'
+EXIT = 'exit'
+
+EncounterEvent = namedtuple('EncounterEvent', ['kind', 'rows'])
+
+
+class EventQueue:
+    """Events waiting to be handled, in the order they were raised."""
+
+    def __init__(self):
+        self._events = deque()
+
+    def __len__(self):
+        return len(self._events)
+
+    def push(self, event):
+        """Queues event (any object with a kind attribute)."""
+        self._events.append(event)
+
+    def process(self, handlers):
+        """
+        Handles the queued events in order. Events pushed by the handlers wait for the next call.
+
+        Args:
+            handlers (dict): Maps an event kind to the function called with each event of that kind.
+                Events of other kinds are dropped.
+
+        Returns:
+            int: How many events were processed.
+        """
+        events = self._events
+        count = len(events)
+        for _ in range(count):
+            event = events.popleft()
+            handler = handlers.get(event.kind)
+            if handler is not None:
+                handler(event)
+        return count
+
+
+class EncounterTracker:
+    """Tracks which monsters share the player's cell and queues an event whenever that changes.
+
+    Attributes:
+        store (monsterstore.MonsterStore): The monsters.
+        queue (EventQueue): Where the events go.
+        cells (spatialgrid.CellIndex): The cell of every monster, as of the last move it was told about.
+        cell (tuple): The player's (x, y) cell (None until move_player is called).
+        touching (numpy.ndarray): Rows of the monsters on the player's cell.
+    """
+
+    def __init__(self, store, queue):
+        self.store = store
+        self.queue = queue
+        self.cells = CellIndex(store.grid_size, store.grid_size)
+        live = store.live()
+        self.cells.move(live, store.x[live], store.y[live])
+        self.cell = None
+        self.touching = np.zeros(0, dtype=np.int64)
+        self._touching = np.zeros(0, dtype=bool)  # The same rows as a mask over the store's rows
+
+    def _push(self, kind, rows):
+        if len(rows):
+            self.queue.push(EncounterEvent(kind, rows))
+
+    def _mask(self):
+        # The touching mask, grown along with the store
+        if len(self._touching) < len(self.store.alive):
+            grown = np.zeros(len(self.store.alive), dtype=bool)
+            grown[:len(self._touching)] = self._touching
+            self._touching = grown
+        return self._touching
+
+    def move_player(self, cell):
+        """
+        Tells the tracker the player is on cell. Only the monsters on the cells they left and entered are looked at.
+
+        Args:
+            cell (tuple): The player's (x, y) cell.
+
+        Returns:
+            None
+        """
+        cell = (int(cell[0]), int(cell[1]))
+        if cell == self.cell:
+            return
+        self.cell = cell
+        here = self.cells.occupants(cell)
+        here = here[self.store.alive[here]]  # Rows removed without a monsters_moved call may still be indexed
+        touching = self._mask()
+        # Everything touching the player was on the cell they left
+        touching[self.touching] = False
+        self._push(EXIT, self.touching)
+        self._push(ENTER, here)
+        touching[here] = True
+        self.touching = here
+
+    def monsters_moved(self, rows):
+        """
+        Tells the tracker the monsters in rows moved (or tried to), e.g. after a tick or a spawn.
+
+        Args:
+            rows (numpy.ndarray): Rows of the monsters that moved, each once. Removed monsters exit.
+
+        Returns:
+            None
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        store = self.store
+        alive = store.alive[rows]
+        self.cells.move(rows[alive], store.x[rows[alive]], store.y[rows[alive]])
+        self.cells.remove(rows[~alive])
+        if self.cell is None:
+            return
+        touching = self._mask()
+        here = alive & (store.x[rows] == self.cell[0]) & (store.y[rows] == self.cell[1])
+        was = touching[rows]
+        entered = rows[here & ~was]
+        exited = rows[was & ~here]
+        self._push(ENTER, entered)
+        self._push(STAY, rows[here & was])
+        self._push(EXIT, exited)
+        touching[entered] = True
+        touching[exited] = False
+        if len(exited):
+            self.touching = self.touching[touching[self.touching]]
+        if len(entered):
+            self.touching = np.concatenate([self.touching, entered])
@@ -0,0 +1,229 @@
+"""
+Module Name: flowfield
+
+Description:
+    A shared distance map for monsters that chase the player. Instead of every chasing
+    monster searching its own path (a BFS per monster per tick), one breadth-first
+    search from the player's cell gives the walking distance to the player of every
+    cell of a square window around them. Any monster then finds its next step by
+    looking at its 4 neighbouring cells and stepping to the closest one, in O(1).
+
+    When the player steps to a neighbouring cell, the map is repaired instead of searched
+    again. Every old distance plus one is still a valid upper bound, and that +1 is an
+    offset kept next to the array rather than an addition to every cell. A search from
+    the new cell then only visits the cells that got closer to the player, about half
+    of the window, and stops where the old distances are already right. The result is
+    exactly what a full search would give, at about half its cost. The window moves
+    with the player: it is rebuilt around them once they get near its edge.
+
+Classes:
+    - FlowField(world, radius=64):
+        Distances to a target cell over a (2 * radius + 1) square window of a WorldMap.
+
+Examples:
+    >>> field = FlowField(world, radius=32)
+    >>> field.update((120, 48))  # The player's cell
+    >>> field.distance((118, 50))
+    4
+    >>> field.update((121, 48))  # Moved one cell: only the cells that got closer are searched
+    >>> dx, dy, following = field.next_steps(monsters.x, monsters.y)
+
+    Run this module to benchmark rebuilds, one-cell moves and lookups at several window sizes:
+        python flowfield.py
+"""
+
+import numpy as np
+import pygame
+
+from worldmap import FLOOR
+
+# Distance of the cells the field does not reach (rock, cut off, or outside the window)
+UNREACHED = np.iinfo(np.int32).max
+
+# Step of each of the four directions (up, down, left, right), in the same order as monsterstore.DIRECTION_X/Y
+STEP_X = np.array([0, 0, -1, 1], dtype=np.int8)
+STEP_Y = np.array([-1, 1, 0, 0], dtype=np.int8)
+
+# One-cell moves between two rebuilds, before the stored distances could drift out of int32
+_MAX_MOVES = 1 << 24
+
+
+class FlowField:
+    """Walking distances to a target cell over a square window of a WorldMap, centered near the target.
+
+    The distances are kept in a flat array with a border of unreached cells around the
+    window, so the neighbours of any window cell can be read without bounds checks. The
+    array holds each distance minus the number of one-cell moves since the last rebuild.
+
+    Attributes:
+        world (worldmap.WorldMap): The map whose rock blocks the paths.
+        radius (int): Half the width of the window, in cells.
+        area (pygame.Rect): The window, in cells (None before the first update).
+        target (tuple): The (x, y) cell the distances lead to (None before the first update).
+        rebuilds (int): How many times the window was searched from scratch.
+        increments (int): How many one-cell moves were repaired instead.
+    """
+
+    def __init__(self, world, radius=64):
+        if radius < 1:
+            raise ValueError('The flow field radius must be at least 1.')
+        self.world = world
+        self.radius = radius
+        self.side = 2 * radius + 1
+        self.stride = self.side + 2
+        self.area = None
+        self.target = None
+        self.rebuilds = 0
+        self.increments = 0
+        self._base = 0  # Added to every stored distance (but UNREACHED) to get the real one
+        self._offsets = STEP_Y.astype(np.int64) * self.stride + STEP_X
+        self._distance = np.full(self.stride * self.stride, UNREACHED, dtype=np.int32)
+        self._open = np.zeros(self.stride * self.stride, dtype=bool)
+
+    def _index(self, cell):
+        # Flat index of a window cell in the padded arrays
+        return (cell[1] - self.area.top + 1) * self.stride + cell[0] - self.area.left + 1
+
+    def update(self, cell):
+        """
+        Makes cell the target. Moving it to a neighbouring cell well inside the window only
+        searches the cells that got closer to it, anything else rebuilds the window around cell.
+
+        Args:
+            cell (tuple): The new (x, y) target cell.
+
+        Returns:
+            None
+        """
+        cell = (int(cell[0]), int(cell[1]))
+        if cell == self.target:
+            return
+        if (self.target is not None and abs(cell[0] - self.target[0]) + abs(cell[1] - self.target[1]) == 1
+                and max(abs(cell[0] - self.area.centerx), abs(cell[1] - self.area.centery)) <= self.radius // 2
+                and self._base < _MAX_MOVES):
+            self._move_target(cell)
+        else:
+            self._rebuild(cell)
+
+    def _rebuild(self, cell):
+        self.area = pygame.Rect(cell[0] - self.radius, cell[1] - self.radius, self.side, self.side)
+        self.target = cell
+        self.rebuilds += 1
+        opened = (self.world.tiles(self.area) == FLOOR)
+        self._open[:] = False
+        self._open.reshape(self.stride, self.stride)[1:-1, 1:-1] = opened
+        self._distance[:] = UNREACHED
+        self._base = 0
+        self._search(self._index(cell))
+
+    def _move_target(self, cell):
+        # Every distance to the old target plus one is a valid distance to the new one, which is next to it:
+        # raising the offset adds that one everywhere. Only the cells for which the new target is closer
+        # than that are searched again
+        self.target = cell
+        self.increments += 1
+        self._base += 1
+        self._search(self._index(cell))
+
+    def _search(self, start):
+        # Breadth-first search from start that only lowers distances, one wavefront per step. It stops
+        # where the stored distances are already at most the new ones
+        distance = self._distance
+        if not self._open[start]:
+            return
+        distance[start] = -self._base
+        frontier = np.array([start])
+        stored = -self._base
+        while len(frontier):
+            stored += 1
+            neighbours = (frontier[:, None] + self._offsets).ravel()
+            neighbours = np.unique(neighbours[self._open[neighbours] & (distance[neighbours] > stored)])
+            distance[neighbours] = stored
+            frontier = neighbours
+
+    def distance(self, cell):
+        """Returns the walking distance from cell to the target, or UNREACHED."""
+        x, y = cell
+        if self.area is None or not self.area.collidepoint(x, y):
+            return UNREACHED
+        stored = int(self._distance[self._index(cell)])
+        return UNREACHED if stored == UNREACHED else stored + self._base
+
+    def distances(self):
+        """Returns the distances of the window as a new (side, side) array indexed [y, x] from area's top left."""
+        distances = self._distance.reshape(self.stride, self.stride)[1:-1, 1:-1].copy()
+        distances[distances != UNREACHED] += self._base
+        return distances
+
+    def next_steps(self, x, y):
+        """
+        Returns the step towards the target of each cell, in O(1) per cell.
+
+        Args:
+            x (numpy.ndarray): The x cell of each entity.
+            y (numpy.ndarray): The y cell of each entity.
+
+        Returns:
+            tuple: (dx, dy, following) arrays. following is False for cells outside the window or cut off
+            from the target, whose step is (0, 0); cells on the target follow it with a (0, 0) step.
+        """
+        if self.area is None:
+            zeros = np.zeros(len(x), dtype=np.int8)
+            return zeros, zeros.copy(), np.zeros(len(x), dtype=bool)
+        local_x = np.asarray(x, dtype=np.int64) - self.area.left
+        local_y = np.asarray(y, dtype=np.int64) - self.area.top
+        inside = (local_x >= 0) & (local_x < self.side) & (local_y >= 0) & (local_y < self.side)
+        index = np.where(inside, (local_y + 1) * self.stride + local_x + 1, 0)
+
+        # Comparing stored distances is comparing distances, the offset is the same for every cell
+        here = self._distance[index]
+        around = self._distance[index[:, None] + self._offsets]
+        best = around.argmin(axis=1)
+        following = inside & (here != UNREACHED)
+        stepping = following & (around[np.arange(len(best)), best] < here)
+        return np.where(stepping, STEP_X[best], 0), np.where(stepping, STEP_Y[best], 0), following
+
+
+if __name__ == '__main__':
+    import timeit
+    from collections import deque
+
+    from worldmap import WorldMap
+
+    world = WorldMap(10000, 10000, seed=3, rock_density=0.06)
+
+    def single_bfs(area, start):
+        # What one chasing monster would pay to search its own path with a plain BFS over the same window
+        blocked = world.tiles(area) != FLOOR
+        seen = np.zeros_like(blocked)
+        queue = deque([(start[0] - area.left, start[1] - area.top)])
+        while queue:
+            x, y = queue.popleft()
+            for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < area.width and 0 <= ny < area.height and not blocked[ny, nx] and not seen[ny, nx]:
+                    seen[ny, nx] = True
+                    queue.append((nx, ny))
+
+    start = world.open_cell_near((5000, 5000))
+    monsters = np.random.default_rng(1).integers(4000, 6000, size=(2, 1000000))
+    print(f"{'window':>11} {'rebuild (ms)':>13} {'1-cell move (ms)':>17} {'per-monster BFS (ms)':>21} "
+          f"{'1M lookups (ms)':>16}")
+    for radius in (16, 64, 256, 1024):
+        field = FlowField(world, radius)
+        rebuild = timeit.timeit(lambda: (setattr(field, 'target', None), field.update(start)), number=3) / 3
+
+        # Walk back and forth between two open neighbours so every update is a one-cell move
+        neighbour = next((start[0] + dx, start[1] + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                         if not world.is_blocked((start[0] + dx, start[1] + dy)))
+        steps = iter([neighbour, start] * 10)
+        move = timeit.timeit(lambda: field.update(next(steps)), number=20) / 20
+        assert field.increments == 20 and field.target == start
+        fresh = FlowField(world, radius)
+        fresh.update(start)
+        assert np.array_equal(field.distances(), fresh.distances())  # The same as searching from scratch
+
+        bfs = timeit.timeit(lambda: single_bfs(field.area, start), number=1) if radius <= 256 else float('nan')
+        lookup = timeit.timeit(lambda: field.next_steps(monsters[0], monsters[1]), number=3) / 3
+        print(f'{field.side:>5}x{field.side:<5} {rebuild * 1e3:>13.2f} {move * 1e3:>17.2f} {bfs * 1e3:>21.1f} '
+              f'{lookup * 1e3:>16.1f}')
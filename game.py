@@ -1,14 +1,21 @@
 from gamefunctions import new_random_monster
-import json
+from combat import resolveFight
+from encounterodds import encounterOdds, formatOdds
+from autosave import AutoSaver, writeAtomic
+from savecodec import BINARY_SUFFIX, decodeSave, encodeSave
+from savejournal import loadJournaled, openJournal
+from saveslots import SaveSlots
 import os
+import time
 
-# Save the game to your file 
-def saveGame(fileName, itemInventory, playerHealth, playerGold, equippiedItems, swordDurability):
+AUTOSAVE_SLOT = 'autosave'  # Save slot written in the background after every turn
+
+# Copy the game state, so it can be saved while the game goes on
+def snapshotGame(itemInventory, playerHealth, playerGold, equippiedItems, swordDurability):
     """
-    Saves the current game state to a file.
+    Returns a copy of the game state in the save file layout. Cheap: the state is a few small lists.
 
     Parameters:
-        fileName (str): The name of the file to save the game state to.
         itemInventory (list): The player's current inventory of items.
         playerHealth (int): The player's current health.
         playerGold (int): The player's current gold.
@@ -16,24 +23,52 @@ def saveGame(fileName, itemInventory, playerHealth, playerGold, equippiedItems,
         swordDurability (int): The current durability of the player's sword.
 
     Returns:
-        None
+        dict: The game data, sharing nothing the game can change afterwards.
     """
 
-    gameData = {
-        'itemInventory': itemInventory,
+    return {
+        'itemInventory': [dict(item) for item in itemInventory],
         'playerHealth': playerHealth,
         'playerGold': playerGold,
-        'equippiedItems': equippiedItems,
+        'equippiedItems': list(equippiedItems),
         'swordDurability': swordDurability
     }
-    with open(fileName, 'w') as file:
-        json.dump(gameData, file)
+
+# Save the game to your file 
+def saveGame(fileName, itemInventory, playerHealth, playerGold, equippiedItems, swordDurability):
+    """
+    Saves the current game state to a file. Only what changed since the file was last saved
+    is appended to its journal (see savejournal.py), so a crash while saving leaves the
+    previous save intact. A fileName ending in '.sav' is written whole in the compact
+    binary format instead (see savecodec.py).
+
+    Parameters:
+        fileName (str): The name of the file to save the game state to.
+        itemInventory (list): The player's current inventory of items.
+        playerHealth (int): The player's current health.
+        playerGold (int): The player's current gold.
+        equippiedItems (list): A list of items the player has equipped.
+        swordDurability (int): The current durability of the player's sword.
+
+    Returns:
+        None
+    """
+
+    gameData = snapshotGame(itemInventory, playerHealth, playerGold, equippiedItems, swordDurability)
+    if fileName.endswith(BINARY_SUFFIX):
+        writeAtomic(fileName, encodeSave(gameData))
+        print(f'Game saved to {fileName}.')
+        return
+    journal = openJournal(fileName)
+    journal.save(gameData)
+    journal.sync()
     print(f'Game saved to {fileName}.')
 
 # Load a previous game from your file
 def loadGame(fileName):
     """
-    Loads the game state from a file.
+    Loads the game state from a file, replaying its journal onto the last snapshot.
+    Binary saves ('.sav', see savecodec.py) are decoded instead.
 
     Parameters:
         fileName (str): The name of the file to load the game state from.
@@ -47,12 +82,36 @@ def loadGame(fileName):
             - swordDurability (int): The current durability of the player's sword.
     """
 
-    if not os.path.exists(fileName):
+    if fileName.endswith(BINARY_SUFFIX):
+        try:
+            with open(fileName, 'rb') as file:
+                gameData = decodeSave(file.read())
+        except FileNotFoundError:
+            gameData = None
+    else:
+        gameData = loadJournaled(fileName)
+    if gameData is None:
         print(f'No save file found with the name {fileName}. Starting a new game.')
         return None 
 
-    with open(fileName, 'r') as file:
-        gameData = json.load(file)
+    loaded = unpackGame(gameData)
+    if loaded[1] <= 0:
+        print(f'The player saved in {fileName} is dead. Starting a new game.')
+        return None
+    print(f'Game loaded from {fileName}.')
+    return loaded
+
+# Turn saved game data back into the game's variables
+def unpackGame(gameData):
+    """
+    Returns the values of saved game data in the order loadGame returns them.
+
+    Parameters:
+        gameData (dict): The game data, as saved.
+
+    Returns:
+        tuple: itemInventory, playerHealth, playerGold, equippiedItems and swordDurability.
+    """
 
     itemInventory = gameData['itemInventory']
     playerHealth = gameData['playerHealth']
@@ -60,23 +119,63 @@ def loadGame(fileName):
     equippiedItems = gameData['equippiedItems']
     swordDurability = gameData['swordDurability']
 
-    print(f'Game loaded from {fileName}.')
     return itemInventory, playerHealth, playerGold, equippiedItems, swordDurability
 
+# Let the player pick a save slot
+def chooseSave(saveSlots):
+    """
+    Lists the save slots from their manifest, without opening the saves, and loads the one the
+    player picks. The player can also type the name of a save file outside the save folder.
+
+    Parameters:
+        saveSlots (saveslots.SaveSlots): The save slots.
+
+    Returns:
+        tuple: The loaded game, like loadGame, or None if nothing was loaded.
+    """
+
+    slots = saveSlots.list()
+    if slots:
+        print('Saved games:')
+        for number, slot in enumerate(slots, 1):
+            savedAt = time.strftime('%Y-%m-%d %H:%M', time.localtime(slot.savedAt))
+            print(f'{number}) {slot.slot} - saved {savedAt} - HP: {slot.playerHealth}, Gold: {slot.playerGold}')
+
+    choice = input("Enter the number or name of the save to load (or a save file, e.g. 'save.json'): ")
+    names = [slot.slot for slot in slots]
+    if choice.isdigit() and 1 <= int(choice) <= len(names):
+        choice = names[int(choice) - 1]
+    if choice not in names:
+        return loadGame(choice)
+
+    try:
+        gameData = saveSlots.load(choice)  # Only the chosen save is read
+        loaded = unpackGame(gameData)
+    except (OSError, ValueError, LookupError, TypeError):
+        print(f'The save in slot {choice} cannot be read. Starting a new game.')
+        return None
+    if loaded[1] <= 0:
+        print(f'The player saved in slot {choice} is dead. Starting a new game.')
+        return None
+    print(f'Game loaded from slot {choice}.')
+    return loaded
+
 def main():
     """
     Main function to start/load the game. It generates a random monster,
     displays its information, and enters a loop where the player can
     interact with the monster by fighting, sleeping to restore health,
-    or quitting the game.
+    or quitting the game. The game is autosaved to the AUTOSAVE_SLOT save slot after every turn,
+    and that slot is deleted when the player dies.
     """
 
+    saveSlots = SaveSlots()
+
     print('Welcome to my Adventure Game!') # Ask the player if they already have a game started
     choice = input('Would you like to 1) Start a new game or 2) Load a saved game: ')
 
     if choice == '2':
-        fileName = input("Enter the filename to load the game (e.g., 'save.json'): ")
-        gameData = loadGame(fileName)
+        gameData = chooseSave(saveSlots)
         if gameData:
             itemInventory, playerHealth, playerGold, equippiedItems, swordDurability = gameData
         else:
@@ -113,15 +212,58 @@ def main():
     playerAttackPower = 10 # Set base player attack power to 10
     monsterDefeated = False # Sets a variable to determine if the monster has already been killed i.e Magic Potion
 
+    # Autosaves are written on a background thread, handing one in does not slow the game down.
+    # Each one only appends what changed to the autosave's journal
+    autoSaveFile = saveSlots.path(AUTOSAVE_SLOT)
+    os.makedirs(saveSlots.folder, exist_ok=True)
+    autoSaveJournal = openJournal(autoSaveFile)
+    autoSaver = AutoSaver(autoSaveFile, save=autoSaveJournal.save)
+    died = False
+    try:
+        died = playTurns(monster, itemInventory, playerHealth, playerGold, equippiedItems, swordDurability,
+                         playerAttackPower, monsterDefeated, autoSaver, saveSlots)
+    finally:
+        autoSaver.close()  # Writes the last turn before the game exits
+        autoSaveJournal.close()
+        if died:
+            saveSlots.delete(AUTOSAVE_SLOT)  # There is nothing left to resume
+        if autoSaver.lastError:
+            print(f'Autosave failed: {autoSaver.lastError}')
+
+def playTurns(monster, itemInventory, playerHealth, playerGold, equippiedItems, swordDurability,
+              playerAttackPower, monsterDefeated, autoSaver, saveSlots):
+    """
+    Runs the menu loop of main until the player quits or dies, autosaving after every turn
+    (but not the turn the player died in).
+
+    Parameters:
+        monster (dict): The current monster with its attributes.
+        itemInventory (list): The player's current inventory of items.
+        playerHealth (int): The player's current health.
+        playerGold (int): The player's current gold.
+        equippiedItems (list): A list of items the player has equipped.
+        swordDurability (int): The current durability of the player's sword.
+        playerAttackPower (int): The player's current attack power.
+        monsterDefeated (bool): Whether the monster was already defeated with a magic potion.
+        autoSaver (autosave.AutoSaver): Where the state goes after every turn.
+        saveSlots (saveslots.SaveSlots): Where the player can save before quitting.
+
+    Returns:
+        bool: True if the player died, False if they quit.
+    """
+
     while True:
-        displayMenu(monster, playerHealth, playerGold, equippiedItems, monsterDefeated)
+        autoSaver.update(snapshotGame(itemInventory, playerHealth, playerGold, equippiedItems, swordDurability))
+        potion = next((item for item in itemInventory if item['name'] == 'magic potion'), None)
+        displayMenu(monster, playerHealth, playerGold, equippiedItems, monsterDefeated,
+                    playerAttackPower, potion['quantity'] if potion else 0)
 
         choice = input('Enter your choice (1-5): ')
         if choice == '1' and not monsterDefeated:
             playerHealth = fightMonster(monster, playerHealth, playerAttackPower)
             if playerHealth <= 0: # Check if player has HP
                 print('Game Over!')
-                break 
+                return True
             swordDurability -= 1 # Reduce durability after fighting
             if swordDurability <= 0: # Check if sword is broken
                 print("Your sword has broken!")
@@ -154,14 +296,24 @@ def main():
             print('You chose to quit. Goodbye!!')
             saveChoice = input('Would you like to save the game before quitting? (yes/no): ')
             if saveChoice.lower() == 'yes':
-                fileName = input("Enter the filename to save the game (e.g., 'save.json'): ")
-                saveGame(fileName, itemInventory, playerHealth, playerGold, equippiedItems, swordDurability)
+                while True:
+                    slot = input("Enter a name for the save slot (e.g., 'John'): ")
+                    try:
+                        saveSlots.save(slot, snapshotGame(itemInventory, playerHealth, playerGold, equippiedItems, swordDurability))
+                    except ValueError as error:
+                        print(error)
+                        continue
+                    print(f'Game saved to slot {slot}.')
+                    break
             break
 
         else:
             print('Invalid choice. Please choose (1-5).')
 
-def displayMenu(monster, playerHealth, playerGold, equippiedItems, monsterDefeated):
+    autoSaver.update(snapshotGame(itemInventory, playerHealth, playerGold, equippiedItems, swordDurability))  # The last turn
+    return False
+
+def displayMenu(monster, playerHealth, playerGold, equippiedItems, monsterDefeated, playerAttackPower=None, potions=0):
     """
     Displays the current status of the player and the available options.
 
@@ -170,12 +322,19 @@ def displayMenu(monster, playerHealth, playerGold, equippiedItems, monsterDefeat
         playerHealth (int): The player's current health.
         playerGold (int): The player's current gold.
         equippiedItems (list): The items the player has equipped.
+        monsterDefeated (bool): Whether the monster was already defeated with a magic potion.
+        playerAttackPower (int, optional): The player's attack power, used to show the odds of each option. Defaults to None (odds not shown).
+        potions (int, optional): How many magic potions the player has. Defaults to 0.
 
     Returns:
         None
     """
     print(f'Current HP: {playerHealth}, Current Gold: {playerGold}')
     print('Equipped items:', ', '.join(equippiedItems) if equippiedItems else 'None')
+    if playerAttackPower is not None and not monsterDefeated and monster['health'] > 0:
+        odds = encounterOdds(playerHealth, playerAttackPower, playerGold, potions,
+                             monster['name'], monster['health'], monster['power'])
+        print('Odds to win:', formatOdds(odds))
     print('What would you like to do?')
     print("1) Fight Monster" if not monsterDefeated else "1) Monster already defeated, cannot fight")
     print("2) Sleep (Restore 15 HP for 5 Gold, but remember HP caps out at 100)")
@@ -185,7 +344,8 @@ def displayMenu(monster, playerHealth, playerGold, equippiedItems, monsterDefeat
 
 def fightMonster(monster, playerHealth, playerAttackPower):
     """
-    Simulates a fight between the player and the monster.
+    Fights the monster. The rounds are worked out by combat.resolveFight, so the player
+    is only asked to decide whether to keep fighting, run away, or fight to the end.
 
     Parameters:
         monster (dict): The current monster with its attributes.
@@ -195,29 +355,45 @@ def fightMonster(monster, playerHealth, playerAttackPower):
     Returns:
         int: The updated player's health after the fight.
     """
-        
+
+    if playerAttackPower <= 0 and monster["power"] <= 0 and monster["health"] > 0: # Nobody can get hurt
+        print(f'You and the {monster["name"]} cannot hurt each other, so you walk away.')
+        return playerHealth
+
+    fightToTheEnd = False
+
     while monster["health"] > 0 and playerHealth > 0:
-        print(f'You attack the {monster["name"]}!')
-        monster["health"] -= playerAttackPower
+        result = resolveFight(monster["health"], monster["power"], playerHealth, playerAttackPower,
+                              maxRounds=None if fightToTheEnd else 1)
+        monster["health"] = result.monsterHealth
+        playerHealth = result.playerHealth
+
+        print(f'You attack the {monster["name"]}' + (f' {result.rounds} times!' if result.rounds > 1 else '!'))
         print(f'The {monster["name"]} has {monster["health"]} left!')
-        
-        if monster["health"] <= 0: # Check if monster has HP 
+
+        if result.winner == 'player': # Check if monster has HP
+            if result.damageTaken:
+                print(f'The {monster["name"]} hit you for {result.damageTaken} damage. You have {playerHealth} HP left!')
             print(f"You defeated the {monster['name']}!")
             break
-        
-        playerHealth -= monster["power"] # Reduce player health by monster attack power
+
         print(f'The {monster["name"]} attacks back! You have {playerHealth} HP left!')
 
-        if playerHealth <= 0: # Check if player has HP 
+        if result.winner == 'monster': # Check if player has HP
             print(f'The {monster["name"]} killed you!')
             break
 
-        # Option to run away or continue fighting
-        choice = input('Would you like to: (1) Continue fighting or (2) Run away?')
+        # Tell the player how the rest of the fight would go, then give the option to run away
+        forecast = resolveFight(monster["health"], monster["power"], playerHealth, playerAttackPower)
+        outcome = 'win' if forecast.winner == 'player' else 'die'
+        print(f'If you keep fighting you will {outcome} in {forecast.rounds} more rounds and lose {forecast.damageTaken} HP.')
+        choice = input('Would you like to: (1) Continue fighting, (2) Run away or (3) Fight to the end?')
         if choice == '2':
             print('You chose to run away!')
             return playerHealth
-        
+        if choice == '3':
+            fightToTheEnd = True
+
     return playerHealth  # Returns updated player health after the fight
 
 def equipItems(itemInventory, equippiedItems, playerHealth, playerAttackPower, swordDurability):
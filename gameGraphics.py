@@ -1,18 +1,41 @@
+import numpy as np
 import pygame
-import random
-import time
+from bestiary import get_bestiary
+from encounters import ENTER, STAY, EncounterTracker, EventQueue
+from flowfield import FlowField
+from gameloop import FixedTimestep, FrameTimings
+from monsterstore import IncrementalSpawner, MonsterStore
+from rendering import ChunkCache, DirtyRenderer
+from scheduler import RowSchedule, Scheduler
+from shop import SHOP_INVENTORY, ShopMenu
+from spritebatch import SpriteAtlas, SpriteBatch
+from textcache import Hud, TextCache
+from worldmap import FLOOR, ROCK, Camera, WorldMap
 
 pygame.init()
 
-GRID_SIZE = 10
+WORLD_SIZE = 10000  # Width and height of the world in cells, the screen shows the part around the player
+CHUNK_SIZE = 16  # Width and height of a world map chunk in cells
 CELL_SIZE = 32
-WINDOW_SIZE = GRID_SIZE * CELL_SIZE
 SCREEN_WIDTH = SCREEN_HEIGHT = 320
+SPAWN_RADIUS = 16  # New monsters appear within this many cells of the player
+FAR_MOVE_INTERVAL = 8  # Monsters more than a chunk away from the screen wait this many times longer between steps
+CHASE_RADIUS = 16  # Chasing monsters notice the player within this many cells
 WHITE = (255, 255, 255)
 GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 BLACK = (0, 0, 0)
+GRAY = (128, 128, 128)
 FONT_COLOR = (0, 0, 0)  # Color for text (black)
+FRAME_RATE = 60  # Frames drawn per second (at most)
+TICK_RATE = 10  # Simulation ticks per second, independent of the frame rate
+ATTACK_COOLDOWN = TICK_RATE  # Ticks before the same monster can attack the player again
+ENCOUNTER_MESSAGE_TICKS = 3 * TICK_RATE  # How long the encounter message stays on screen
+GAME_OVER_MESSAGE_TICKS = 5 * TICK_RATE  # How long the "Game Over!" message stays before the short version
+TIMINGS_FILES = ("frame_timings.csv", "frame_timings.json")  # Written when F12 is pressed
+
+# Random generator used for monster spawns and moves
+rng = np.random.default_rng()
 
 # Screen setup
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -21,19 +44,30 @@ pygame.display.set_caption("Game Grid")
 # Font setup
 font = pygame.font.SysFont("Times New Roman", 12)
 
-# Import monster png files
+# Rendered text is cached, and the HUD lines are only re-rendered when they change
+text_cache = TextCache()
+hud = Hud(text_cache, font, FONT_COLOR)
+
+# Import monster png files listed in the bestiary, converted once to the display's pixel format
 monster_images = {
-    "goblin": pygame.image.load("grin-goblin-HD.png"),
-    "troll": pygame.image.load("hairyTroll1.png"),
-    "George the Giant": pygame.image.load("golem_col.png")
+    monster_type.name: pygame.image.load(monster_type.image).convert_alpha()
+    for monster_type in get_bestiary() if monster_type.image
     }
 
 # Scale images to cell size
 for key in monster_images:
     monster_images[key] = pygame.transform.scale(monster_images[key], (CELL_SIZE, CELL_SIZE))
 
+# Same images indexed by bestiary type id (None draws a red circle)
+type_images = [monster_images.get(name) for name in get_bestiary().names]
+
+# Every monster sprite packed into one texture, drawn with a single blits call per frame
+sprite_batch = SpriteBatch(SpriteAtlas(type_images, CELL_SIZE, RED), CELL_SIZE)
+
 # Player class to encapsulate all player data
 class Player:
+    __slots__ = ('health', 'gold', 'equipped_items', 'in_shop')
+
     def __init__(self):
         self.health = 100
         self.gold = 10
@@ -46,180 +80,375 @@ class Player:
     def exit_shop(self):
         self.in_shop = False
 
-class WanderingMonster:
-    def __init__(self):
-        # Randomly pick the monster and characteristics from list
-        monsterList = [{'name': 'goblin', 'description': 'A sneaky little guy, grabbing your gold.', 'health': [12, 14, 16], 'power': [1, 2, 3], 'money' : [20, 22, 24]},
-                       {'name': 'troll', 'health': [15, 18, 21], 'description' : 'A grumpy bridge troll who has a huge wooden club.', 'power' : [25, 30, 35], 'money' : [8, 10, 12]},
-                       {'name' : 'George the Giant', 'description' : 'Typically a gentle giant, but has quite a sensitive temper.', 'health': [1000, 1200, 1400], 'power' : [100, 120, 140], 'money' : [3, 5, 7]}
-                       ]
-
-        monster_data = random.choice(monsterList)
-
-        # Randomize the health, power, and money based on the monster's stats in list
-        self.name = monster_data['name']
-        self.description = monster_data['description']
-        self.health = random.choice(monster_data['health'])
-        self.attack_power = random.choice(monster_data['power'])
-        self.money = random.choice(monster_data['money'])
-
-        # Randomize the monster's position on the grid
-        self.x = random.randint(0, GRID_SIZE - 1)
-        self.y = random.randint(0, GRID_SIZE - 1)
-        self.rect = pygame.Rect(self.x * CELL_SIZE, self.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-
-    def move(self):
-        # Randomly move the monster in one of 4 directions, staying within bounds
-        direction = random.choice(['UP', 'DOWN', 'LEFT', 'RIGHT'])
-        if direction == 'UP' and self.y > 0:
-            self.y -= 1
-        elif direction == 'DOWN' and self.y < GRID_SIZE - 1:
-            self.y += 1
-        elif direction == 'LEFT' and self.x > 0:
-            self.x -= 1
-        elif direction == 'RIGHT' and self.x < GRID_SIZE - 1:
-            self.x += 1
-        
-        # Update monster's rectangle position based on the new x, y coordinates
-        self.rect.x = self.x * CELL_SIZE
-        self.rect.y = self.y * CELL_SIZE
-
-    def check_encounter(self, player_rect):
-        # Check if the player is in the same position as the monster
-        return self.rect.colliderect(player_rect)
+# The world is much larger than the screen, its tiles are generated chunk by chunk when needed
+world = WorldMap(WORLD_SIZE, WORLD_SIZE, CHUNK_SIZE, seed=int(rng.integers(2 ** 32)))
+
+# Every monster lives in one array-backed store, see monsterstore.py
+monsters = MonsterStore(WORLD_SIZE, CELL_SIZE, rng)
+
+# Walking distances to the player, shared by every monster chasing them
+flow_field = FlowField(world, CHASE_RADIUS)
+
+# Timed callbacks (HUD messages), counted in simulation ticks
+scheduler = Scheduler()
+
+# The tick of every monster's next step, so each tick only touches the monsters whose step is due
+move_schedule = RowSchedule()
+
+# Encounter events (a monster entering, staying on or leaving the player's cell), raised when something
+# changes cell and handled once per tick
+encounter_events = EventQueue()
+encounters = EncounterTracker(monsters, encounter_events)
+
+def schedule_first_moves(rows):
+    """
+    Schedules the first step of new monsters at a random point of their move interval, so
+    monsters spawned together do not all step on the same tick.
+
+    Args:
+        rows (numpy.ndarray): Rows of the new monsters.
+
+    Returns:
+        None
+    """
+    intervals = monsters.bestiary.move_intervals[monsters.type_id[rows]]
+    move_schedule.schedule(rows, scheduler.now + 1 + (rng.random(len(rows)) * intervals).astype(np.int64))
+
+def monsters_added(rows):
+    """
+    Schedules the first step of new monsters and raises an encounter for any that appeared on the player.
+
+    Args:
+        rows (numpy.ndarray): Rows of the new monsters.
+
+    Returns:
+        None
+    """
+    schedule_first_moves(rows)
+    encounters.monsters_moved(rows)
+
+# Adds missing monsters a few thousand per frame, reusing the rows of removed ones
+spawner = IncrementalSpawner(monsters, on_add=monsters_added)
 
 # Doubling monster spawning function
 def spawn_monsters(count):
-    return [WanderingMonster() for _ in range(count)]
+    """
+    Sets the monster population to count. The current monsters are kept and only the
+    missing ones are added around the player, spread over the next frames by move_monsters.
+
+    Args:
+        count (int): How many monsters there should be.
+
+    Returns:
+        None
+    """
+    spawner.area = pygame.Rect(player_pos.x // CELL_SIZE - SPAWN_RADIUS, player_pos.y // CELL_SIZE - SPAWN_RADIUS,
+                               2 * SPAWN_RADIUS + 1, 2 * SPAWN_RADIUS + 1)
+    spawner.set_target(count)
+
+def move_monsters(tick=0):
+    """
+    Adds this frame's share of any pending monsters, moves the monsters whose step is due
+    this tick (all at once, never onto rock) and raises their encounters. Chasing monsters
+    close to the player step towards them along the flow field, the others take a random step.
+    Each monster then waits its type's move interval, FAR_MOVE_INTERVAL times longer when it
+    is more than a chunk away from the screen.
+
+    Args:
+        tick (int, optional): Number of the simulation tick. Defaults to 0.
+
+    Returns:
+        None
+    """
+    spawner.update()
+    due = move_schedule.pop_due(tick)
+    due = due[monsters.alive[due]]
+    if not len(due):
+        return
+
+    # The flow field only changes when the player changed cell
+    flow_field.update((player_pos.x // CELL_SIZE, player_pos.y // CELL_SIZE))
+    wandering = monsters.chase(due, flow_field)
+    monsters.move_all(wandering, world.blocked)
+
+    margin = CHUNK_SIZE * CELL_SIZE
+    near = np.isin(due, monsters.visible(camera.rect.inflate(2 * margin, 2 * margin), due))
+    intervals = monsters.bestiary.move_intervals[monsters.type_id[due]]
+    move_schedule.schedule(due, tick + np.where(near, intervals, intervals * FAR_MOVE_INTERVAL))
+    encounters.monsters_moved(due)
+
+def move_player(dx, dy):
+    """
+    Moves the player one cell unless the cell is rock or outside the world, and raises the
+    encounters with the monsters left behind or found there.
+
+    Args:
+        dx (int): Cells to move right (negative: left).
+        dy (int): Cells to move down (negative: up).
+
+    Returns:
+        None
+    """
+    if not world.is_blocked((player_pos.x // CELL_SIZE + dx, player_pos.y // CELL_SIZE + dy)):
+        player_pos.move_ip(dx * CELL_SIZE, dy * CELL_SIZE)
+        encounters.move_player((player_pos.x // CELL_SIZE, player_pos.y // CELL_SIZE))
 
 # Initialize player
 player = Player()
 
-# Set player position at the 0,0 left corner
-player_pos = pygame.Rect(0, 0, CELL_SIZE, CELL_SIZE)
+# Set player position at the open cell closest to the 0,0 left corner
+start_x, start_y = world.open_cell_near((0, 0))
+player_pos = pygame.Rect(start_x * CELL_SIZE, start_y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+# The camera follows the player, only the part of the world it sees is drawn
+camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, CELL_SIZE, world)
+camera.follow(player_pos)
+encounters.move_player((start_x, start_y))
+
+# The shop stands on an open cell a few steps from the start, its menu opens while the player stands on it
+shop_x, shop_y = world.open_cell_near((start_x + 3, start_y + 2))
+shop_pos = pygame.Rect(shop_x * CELL_SIZE, shop_y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+shop_menu = ShopMenu(SHOP_INVENTORY, hud)
 
 # Spawn initial monsters
 monster_count = 1
-monsters = spawn_monsters(monster_count)
+spawn_monsters(monster_count)
+move_monsters()
 
-# Message display timer
-encounter_message_time = None
+# Timers hiding the HUD messages, by message name
+message_timers = {}
 
-def drawGrid():
+def show_message(name, text, position, duration):
     """
-    Draws the 10x10 grid on the screen. Each cell is 32x32 pixels.
-    This grid serves as the background to show the player's movement on the grid.
+    Shows a HUD message for duration ticks. Showing the same message again restarts its timer.
+
+    Args:
+        name (str): Which message this is (e.g. 'encounter').
+        text (str): What the message says.
+        position (tuple): The (x, y) position of the message.
+        duration (int): How many ticks the message stays on screen.
+
+    Returns:
+        None
     """
-    for x in range(0, WINDOW_SIZE, CELL_SIZE):
-        for y in range(0, WINDOW_SIZE, CELL_SIZE):
-            pygame.draw.rect(screen, BLACK, pygame.Rect(x, y, CELL_SIZE, CELL_SIZE), 1)
+    hud.set(name, text, position)
+    scheduler.cancel(message_timers.get(name))
+    message_timers[name] = scheduler.call_later(duration, hud.hide, name)
+
+# Rows of the monsters that entered or stayed on the player's cell since the last tick, see resolve_attacks
+attackers = []
+
+def monster_attacks(event):
+    """
+    Handles monsters entering or staying on the player's cell: they attack when resolve_attacks runs.
+
+    Args:
+        event (encounters.EncounterEvent): The encounter.
 
-def drawGameElements():
+    Returns:
+        None
     """
-    Draws the player (blue square), random encounter (red circle)
-    on the screen at their respective positions.
+    attackers.append(event.rows)
+
+def resolve_attacks(tick):
     """
-    # Draw player (blue square)
-    pygame.draw.rect(screen, (0, 0, 255), player_pos)
+    Makes every monster queued by monster_attacks attack at once, unless it attacked less than
+    ATTACK_COOLDOWN ticks ago. The player loses 10 HP per attack and the message is updated
+    once, however many monsters attack.
 
-    # Draw the monster(s) png files or red circle if no access
-    for monster in monsters:
-        if monster.name in monster_images:
-            screen.blit(monster_images[monster.name], monster.rect.topleft)
-        else:
-            pygame.draw.circle(screen, RED, (monster.rect.centerx, monster.rect.centery), CELL_SIZE // 2)
+    Args:
+        tick (int): Number of the simulation tick.
 
-def draw_text(text, position):
+    Returns:
+        None
+    """
+    if not attackers:
+        return
+    rows = np.concatenate(attackers)
+    attackers.clear()
+    rows = rows[monsters.alive[rows] & (monsters.attack_ready[rows] <= tick)]
+    # A monster queued twice (e.g. by the player's step and its own) attacks once: sort, keep the first of
+    # each run (np.unique does the same, but takes its much slower hash path for integers in numpy 2)
+    rows = np.sort(rows)
+    rows = rows[np.diff(rows, prepend=-1) != 0]
+    if not len(rows):
+        return
+    monsters.attack_ready[rows] = tick + ATTACK_COOLDOWN
+    player.health -= 10 * len(rows)  # Decrease player health by 10 per attack
+    if len(rows) == 1:
+        text = f"A wild {monsters[rows[0]].name} attacks! You lose 10 HP!"
+    else:
+        text = f"{len(rows)} monsters attack! You lose {10 * len(rows)} HP!"
+    show_message("encounter", text, (10, 10), ENCOUNTER_MESSAGE_TICKS)
+
+encounter_handlers = {ENTER: monster_attacks, STAY: monster_attacks}
+
+# World map chunks are baked into surfaces once, and the camera's view of them is the background of the
+# screen. Only dirty cells are redrawn each frame, until the camera moves and the view is redrawn from the chunks
+chunks = ChunkCache(world, CELL_SIZE, {FLOOR: WHITE, ROCK: GRAY}, BLACK)
+renderer = DirtyRenderer(screen, pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert(), CELL_SIZE)
+chunks.draw_view(renderer.background, camera.rect)
+
+def drawGameElements(dirty):
     """
-    Draws the provided text on the screen at the given position.
-    
+    Draws the player (blue square), the shop (green circle) and the monsters (png files, or red
+    circles if no image) standing in the dirty cells.
+
     Args:
-        text (str): The text to be drawn on the screen.
-        position (tuple): The (x, y) position where the text will be displayed.
-        
+        dirty (numpy.ndarray): Boolean (rows, columns) array of the cells being redrawn.
+
     Returns:
         None
     """
-    text_surface = font.render(text, True, FONT_COLOR)
-    screen.blit(text_surface, position)
+    view = camera.cell_area()
+
+    # Draw player (blue square)
+    if dirty[player_pos.y // CELL_SIZE - view.top, player_pos.x // CELL_SIZE - view.left]:
+        pygame.draw.rect(screen, (0, 0, 255), camera.to_screen(player_pos))
+
+    # Draw shop (green circle)
+    if view.collidepoint(shop_x, shop_y) and dirty[shop_y - view.top, shop_x - view.left]:
+        pygame.draw.circle(screen, GREEN, camera.to_screen(shop_pos).center, CELL_SIZE // 2)
+
+    # Draw the monster(s) png files or red circle if no access, only for monsters in dirty cells on the screen
+    on_screen = monsters.visible(camera.rect)
+    on_screen = on_screen[dirty[monsters.y[on_screen] - view.top, monsters.x[on_screen] - view.left]]
+    sprite_batch.draw(screen, monsters.type_id[on_screen], monsters.x[on_screen], monsters.y[on_screen],
+                      offset=(-camera.rect.left, -camera.rect.top))
+
+def occupied_cells():
+    """
+    Returns a boolean (rows, columns) array of the screen cells holding the player, the shop or a monster.
+    """
+    view = camera.cell_area()
+    occupied = np.zeros((renderer.rows, renderer.columns), dtype=bool)
+    on_screen = monsters.visible(camera.rect)
+    occupied[monsters.y[on_screen] - view.top, monsters.x[on_screen] - view.left] = True
+    occupied[player_pos.y // CELL_SIZE - view.top, player_pos.x // CELL_SIZE - view.left] = True
+    if view.collidepoint(shop_x, shop_y):
+        occupied[shop_y - view.top, shop_x - view.left] = True
+    return occupied
+
+def show_timings():
+    """
+    Shows the frame rate and the p50/p95/p99 time of every frame phase at the bottom of the screen.
+
+    Returns:
+        None
+    """
+    lines = [f"FPS: {game_loop.fps:.0f}  ticks: {game_loop.ticks}"] + timings.overlay_lines()
+    for line_number, line in enumerate(lines):
+        hud.set(f"timings {line_number}", line, (10, SCREEN_HEIGHT - 14 * (len(lines) - line_number)))
+
+def hide_timings():
+    """
+    Removes the frame timing overlay.
+
+    Returns:
+        None
+    """
+    for line_number in range(len(timings.phases) + 2):
+        hud.hide(f"timings {line_number}")
+
+# One persistent clock paces the frames, and the monsters move on fixed ticks whatever the frame rate
+game_loop = FixedTimestep(TICK_RATE, FRAME_RATE)
+
+# Time spent in each phase of the frame, shown with F3 and exported with F12
+timings = FrameTimings()
+timings_shown = False
 
 # Game Loop code
 running = True
 gameOver = False
 
 while running: 
-    screen.fill(WHITE)  # Set background screen as white
-
-    drawGrid()  # Draw grid
-
-    drawGameElements()  # Draw player and random monster encounter
-
-    # Move the monster/monsters randomly
-    for monster in monsters:
-        monster.move()
+    # Wait for the next frame and find out how many simulation ticks are due
+    ticks = game_loop.advance()
+    timings.start_frame()
 
     # Code handling keyboard interaction with player movement
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
         if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_q:
+            if shop_menu.handle_key(event.key, player):  # The shop menu takes its keys first while open
+                pass
+            elif event.key == pygame.K_q:
                 running = False
-            elif event.key == pygame.K_UP and player_pos.top > 0:
-                player_pos.move_ip(0, -CELL_SIZE)  # Move up
-            elif event.key == pygame.K_DOWN and player_pos.bottom < WINDOW_SIZE:
-                player_pos.move_ip(0, CELL_SIZE)  # Move down
-            elif event.key == pygame.K_LEFT and player_pos.left > 0:
-                player_pos.move_ip(-CELL_SIZE, 0)  # Move left
-            elif event.key == pygame.K_RIGHT and player_pos.right < WINDOW_SIZE:
-                player_pos.move_ip(CELL_SIZE, 0)  # Move right
+            elif event.key == pygame.K_UP:
+                move_player(0, -1)  # Move up
+            elif event.key == pygame.K_DOWN:
+                move_player(0, 1)  # Move down
+            elif event.key == pygame.K_LEFT:
+                move_player(-1, 0)  # Move left
+            elif event.key == pygame.K_RIGHT:
+                move_player(1, 0)  # Move right
             elif event.key == pygame.K_m:  # Press M to double monsters
                 # Double the number of monsters
                 monster_count *= 2  # Double the monster count
-                monsters = spawn_monsters(monster_count)  # Spawn new set of monsters
+                spawn_monsters(monster_count)  # Add the new monsters over the next frames
                 player.health = 100  # Reset player health
                 print("Monsters doubled and health reset!")
-        
-    # Check if the player has encountered a monster
-    for monster in monsters:
-        if monster.check_encounter(player_pos):
-            player.health -= 10  # Decrease player health by 10
-            encounter_message_time = time.time()  # Track the time the encounter happens
-
-    # Display encounter message for a few seconds
-    if encounter_message_time:
-        elapsed_time = time.time() - encounter_message_time
-        if elapsed_time < 3:  # Show message for 3 seconds
-            draw_text(f"A wild {monster.name} attacks! You lose 10 HP!", (10, 10))
-        else:
-            encounter_message_time = None  # Reset encounter message timer
-
-    # Check if the player has died and give options
-    if player.health <= 0 and not gameOver:
-        message_display_time = time.time()  # Start timer for "Game Over" message
-        gameOver = True
-
-    # If game is over, display the "Game Over" message 
-    if gameOver:
-        elapsed_time = time.time() - message_display_time
-        if elapsed_time < 5:  # Show message for 5 seconds
-            draw_text("Game Over! Press M to double the monsters, or Q to quit.", (100, 150))
-        else:
-            draw_text("Press M to double the monsters, or Q to quit.", (100, 150))
-
-    # Display player information
-    draw_text(f"Health: {player.health}", (10, 40))
-    draw_text(f"Gold: {player.gold:.2f}", (10, 70))
-    draw_text(f"Inventory: {', '.join(player.equipped_items) if player.equipped_items else 'None'}", (10, 100))
+            elif event.key == pygame.K_F3:  # Press F3 to show or hide the frame timings
+                timings_shown = not timings_shown
+                if not timings_shown:
+                    hide_timings()
+            elif event.key == pygame.K_F12:  # Press F12 to export the frame timings
+                for file_name in TIMINGS_FILES:
+                    timings.export(file_name)
+                print(f"Frame timings written to {' and '.join(TIMINGS_FILES)}")
+
+    # The shop menu opens when the player steps onto the shop and closes when they leave it
+    shop_menu.update(player, player_pos.colliderect(shop_pos))
 
     # User input quit logic
     if gameOver:
         for event in pygame.event.get():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_q):
                 running = False
+    timings.lap("input")
 
-    pygame.display.flip()  # Update display
+    for tick in range(game_loop.ticks - ticks, game_loop.ticks):
+        # Run the timers due this tick (e.g. hiding expired messages)
+        scheduler.run_until(tick)
 
-    pygame.time.Clock().tick(10)  # Frame rate (FPS)
+        # Move the monsters whose step is due
+        move_monsters(tick)
+        timings.lap("movement")
+
+        # Handle the encounters raised since the last tick (damage and messages)
+        encounter_events.process(encounter_handlers)
+        resolve_attacks(tick)
+        timings.lap("collision")
+
+    # Check if the player has died and give options: the "Game Over" message is shortened after a few seconds
+    if player.health <= 0 and not gameOver:
+        gameOver = True
+        hud.set("game_over", "Game Over! Press M to double the monsters, or Q to quit.", (100, 150))
+        scheduler.call_later(GAME_OVER_MESSAGE_TICKS, hud.set, "game_over",
+                             "Press M to double the monsters, or Q to quit.", (100, 150))
+
+    # Display player information
+    hud.set("health", f"Health: {player.health}", (10, 40))
+    hud.set("gold", f"Gold: {player.gold:.2f}", (10, 70))
+    hud.set("inventory", f"Inventory: {', '.join(player.equipped_items) if player.equipped_items else 'None'}", (10, 100))
+
+    # Refresh the timing overlay twice a second, so its text is not re-rendered every frame
+    if timings_shown and timings.frames % (FRAME_RATE // 2) == 0:
+        show_timings()
+
+    # When the camera scrolls the whole view changes: redraw its background from the baked chunks
+    if camera.follow(player_pos):
+        chunks.draw_view(renderer.background, camera.rect)
+        renderer.mark_all()
+
+    # Redraw the cells that changed and push only those to the display
+    hud.draw(renderer)
+    renderer.set_occupied(occupied_cells())
+    rects = renderer.draw(drawGameElements)
+    timings.lap("draw")
+    renderer.present(rects)
+    timings.lap("flip")
+    timings.end_frame()
 
 pygame.quit()  # Quit game failsafe
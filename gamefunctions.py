@@ -14,8 +14,20 @@ Description:
 Functions:
     - purchase_item(itemPrice, startingMoney, quantityToPurchase=1): 
         Calculates the number of items purchased and the leftover money.
-    - new_random_monster(): 
-        Chooses a random monster from a predefined list with unique traits.
+    - to_money(amount):
+        Converts an amount of money to an exact Decimal.
+    - to_cents(amount):
+        Converts an amount of money to a whole number of cents.
+    - checkout_cart(cart, catalog, startingMoney):
+        Validates and prices a whole cart in one pass, with one result per cart line.
+    - checkout_orders(orderIds, itemIds, quantities, prices, startingMoney):
+        Checks out a large batch of orders at once, with integer cents in numpy arrays.
+    - new_random_monster(bestiary=None, zone='default'): 
+        Chooses a random monster from the bestiary with unique traits.
+    - new_random_monsters(n, rng=None, bestiary=None, zone='default'): 
+        Generates a whole batch of random monsters as column arrays (a MonsterBatch).
+    - new_random_loot(zone='default', bestiary=None): 
+        Chooses a random item from the zone's weighted loot table.
     - print_welcome(name, width=20): 
         Prints a centered welcome message for a given name.
     - print_shop_menu(item1_name, item1_price, item2_name, item2_price): 
@@ -25,9 +37,18 @@ Examples:
     To purchase items:
         >>> num_purchased, leftover_money = purchase_item(2, 24, 6)
 
+    To check out a cart:
+        >>> checkout = checkout_cart([('Apple', 2), ('Orange', 1)], {'Apple': 3.99, 'Orange': 2.50}, 12)
+        >>> checkout.leftover
+        Decimal('1.52')
+
     To generate a random monster:
         >>> monster = new_random_monster()
 
+    To generate a large batch of monsters:
+        >>> batch = new_random_monsters(1000, rng=42)
+        >>> monster = batch.row(0)
+
     To print a welcome message:
         >>> print_welcome('Jeff')
 
@@ -71,17 +92,27 @@ def purchase_item(itemPrice, startingMoney, quantityToPurchase=1):
     return (num_purchased, leftover_money)
 
 
-#Function that uses random to choose a monster from a dictionary list and outputs that monster and all of its attributes, 3 of which are also randomized each time.
+#Monster templates live in bestiary.json and are loaded once into a frozen registry (see bestiary.py).
 
+import operator
 import random
+from collections import namedtuple
+from decimal import Decimal
+
+import numpy as np
+
+from bestiary import DEFAULT_ZONE, get_bestiary
 
-def new_random_monster():
-    """Chooses a random monster from a predefined list of monsters, each with unique traits.
+#Function that uses random to choose a monster from a dictionary list and outputs that monster and all of its attributes, 3 of which are also randomized each time.
+
+def new_random_monster(bestiary=None, zone=DEFAULT_ZONE):
+    """Chooses a random monster from the bestiary, each with unique traits.
 
-    Each monster has different attributes, such as health, power, and money, which are randomly selected from predefined ranges.
+    The monster type is drawn from the zone's weighted spawn table. Each monster has different attributes, such as health, power, and money, which are randomly selected from predefined ranges.
 
     Args:
-        None
+        bestiary (Bestiary, optional): The bestiary to choose from. Defaults to the shared bestiary.json registry.
+        zone (str, optional): The spawn table to draw the monster type from. Defaults to 'default'.
 
     Returns:
         dict: A dictionary containing the chosen monster's traits, including:
@@ -97,16 +128,263 @@ def new_random_monster():
         'goblin'  # Output will vary
     """
 
-    monsterList = [{'name': 'goblin', 'description': 'A sneaky little guy, grabbing your gold.', 'health': [12, 14, 16], 'power': [1, 2, 3], 'money' : [20, 22, 24]},
-                   {'name': 'troll', 'health': [15, 18, 21], 'description' : 'A grumpy bridge troll who has a huge wooden club.', 'power' : [25, 30, 35], 'money' : [8, 10, 12]},
-                   {'name' : 'George the Giant', 'description' : 'Typically a gentle giant, but has quite a sensitive temper.', 'health': [1000, 1200, 1400], 'power' : [100, 120, 140], 'money' : [3, 5, 7]}]
+    if bestiary is None:
+        bestiary = get_bestiary()
+
+    return bestiary.roll(bestiary.spawn_type(zone))
+
+#Class that holds a whole batch of monsters as columns instead of one dictionary per monster.
+
+class MonsterBatch:
+    """A batch of random monsters stored as parallel arrays (one column per trait).
+
+    Attributes:
+        names (tuple): Monster names, indexed by the values in name_index.
+        descriptions (tuple): Monster descriptions, indexed the same way as names.
+        name_index (numpy.ndarray): The monster type of each row.
+        health (numpy.ndarray): The health of each row.
+        power (numpy.ndarray): The power of each row.
+        money (numpy.ndarray): The money of each row.
+    """
+
+    def __init__(self, names, descriptions, name_index, health, power, money):
+        self.names = names
+        self.descriptions = descriptions
+        self.name_index = name_index
+        self.health = health
+        self.power = power
+        self.money = money
+
+    def __len__(self):
+        return len(self.name_index)
+
+    def row(self, index):
+        """Returns one monster from the batch in the same dictionary shape as new_random_monster().
+
+        Args:
+            index (int): The row of the batch to view.
+
+        Returns:
+            dict: A dictionary with the 'name', 'description', 'health', 'power' and 'money' of that monster.
+        """
+        type_index = self.name_index[index]
+        return {'name': self.names[type_index],
+                'description': self.descriptions[type_index],
+                'health': int(self.health[index]),
+                'power': int(self.power[index]),
+                'money': int(self.money[index])}
+
+    def rows(self):
+        """Yields every monster in the batch as a dictionary (see row())."""
+        for index in range(len(self)):
+            yield self.row(index)
+
+#Function that generates many random monsters at once with a few array draws instead of one dictionary per monster.
+
+def new_random_monsters(n, rng=None, bestiary=None, zone=DEFAULT_ZONE):
+    """Generates n random monsters at once, using the same templates and rules as new_random_monster().
+
+    Args:
+        n (int): How many monsters to generate.
+        rng (numpy.random.Generator or int, optional): Random generator or seed to draw from. Defaults to None (fresh entropy).
+        bestiary (Bestiary, optional): The bestiary to choose from. Defaults to the shared bestiary.json registry.
+        zone (str, optional): The spawn table to draw the monster types from. Defaults to 'default'.
+
+    Returns:
+        MonsterBatch: The generated monsters as column arrays.
+
+    Example:
+        >>> batch = new_random_monsters(1000000, rng=42)
+        >>> batch.row(0)['name']
+        'troll'  # Output will vary
+    """
+    if n < 0:
+        raise ValueError("Number of monsters cannot be negative.")
+
+    if bestiary is None:
+        bestiary = get_bestiary()
+    rng = np.random.default_rng(rng)
+
+    name_index = bestiary.spawn_types(n, zone, rng)
+    health, power, money = bestiary.roll_many(name_index, rng)
+
+    return MonsterBatch(bestiary.names, bestiary.descriptions, name_index, health, power, money)
+
+#Function that picks a random item from a weighted loot table.
+
+def new_random_loot(zone=DEFAULT_ZONE, bestiary=None):
+    """Chooses a random item name from the zone's weighted loot table.
+
+    Args:
+        zone (str, optional): The loot table to draw from. Defaults to 'default'.
+        bestiary (Bestiary, optional): The bestiary holding the loot tables. Defaults to the shared bestiary.json registry.
+
+    Returns:
+        str: The name of the item.
+
+    Example:
+        >>> new_random_loot()
+        'milkshake'  # Output will vary
+    """
+    if bestiary is None:
+        bestiary = get_bestiary()
 
-    monster = random.choice(monsterList)
-    monster['health'] = random.choice(monster['health'])
-    monster['power'] = random.choice(monster['power'])
-    monster['money'] = random.choice(monster['money'])
+    return bestiary.loot_tables[zone].draw()
 
-    return monster
+#Functions that turn prices and money into exact amounts, so that 5.99 + 3.50 is exactly 9.49.
+
+def to_money(amount):
+    """Converts an amount of money to an exact Decimal.
+
+    Args:
+        amount (int, float, str or Decimal): The amount. Floats are read from their shortest repr, so 5.99 becomes exactly 5.99.
+
+    Returns:
+        Decimal: The exact amount.
+    """
+    if isinstance(amount, float):
+        amount = repr(amount)
+    return Decimal(amount)
+
+def to_cents(amount):
+    """Converts an amount of money to a whole number of cents.
+
+    Args:
+        amount (int, float, str or Decimal): The amount, see to_money().
+
+    Returns:
+        int: The amount in cents.
+    """
+    cents = to_money(amount) * 100
+    if cents != cents.to_integral_value():
+        raise ValueError(f"{amount} is not a whole number of cents.")
+    return int(cents)
+
+#Function that checks out a whole cart at once: every line is tried in order and gets its own result, a bad line does not stop the others.
+
+# The result of one cart line: purchased is 0 and error says why when the line could not be bought
+CartLine = namedtuple('CartLine', ['item', 'quantity', 'purchased', 'cost', 'error'])
+
+# The result of a whole cart: its lines, what they cost together and the money left
+CartCheckout = namedtuple('CartCheckout', ['lines', 'total', 'leftover'])
+
+def checkout_cart(cart, catalog, startingMoney):
+    """Validates and prices a whole cart in one pass, with exact Decimal money.
+
+    The lines are bought in cart order with purchase_item(), each from the money left by the
+    lines before it. A line that cannot be bought (unknown item, bad price or quantity, not
+    enough money) gets its error message and the next lines are still tried.
+
+    Args:
+        cart (iterable): (item name, quantity) pairs.
+        catalog (dict): The price of every item name.
+        startingMoney (int, float, str or Decimal): The money available for the whole cart.
+
+    Returns:
+        CartCheckout: One CartLine per cart line, the total cost and the leftover money (Decimals).
+
+    Example:
+        >>> checkout = checkout_cart([('Sword', 1), ('Shield', 1)], {'Sword': 5.99, 'Shield': 8}, 10)
+        >>> [line.error for line in checkout.lines]
+        [None, 'You cannot purchase more than 0 items with the available money.']
+    """
+    money = to_money(startingMoney)
+    if money < 0:
+        raise ValueError("Starting money cannot be negative.")
+
+    lines = []
+    for item, quantity in cart:
+        if item not in catalog:
+            lines.append(CartLine(item, quantity, 0, Decimal(0), f"Unknown item: {item}."))
+            continue
+        try:
+            price = to_money(catalog[item])
+            purchased, money = purchase_item(price, money, operator.index(quantity))  # Whole quantities only
+        except ValueError as error:
+            lines.append(CartLine(item, quantity, 0, Decimal(0), str(error)))
+        except (TypeError, ArithmeticError):  # A price that is not a number, or a quantity that is not an int
+            lines.append(CartLine(item, quantity, 0, Decimal(0),
+                                  f"Bad price or quantity: {catalog[item]!r} x {quantity!r}."))
+        else:
+            lines.append(CartLine(item, quantity, purchased, price * purchased, None))
+
+    return CartCheckout(lines, sum((line.cost for line in lines), Decimal(0)), money)
+
+#Function that checks out many orders at once with numpy, for large batches (e.g. simulated shoppers in balance runs).
+
+# Error codes of checkout_orders(), CART_ERRORS[code] describes each one
+CART_OK = 0
+CART_UNKNOWN_ITEM = 1
+CART_BAD_PRICE = 2
+CART_BAD_QUANTITY = 3
+CART_NOT_ENOUGH_MONEY = 4
+CART_ERRORS = (None,
+               "Unknown item.",
+               "Item price must be greater than zero.",
+               "Quantity to purchase must be at least 1.",
+               "Not enough money left for this quantity.")
+
+# The result of checkout_orders(): per line purchased, costs and errors, and per order leftover
+OrderCheckout = namedtuple('OrderCheckout', ['purchased', 'costs', 'errors', 'leftover'])
+
+def checkout_orders(orderIds, itemIds, quantities, prices, startingMoney):
+    """Checks out a batch of orders at once, with the same rules as checkout_cart() and integer cents.
+
+    Each order's lines are bought in the order they appear, each from the money left by the
+    order's earlier lines. The lines at the same position of every order are handled together,
+    so the work is a few array operations per line position instead of per line.
+
+    Args:
+        orderIds (array_like): The order of every cart line, indexing startingMoney.
+        itemIds (array_like): The item of every cart line, indexing prices (other values are unknown items).
+        quantities (array_like): The quantity of every cart line.
+        prices (array_like): The price of every catalog item in cents (see to_cents()).
+        startingMoney (array_like): The money of every order in cents.
+
+    Returns:
+        OrderCheckout: Arrays of the quantity purchased, cost in cents and error code (CART_OK when
+            bought) of every line, and of the leftover cents of every order.
+
+    Example:
+        >>> result = checkout_orders([0, 0, 1], [0, 1, 1], [1, 1, 3], [599, 350], [1000, 1000])
+        >>> result.errors.tolist(), result.leftover.tolist()
+        ([0, 0, 4], [51, 1000])
+    """
+    orderIds = np.asarray(orderIds, dtype=np.int64)
+    itemIds = np.asarray(itemIds, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.int64)
+    leftover = np.array(startingMoney, dtype=np.int64)
+    if (leftover < 0).any():
+        raise ValueError("Starting money cannot be negative.")
+
+    # Checks that do not depend on money, in the same order as purchase_item()
+    known = (itemIds >= 0) & (itemIds < len(prices))
+    line_prices = np.zeros(len(itemIds), dtype=np.int64)
+    line_prices[known] = prices[itemIds[known]]
+    errors = np.full(len(itemIds), CART_OK, dtype=np.int8)
+    errors[~known] = CART_UNKNOWN_ITEM
+    errors[known & (line_prices <= 0)] = CART_BAD_PRICE
+    errors[(errors == CART_OK) & (quantities < 1)] = CART_BAD_QUANTITY
+    costs = np.where(errors == CART_OK, line_prices * quantities, 0)
+
+    # Position of every line within its order, then the lines grouped by position
+    by_order = np.argsort(orderIds, kind='stable')
+    sorted_orders = orderIds[by_order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_orders[1:] != sorted_orders[:-1])))[:len(orderIds)]
+    position = np.arange(len(orderIds)) - np.repeat(starts, np.diff(np.append(starts, len(orderIds))))
+    by_position = by_order[np.argsort(position, kind='stable')]
+
+    # Money is spent line position by line position: every order appears at most once in each group
+    for group in np.split(by_position, np.cumsum(np.bincount(position))[:-1]):
+        group = group[errors[group] == CART_OK]
+        orders = orderIds[group]
+        fits = costs[group] <= leftover[orders]
+        leftover[orders[fits]] -= costs[group[fits]]
+        errors[group[~fits]] = CART_NOT_ENOUGH_MONEY
+
+    bought = errors == CART_OK
+    return OrderCheckout(np.where(bought, quantities, 0), np.where(bought, costs, 0), errors, leftover)
 
 #Function that prints a welcome message for 3 names, which is centered and in single quotes. 
 
@@ -188,6 +466,13 @@ if __name__ == "__main__":
     print('Power:',monster['power'])
     print('Money:',monster['money'])
 
+    batch = new_random_monsters(5, rng=42)
+    for monster in batch.rows():
+        print(monster['name'], monster['health'], monster['power'], monster['money'])
+
+    print('Bridge monster:', new_random_monster(zone='bridge')['name'])
+    print('Loot:', new_random_loot())
+
     print_welcome('Jeff')
     print_welcome('Audrey', 30)
     print_welcome('Ludacris', 15)
@@ -195,3 +480,31 @@ if __name__ == "__main__":
     print_shop_menu('Apple', 3.99, 'Orange', 2.50)
     print_shop_menu('Banana', 1.29, 'Grapefruit', 4.99)
 
+    checkout = checkout_cart([('Swashbuckler Sword', 1), ('Milkshake', 2), ('Magic Potion', 1)],
+                             {'Swashbuckler Sword': 5.99, 'Milkshake': 3.50}, 20)
+    for line in checkout.lines:
+        print(line.item, line.purchased, f'${line.cost:.2f}', line.error or '')  # Decimals format exactly
+    print(f'Total: ${checkout.total:.2f} Leftover: ${checkout.leftover:.2f}')
+
+    # Compare checking out many random orders one cart at a time and all at once
+    import timeit
+
+    rng = np.random.default_rng(7)
+    catalog = {f'item {item}': to_money(price) / 100 for item, price in enumerate(rng.integers(50, 2000, size=1000).tolist())}
+    prices = [to_cents(price) for price in catalog.values()]
+    names = list(catalog)
+    orders, lines_per_order = 100000, 5
+    order_ids = np.repeat(np.arange(orders), lines_per_order)
+    item_ids = rng.integers(0, len(prices), size=len(order_ids))
+    quantities = rng.integers(1, 4, size=len(order_ids))
+    money = rng.integers(0, 10000, size=orders)
+    lines = slice(0, 1000 * lines_per_order)
+    carts = [list(zip(cart_names, cart_quantities)) for cart_names, cart_quantities in
+             zip(np.array(names)[item_ids[lines]].reshape(-1, lines_per_order).tolist(),
+                 quantities[lines].reshape(-1, lines_per_order).tolist())]
+
+    one_by_one = timeit.timeit(lambda: [checkout_cart(cart, catalog, to_money(int(cents)) / 100)
+                                        for cart, cents in zip(carts, money.tolist())], number=1) / len(carts)
+    all_at_once = timeit.timeit(lambda: checkout_orders(order_ids, item_ids, quantities, prices, money), number=3) / 3 / orders
+    print(f'checkout_cart: {1 / one_by_one:,.0f} orders/s, checkout_orders: {1 / all_at_once:,.0f} orders/s')
+
@@ -0,0 +1,181 @@
+"""
+Module Name: gameloop
+
+Description:
+    Frame pacing and profiling for the pygame game loop. FixedTimestep keeps one persistent
+    pygame Clock that caps the frame rate, and tells the loop how many fixed-length
+    simulation ticks are due each frame, so monsters move at the same speed whatever the
+    frame rate. FrameTimings records how long each phase of every frame took (input,
+    movement, collision, draw, flip) and reports p50/p95/p99 per phase, as overlay lines
+    or exported to CSV or JSON.
+
+Classes:
+    - FixedTimestep(tick_rate, frame_rate=60, max_ticks_per_frame=5, clock=None):
+        Paces frames and counts the simulation ticks due in each.
+    - FrameTimings(phases=PHASES, history=3600):
+        Per-phase frame timings with percentiles, overlay text and CSV/JSON export.
+
+Examples:
+    >>> loop = FixedTimestep(tick_rate=10, frame_rate=60)
+    >>> timings = FrameTimings()
+    >>> while running:
+    ...     ticks = loop.advance()
+    ...     timings.start_frame()
+    ...     handle_events()
+    ...     timings.lap('input')
+    ...     for _ in range(ticks):
+    ...         move_monsters()
+    ...     timings.lap('movement')
+    ...     ...
+    ...     timings.end_frame()
+    >>> timings.percentiles()['draw']
+    {'p50': 0.41, 'p95': 0.63, 'p99': 0.9}  # Milliseconds, output will vary
+    >>> timings.export('frame_timings.csv')
+"""
+
+import csv
+import json
+import time
+
+import numpy as np
+import pygame
+
+# The phases of a frame, in the order the game loop runs them
+PHASES = ('input', 'movement', 'collision', 'draw', 'flip')
+
+# Percentiles reported for every phase
+PERCENTILES = (50, 95, 99)
+
+
+class FixedTimestep:
+    """Paces the game loop with one persistent clock and schedules fixed-length simulation ticks.
+
+    Every frame advance() waits until the frame is due (at most frame_rate frames per
+    second) and returns how many ticks of 1 / tick_rate seconds of simulation have
+    accumulated. After a stall longer than max_ticks_per_frame ticks the backlog is
+    dropped instead of being caught up, so one slow frame cannot snowball.
+
+    Attributes:
+        tick_rate (float): Simulation ticks per second.
+        frame_rate (int): Maximum frames per second (0 for no limit).
+        clock (pygame.time.Clock): The clock pacing the frames.
+        ticks (int): Simulation ticks run so far.
+    """
+
+    def __init__(self, tick_rate, frame_rate=60, max_ticks_per_frame=5, clock=None):
+        if tick_rate <= 0:
+            raise ValueError('The tick rate must be positive.')
+        self.tick_rate = tick_rate
+        self.frame_rate = frame_rate
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.clock = clock if clock is not None else pygame.time.Clock()
+        self.ticks = 0
+        self._tick_ms = 1000 / tick_rate
+        self._accumulated_ms = 0.0
+
+    @property
+    def fps(self):
+        """The measured frame rate."""
+        return self.clock.get_fps()
+
+    def advance(self):
+        """
+        Waits for the next frame and returns how many simulation ticks to run in it.
+
+        Returns:
+            int: The number of ticks due (often 0 when rendering faster than the simulation).
+        """
+        self._accumulated_ms += self.clock.tick(self.frame_rate)
+        due = int(self._accumulated_ms // self._tick_ms)
+        if due > self.max_ticks_per_frame:
+            due = self.max_ticks_per_frame
+            self._accumulated_ms = 0.0
+        else:
+            self._accumulated_ms -= due * self._tick_ms
+        self.ticks += due
+        return due
+
+
+class FrameTimings:
+    """Time spent in each phase of the last history frames.
+
+    Call start_frame() at the start of a frame, lap(phase) at the end of each phase (a
+    phase may be lapped several times per frame, the times add up) and end_frame() once
+    the frame is done. Time between start_frame() or the last lap and the next lap is
+    counted for that lap's phase.
+    """
+
+    def __init__(self, phases=PHASES, history=3600):
+        self.phases = tuple(phases)
+        self.history = history
+        self.frames = 0
+        self._columns = {phase: column for column, phase in enumerate(self.phases)}
+        self._samples = np.zeros((history, len(self.phases)))
+        self._current = np.zeros(len(self.phases))
+        self._last = None
+
+    def start_frame(self):
+        """Starts timing a new frame."""
+        self._current[:] = 0.0
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """Adds the time since the last lap (or start_frame) to phase."""
+        now = time.perf_counter()
+        self._current[self._columns[phase]] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        """Records the frame, overwriting the oldest one once history frames are kept."""
+        self._samples[self.frames % self.history] = self._current
+        self.frames += 1
+
+    def samples(self):
+        """Returns the kept frames, oldest first, as a (frames, phases) array of milliseconds."""
+        if self.frames <= self.history:
+            kept = self._samples[:self.frames]
+        else:
+            split = self.frames % self.history
+            kept = np.concatenate((self._samples[split:], self._samples[:split]))
+        return kept * 1000
+
+    def percentiles(self):
+        """
+        Returns the p50/p95/p99 time of each phase and of the whole frame over the kept frames.
+
+        Returns:
+            dict: Maps each phase (and 'total') to a {'p50': ms, 'p95': ms, 'p99': ms} dictionary.
+        """
+        samples = self.samples()
+        if not len(samples):
+            samples = np.zeros((1, len(self.phases)))
+        columns = dict(zip(self.phases, samples.T))
+        columns['total'] = samples.sum(axis=1)
+        return {phase: {f'p{q}': round(float(np.percentile(values, q)), 3) for q in PERCENTILES}
+                for phase, values in columns.items()}
+
+    def overlay_lines(self):
+        """Returns one short line of text per phase (and the total) for an in-game overlay."""
+        return [f"{phase:<9} " + '  '.join(f'{name} {value:.2f}' for name, value in stats.items()) + ' ms'
+                for phase, stats in self.percentiles().items()]
+
+    def export(self, fileName):
+        """
+        Writes the percentiles to fileName, as JSON if it ends with .json and as CSV otherwise.
+
+        Args:
+            fileName (str): The file to write.
+
+        Returns:
+            None
+        """
+        stats = self.percentiles()
+        if fileName.endswith('.json'):
+            with open(fileName, 'w') as file:
+                json.dump({'frames': min(self.frames, self.history), 'unit': 'ms', 'phases': stats}, file, indent=4)
+        else:
+            with open(fileName, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(['phase'] + [f'p{q}_ms' for q in PERCENTILES])
+                for phase, values in stats.items():
+                    writer.writerow([phase] + list(values.values()))
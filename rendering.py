@@ -0,0 +1,213 @@
+"""
+Module Name: rendering
+
+Description:
+    Dirty-rectangle rendering for the grid game. The visible part of the world map is
+    drawn into a background surface from chunks baked once, and each frame only the grid
+    cells whose contents may have changed (cells a sprite left or entered, and cells under
+    HUD text that changed) are restored from that background, redrawn, and pushed with
+    pygame.display.update(rects) instead of flipping the whole display.
+
+Classes:
+    - ChunkCache(world, cell_size, colors, line_color, max_chunks=16):
+        Bakes world map chunks into surfaces on demand and draws the camera's view from them.
+    - DirtyRenderer(screen, background, cell_size):
+        Tracks dirty cells and HUD text and redraws/pushes only those regions.
+
+Examples:
+    >>> renderer = DirtyRenderer(screen, pygame.Surface((320, 320)).convert(), 32)
+    >>> chunks = ChunkCache(world, 32, {FLOOR: WHITE, ROCK: GRAY}, BLACK)
+    >>> if camera.follow(player_rect):  # The view scrolled, redraw it all from the baked chunks
+    ...     chunks.draw_view(renderer.background, camera.rect)
+    ...     renderer.mark_all()
+    >>> renderer.set_occupied(occupied_cells)  # Cells with sprites this frame
+    >>> renderer.draw_text('Health: 100', font.render('Health: 100', True, BLACK), (10, 40))
+    >>> renderer.render(draw_sprites)  # draw_sprites(dirty) draws the sprites of the dirty cells
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+
+class ChunkCache:
+    """World map chunks baked into surfaces when first shown, keeping the most recently used ones.
+
+    Attributes:
+        world (worldmap.WorldMap): The map the chunks come from.
+        cell_size (int): Size of a grid cell in pixels.
+        colors (dict): Fill color of each tile type.
+        line_color (tuple): Color of the cell outlines.
+        max_chunks (int): How many baked chunks are kept before the least recently used is dropped.
+    """
+
+    def __init__(self, world, cell_size, colors, line_color, max_chunks=16):
+        self.world = world
+        self.cell_size = cell_size
+        self.colors = colors
+        self.line_color = line_color
+        self.max_chunks = max_chunks
+        self._surfaces = OrderedDict()
+
+    def surface(self, chunk_x, chunk_y):
+        """Returns the baked surface of a chunk, baking it if it is not cached."""
+        key = (chunk_x, chunk_y)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        cell_size = self.cell_size
+        tiles = self.world.chunk(chunk_x, chunk_y)
+        size = tiles.shape[0] * cell_size
+        surface = pygame.Surface((size, size))
+        for tile, color in self.colors.items():
+            for y, x in zip(*np.nonzero(tiles == tile)):
+                surface.fill(color, pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size))
+        for x in range(0, size, cell_size):
+            for y in range(0, size, cell_size):
+                pygame.draw.rect(surface, self.line_color, pygame.Rect(x, y, cell_size, cell_size), 1)
+        if pygame.display.get_surface():
+            surface = surface.convert()
+
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_chunks:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def draw_view(self, target, view):
+        """
+        Draws the part of the world in view onto target, from the chunks overlapping it.
+
+        Args:
+            target (pygame.Surface): The surface to draw on (e.g. a DirtyRenderer's background).
+            view (pygame.Rect): The area of the world shown on target, in world pixels.
+
+        Returns:
+            None
+        """
+        cell_size = self.cell_size
+        chunk_pixels = self.world.chunk_size * cell_size
+        cells = pygame.Rect(view.left // cell_size, view.top // cell_size,
+                            -(-view.width // cell_size) + 1, -(-view.height // cell_size) + 1)
+        target.fill(self.line_color)  # Anything past the world's edges
+        for chunk_x, chunk_y in self.world.chunks_in(cells):
+            target.blit(self.surface(chunk_x, chunk_y), (chunk_x * chunk_pixels - view.left, chunk_y * chunk_pixels - view.top))
+
+
+class DirtyRenderer:
+    """Redraws and pushes to the display only the grid cells of the screen that changed.
+
+    Every frame the game tells the renderer which cells hold sprites (set_occupied) and
+    which HUD text to show (draw_text), then calls render(). A cell is dirty if it holds
+    sprites now or did last frame, if it was marked with mark_rect, or if it lies under
+    HUD text that appeared, changed or disappeared.
+    """
+
+    def __init__(self, screen, background, cell_size):
+        self.screen = screen
+        self.background = background
+        self.cell_size = cell_size
+        self.columns = -(-screen.get_width() // cell_size)
+        self.rows = -(-screen.get_height() // cell_size)
+        self._dirty = np.ones((self.rows, self.columns), dtype=bool)  # The first frame draws everything
+        self._occupied = np.zeros((self.rows, self.columns), dtype=bool)
+        self._texts = []
+        self._last_texts = []
+
+    def mark_all(self):
+        """Marks the whole screen dirty (e.g. after the background changed)."""
+        self._dirty[:] = True
+
+    def mark_rect(self, rect):
+        """Marks every cell that overlaps rect (in pixels) dirty."""
+        rect = pygame.Rect(rect).clip(self.screen.get_rect())
+        if rect.width and rect.height:
+            cell_size = self.cell_size
+            self._dirty[rect.top // cell_size:(rect.bottom - 1) // cell_size + 1,
+                        rect.left // cell_size:(rect.right - 1) // cell_size + 1] = True
+
+    def set_occupied(self, occupied):
+        """Tells the renderer which cells hold sprites this frame.
+
+        Args:
+            occupied (numpy.ndarray): Boolean (rows, columns) array, True where a sprite is drawn.
+        """
+        self._dirty |= occupied | self._occupied
+        self._occupied = occupied.copy()
+
+    def draw_text(self, key, surface, position):
+        """Queues HUD text to be drawn on top of this frame.
+
+        Args:
+            key (hashable): What the text says (e.g. the string), used to notice when it changes.
+            surface (pygame.Surface): The rendered text.
+            position (tuple): The (x, y) position of the text.
+        """
+        self._texts.append((key, position, surface))
+
+    def dirty_rects(self):
+        """Returns the dirty cells as a list of pygame.Rect, merging runs of dirty cells in the same row."""
+        cell_size = self.cell_size
+        screen_rect = self.screen.get_rect()
+        rects = []
+        for row in np.flatnonzero(self._dirty.any(axis=1)).tolist():
+            line = np.concatenate(([False], self._dirty[row], [False]))
+            edges = np.flatnonzero(line[1:] != line[:-1]).tolist()
+            for start, end in zip(edges[::2], edges[1::2]):
+                rect = pygame.Rect(start * cell_size, row * cell_size, (end - start) * cell_size, cell_size)
+                rects.append(rect.clip(screen_rect))
+        return rects
+
+    def draw(self, draw_sprites):
+        """Redraws the dirty regions on the screen surface without pushing them to the display.
+
+        Args:
+            draw_sprites (callable): Called with the boolean (rows, columns) dirty array after the
+                background was restored; it must draw every sprite standing in a dirty cell.
+
+        Returns:
+            list: The rects that were redrawn, to be passed to present().
+        """
+        # Text that changed needs the cells under its old and new position redrawn
+        current = {(key, position) for key, position, _ in self._texts}
+        previous = {(key, position) for key, position, _ in self._last_texts}
+        for key, position, surface in self._last_texts + self._texts:
+            if ((key, position) in current) != ((key, position) in previous):
+                self.mark_rect(surface.get_rect(topleft=position))
+
+        rects = self.dirty_rects()
+        for rect in rects:
+            self.screen.blit(self.background, rect, rect)
+        draw_sprites(self._dirty)
+        # Text is clipped to the dirty rects: blending it again over itself elsewhere would darken its edges
+        for _, position, surface in self._texts:
+            text_rect = surface.get_rect(topleft=position)
+            for index in text_rect.collidelistall(rects):
+                self.screen.set_clip(rects[index])
+                self.screen.blit(surface, position)
+        self.screen.set_clip(None)
+
+        self._dirty[:] = False
+        self._last_texts = self._texts
+        self._texts = []
+        return rects
+
+    def present(self, rects):
+        """Pushes the rects returned by draw() to the display."""
+        pygame.display.update(rects)
+
+    def render(self, draw_sprites):
+        """Redraws the dirty regions and pushes only those to the display (draw() then present()).
+
+        Args:
+            draw_sprites (callable): Called with the boolean (rows, columns) dirty array after the
+                background was restored; it must draw every sprite standing in a dirty cell.
+
+        Returns:
+            list: The rects that were pushed to the display.
+        """
+        rects = self.draw(draw_sprites)
+        self.present(rects)
+        return rects
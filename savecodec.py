@@ -0,0 +1,429 @@
+"""
+Module Name: savecodec
+
+Description:
+    Compact binary save format for game.py, next to the json one. A binary save starts
+    with a fixed 32 byte header: the magic b'GSAV', the format version, flags, then
+    playerHealth, playerGold and swordDurability at fixed offsets and the number of
+    inventory and equipped items. The header fields can be read straight from a memory
+    map (SaveReader) without decoding the rest of the file.
+
+    Item dicts are not stored whole. Every item names one of the ITEM_TEMPLATES (the
+    items game.main hands out) by its id and only stores the fields that differ from
+    it, e.g. the milkshake's quantity, so the magic potion's effect text is never
+    written. Field names are interned as well. Items, names and fields the tables do not
+    know are stored in full, and any other top-level keys go in a json blob at the end,
+    so every json save converts back and forth without loss.
+
+    The interned tables belong to the format version: changing them means a new version
+    with its own tables, and old files keep decoding with theirs.
+
+Functions:
+    - encodeSave(gameData):
+        Encodes a save (the json layout of game.saveGame) to bytes.
+    - decodeSave(data):
+        Decodes bytes from encodeSave back to the json layout.
+    - isBinarySave(data):
+        Returns whether data starts with the binary save header.
+    - jsonToBinary(jsonFile, binaryFile) / binaryToJson(binaryFile, jsonFile):
+        Convert save files between the two formats.
+
+Classes:
+    - SaveReader(fileName):
+        Memory-mapped binary save, reads single header fields without decoding.
+
+Examples:
+    >>> data = encodeSave(gameData)
+    >>> decodeSave(data) == gameData
+    True
+    >>> with SaveReader('Jit.sav') as save:
+    ...     save.playerGold
+    10
+
+    Run this module to compare the binary and json saves:
+        python savecodec.py
+"""
+
+import json
+import mmap
+import struct
+
+from autosave import writeAtomic
+from savejournal import SEQ_KEY, loadJournaled, openJournal
+
+MAGIC = b'GSAV'
+VERSION = 1
+
+# game.saveGame and game.loadGame use the binary format for files ending in BINARY_SUFFIX
+BINARY_SUFFIX = '.sav'
+
+# Header: magic, version, flags, playerHealth, playerGold (int64 or float64, see GOLD_IS_FLOAT),
+# swordDurability, inventory items, equipped items, bytes of the extra json at the end
+HEADER = struct.Struct('<4sHHi8siHHI')
+GOLD_IS_FLOAT = 1  # Flag bit
+
+# Offsets of the header fields, for SaveReader
+_HEALTH_OFFSET = 8
+_GOLD_OFFSET = 12
+_DURABILITY_OFFSET = 20
+
+# The items game.main starts with, interned by position. Items only store what differs from these
+ITEM_TEMPLATES = (
+    {'name': 'swashbuckler sword', 'type': 'weapon', 'minDurability': 1, 'currentDurability': 25, 'attackBoost': 10},
+    {'name': 'milkshake', 'type': 'healthBoost', 'healthRestore': 10, 'quantity': 3},
+    {'name': 'magic potion', 'type': 'potion', 'effect': 'Defeats any one monster without losing HP.', 'quantity': 1},
+)
+
+# Item field names, interned by position
+ITEM_KEYS = ('name', 'type', 'minDurability', 'currentDurability', 'attackBoost', 'healthRestore', 'quantity', 'effect')
+
+# The fields of the json layout that live in the header and the item lists
+SAVE_FIELDS = ('itemInventory', 'playerHealth', 'playerGold', 'equippiedItems', 'swordDurability')
+
+_UNKNOWN_ID = 0xFFFF  # Item or equipped name stored in full
+_UNKNOWN_KEY = 0xFF  # Item field name stored in full
+_DELETED = object()  # A template field the item does not have
+
+# Value tags
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _JSON, _MISSING = range(8)
+
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_INT64 = struct.Struct('<q')
+_FLOAT64 = struct.Struct('<d')
+
+_TEMPLATE_IDS = {template['name']: templateId for templateId, template in enumerate(ITEM_TEMPLATES)}
+_KEY_IDS = {key: keyId for keyId, key in enumerate(ITEM_KEYS)}
+
+
+def _writeString(out, text):
+    data = text.encode('utf-8')
+    out += _U16.pack(len(data))
+    out += data
+
+
+def _readString(data, offset):
+    (length,) = _U16.unpack_from(data, offset)
+    offset += 2
+    return str(data[offset:offset + length], 'utf-8'), offset + length
+
+
+def _writeValue(out, value):
+    if value is None:
+        out += _U8.pack(_NONE)
+    elif value is _DELETED:
+        out += _U8.pack(_MISSING)
+    elif isinstance(value, bool):
+        out += _U8.pack(_TRUE if value else _FALSE)
+    elif isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        out += _U8.pack(_INT) + _INT64.pack(value)
+    elif isinstance(value, float):
+        out += _U8.pack(_FLOAT) + _FLOAT64.pack(value)
+    elif isinstance(value, str):
+        out += _U8.pack(_STR)
+        _writeString(out, value)
+    else:
+        data = json.dumps(value).encode('utf-8')
+        out += _U8.pack(_JSON) + _U32.pack(len(data)) + data
+
+
+def _readValue(data, offset):
+    tag = data[offset]
+    offset += 1
+    if tag == _INT:
+        return _INT64.unpack_from(data, offset)[0], offset + 8
+    if tag == _STR:
+        return _readString(data, offset)
+    if tag == _FLOAT:
+        return _FLOAT64.unpack_from(data, offset)[0], offset + 8
+    if tag == _JSON:
+        (length,) = _U32.unpack_from(data, offset)
+        offset += 4
+        return json.loads(str(data[offset:offset + length], 'utf-8')), offset + length
+    if tag > _MISSING:
+        raise ValueError(f"Unknown value tag in binary save: {tag}")
+    return (None, False, True, None, None, None, None, _DELETED)[tag], offset
+
+
+def _writeItem(out, item):
+    templateId = _TEMPLATE_IDS.get(item.get('name')) if isinstance(item, dict) else None
+    if templateId is None:
+        # Not a known item: every field is stored
+        out += _U16.pack(_UNKNOWN_ID)
+        if not isinstance(item, dict):
+            _writeValue(out, item)
+            return
+        template = {}
+    else:
+        out += _U16.pack(templateId)
+        template = ITEM_TEMPLATES[templateId]
+
+    changes = [(key, value) for key, value in item.items() if key not in template or template[key] != value
+               or type(template[key]) is not type(value)]
+    changes += [(key, _DELETED) for key in template if key not in item]
+    if templateId is None:
+        out += _U8.pack(_JSON + 1)  # Marks a dict (a non-dict item is a plain value, see above)
+    if len(changes) > 0xFF:
+        raise ValueError("An item has too many fields for the binary save format.")
+    out += _U8.pack(len(changes))
+    for key, value in changes:
+        keyId = _KEY_IDS.get(key)
+        if keyId is None:
+            out += _U8.pack(_UNKNOWN_KEY)
+            _writeString(out, key)
+        else:
+            out += _U8.pack(keyId)
+        _writeValue(out, value)
+
+
+def _readItem(data, offset):
+    (templateId,) = _U16.unpack_from(data, offset)
+    offset += 2
+    if templateId == _UNKNOWN_ID:
+        if data[offset] != _JSON + 1:
+            return _readValue(data, offset)
+        offset += 1
+        item = {}
+    elif templateId < len(ITEM_TEMPLATES):
+        item = dict(ITEM_TEMPLATES[templateId])
+    else:
+        raise ValueError(f"Unknown item id in binary save: {templateId}")
+
+    changes = data[offset]
+    offset += 1
+    for _ in range(changes):
+        keyId = data[offset]
+        offset += 1
+        if keyId == _UNKNOWN_KEY:
+            key, offset = _readString(data, offset)
+        else:
+            key = ITEM_KEYS[keyId]
+        value, offset = _readValue(data, offset)
+        if value is _DELETED:
+            item.pop(key, None)
+        else:
+            item[key] = value
+    return item, offset
+
+
+def encodeSave(gameData):
+    """
+    Encodes a save to the binary format.
+
+    Args:
+        gameData (dict): The save in the json layout of game.saveGame. playerHealth and swordDurability
+            must be 32 bit ints, playerGold an int or a float, and the item lists lists.
+
+    Returns:
+        bytes: The binary save.
+    """
+    try:
+        health = gameData['playerHealth']
+        gold = gameData['playerGold']
+        durability = gameData['swordDurability']
+        items = gameData['itemInventory']
+        equipped = gameData['equippiedItems']
+    except (KeyError, TypeError):
+        raise ValueError("A binary save needs every field of the save layout.") from None
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in (health, durability)) \
+            or isinstance(gold, bool) or not isinstance(gold, (int, float)) \
+            or not isinstance(items, list) or not isinstance(equipped, list):
+        raise ValueError("The save has fields of the wrong type for the binary format.")
+
+    extras = {key: value for key, value in gameData.items() if key not in SAVE_FIELDS}
+    extraData = json.dumps(extras).encode('utf-8') if extras else b''
+    flags = GOLD_IS_FLOAT if isinstance(gold, float) else 0
+    try:
+        out = bytearray(HEADER.pack(MAGIC, VERSION, flags, health,
+                                    _FLOAT64.pack(gold) if flags & GOLD_IS_FLOAT else _INT64.pack(gold),
+                                    durability, len(items), len(equipped), len(extraData)))
+        for item in items:
+            _writeItem(out, item)
+        for name in equipped:
+            templateId = _TEMPLATE_IDS.get(name) if isinstance(name, str) else None
+            if templateId is None:
+                out += _U16.pack(_UNKNOWN_ID)
+                _writeValue(out, name)
+            else:
+                out += _U16.pack(templateId)
+    except struct.error as error:
+        raise ValueError(f"The save does not fit the binary format: {error}") from None
+    out += extraData
+    return bytes(out)
+
+
+def isBinarySave(data):
+    """Returns whether data (bytes, or the start of a file) is a binary save."""
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def _readHeader(data):
+    if len(data) < HEADER.size or not isBinarySave(data):
+        raise ValueError("Not a binary save.")
+    header = HEADER.unpack_from(data)
+    if header[1] > VERSION:
+        raise ValueError(f"Binary save version {header[1]} is newer than this game (version {VERSION}).")
+    return header
+
+
+def _gold(flags, goldBytes):
+    return (_FLOAT64 if flags & GOLD_IS_FLOAT else _INT64).unpack(goldBytes)[0]
+
+
+def decodeSave(data):
+    """
+    Decodes a binary save.
+
+    Args:
+        data (bytes-like): The binary save (bytes, or e.g. a memory map).
+
+    Returns:
+        dict: The save in the json layout of game.saveGame.
+    """
+    _, _, flags, health, goldBytes, durability, itemCount, equippedCount, extraLength = _readHeader(data)
+    try:
+        offset = HEADER.size
+        items = []
+        for _ in range(itemCount):
+            item, offset = _readItem(data, offset)
+            items.append(item)
+        equipped = []
+        for _ in range(equippedCount):
+            (templateId,) = _U16.unpack_from(data, offset)
+            offset += 2
+            if templateId == _UNKNOWN_ID:
+                name, offset = _readValue(data, offset)
+            else:
+                name = ITEM_TEMPLATES[templateId]['name']
+            equipped.append(name)
+        extras = json.loads(str(data[offset:offset + extraLength], 'utf-8')) if extraLength else {}
+    except (struct.error, IndexError) as error:
+        raise ValueError(f"Truncated or corrupted binary save: {error}") from None
+
+    return {'itemInventory': items,
+            'playerHealth': health,
+            'playerGold': _gold(flags, goldBytes),
+            'equippiedItems': equipped,
+            'swordDurability': durability,
+            **extras}
+
+
+class SaveReader:
+    """A binary save file opened as a memory map. The header fields are read in place, on access.
+
+    Attributes:
+        version (int): The format version of the file.
+    """
+
+    def __init__(self, fileName):
+        with open(fileName, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.version = _readHeader(self._map)[1]
+        except ValueError:
+            self._map.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        """Unmaps the file."""
+        self._map.close()
+
+    @property
+    def playerHealth(self):
+        return struct.unpack_from('<i', self._map, _HEALTH_OFFSET)[0]
+
+    @property
+    def playerGold(self):
+        return _gold(_U16.unpack_from(self._map, 6)[0], self._map[_GOLD_OFFSET:_GOLD_OFFSET + 8])
+
+    @property
+    def swordDurability(self):
+        return struct.unpack_from('<i', self._map, _DURABILITY_OFFSET)[0]
+
+    def decode(self):
+        """Decodes the whole save, see decodeSave."""
+        return decodeSave(self._map)
+
+
+def jsonToBinary(jsonFile, binaryFile):
+    """
+    Converts a json save file, with its journal replayed (see savejournal.py), to a binary one
+    (written atomically).
+
+    Args:
+        jsonFile (str): The json save to read.
+        binaryFile (str): The binary save to write.
+
+    Returns:
+        None
+    """
+    gameData = loadJournaled(jsonFile)  # Without the journal's record number
+    if gameData is None:
+        raise FileNotFoundError(f"No save file named {jsonFile}.")
+    writeAtomic(binaryFile, encodeSave(gameData))
+
+
+def binaryToJson(binaryFile, jsonFile):
+    """
+    Converts a binary save file to a json one. It is written through the json save's journal,
+    so records left in an existing journal are not replayed onto the converted save.
+
+    Args:
+        binaryFile (str): The binary save to read.
+        jsonFile (str): The json save to write.
+
+    Returns:
+        None
+    """
+    with open(binaryFile, 'rb') as file:
+        gameData = decodeSave(file.read())
+    gameData.pop(SEQ_KEY, None)  # Older conversions copied it into the binary extras
+    journal = openJournal(jsonFile)
+    journal.save(gameData)
+    journal.compact()  # A new snapshot and an empty journal, like a save written from scratch
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+    import timeit
+
+    print(f"{'save':>10} {'json bytes':>11} {'binary bytes':>13} {'json enc/dec (us)':>18} {'binary enc/dec (us)':>20}")
+    for fileName in ('Jit.json', 'John.json', 'Test.json'):
+        with open(fileName, 'r') as file:
+            gameData = json.load(file)
+        text = json.dumps(gameData)
+        data = encodeSave(gameData)
+        assert decodeSave(data) == gameData
+        number = 20000
+        jsonEncode = timeit.timeit(lambda: json.dumps(gameData), number=number) / number
+        jsonDecode = timeit.timeit(lambda: json.loads(text), number=number) / number
+        binaryEncode = timeit.timeit(lambda: encodeSave(gameData), number=number) / number
+        binaryDecode = timeit.timeit(lambda: decodeSave(data), number=number) / number
+        print(f"{fileName:>10} {len(text.encode('utf-8')):>11} {len(data):>13} "
+              f"{jsonEncode * 1e6:>8.1f} / {jsonDecode * 1e6:<7.1f} {binaryEncode * 1e6:>9.1f} / {binaryDecode * 1e6:<7.1f}")
+
+    # Reading one field: parse the whole json file, or map the binary one and read its header
+    with tempfile.TemporaryDirectory() as folder:
+        binaryFile = os.path.join(folder, 'Jit.sav')
+        jsonToBinary('Jit.json', binaryFile)
+
+        def jsonField():
+            with open('Jit.json', 'r') as file:
+                return json.load(file)['playerGold']
+
+        def binaryField():
+            with SaveReader(binaryFile) as save:
+                return save.playerGold
+
+        assert jsonField() == binaryField()
+        number = 5000
+        print(f"Read playerGold from a file: json {timeit.timeit(jsonField, number=number) / number * 1e6:.1f} us, "
+              f"binary {timeit.timeit(binaryField, number=number) / number * 1e6:.1f} us")
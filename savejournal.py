@@ -0,0 +1,361 @@
+"""
+Module Name: savejournal
+
+Description:
+    Journaled save files for game.py. A save is the usual json file (the snapshot) plus
+    a journal next to it (fileName + '.journal') with one small json record per save:
+    only the values that changed since the previous save, as [path, value] pairs (a
+    path alone deletes). Saving after a fight that only changed swordDurability appends
+    [["swordDurability"], 23] instead of rewriting the whole state. Loading replays the
+    journal onto the snapshot.
+
+    Appends are flushed right away but only fsynced every syncEvery records (and by
+    sync()). Every compactEvery records the state is written as a new snapshot (see
+    autosave.writeAtomic) and the journal is emptied. The snapshot holds the number of
+    the last record it includes ('journalSeq'), so a crash between the two steps only
+    leaves records that replay skips. A torn record at the end of the journal (crash
+    mid-append) is ignored.
+
+    A SaveJournal remembers the size and modification time of both files (their stamp)
+    after each of its own writes. If something else replaced or appended to them since
+    (another process, a converted or copied-in save), the next save reloads the state
+    from disk before diffing, so records are never computed against a stale state.
+
+Functions:
+    - diffState(old, new):
+        Returns the [path, value] / [path] operations turning old into new.
+    - applyOps(state, ops):
+        Applies operations from diffState to state.
+    - loadJournaled(fileName):
+        Returns the saved state: the snapshot with the journal replayed onto it.
+    - saveStamp(fileName):
+        Returns the size and modification time of a save's snapshot and journal.
+    - openJournal(fileName):
+        Returns the SaveJournal of fileName, shared by everything saving to that file.
+
+Classes:
+    - SaveJournal(fileName, syncEvery=16, compactEvery=64):
+        Appends the changes of every save to the journal of fileName.
+
+Examples:
+    >>> journal = openJournal('save.json')
+    >>> journal.save(gameData)  # Appends only what changed since the last save
+    1
+    >>> journal.sync()
+    >>> loadJournaled('save.json') == gameData
+    True
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from autosave import writeAtomic
+
+# The journal of a save file is fileName + JOURNAL_SUFFIX
+JOURNAL_SUFFIX = '.journal'
+
+# Key of the snapshot holding the number of the last journal record it includes
+SEQ_KEY = 'journalSeq'
+
+# How many journals openJournal keeps open, the least recently used is closed first
+MAX_OPEN_JOURNALS = 16
+
+
+def diffState(old, new, path=()):
+    """
+    Returns the operations turning old into new. Dictionaries are compared key by key and lists
+    of the same length item by item, anything else that changed is replaced whole.
+
+    Args:
+        old: A json-like value (dicts, lists, strings, numbers, booleans, None).
+        new: The value old became.
+        path (tuple, optional): Where old is in the whole state. Defaults to the root.
+
+    Returns:
+        list: [path, value] to set a value and [path] to delete one, each path a list of keys and indexes.
+    """
+    if old is new or (type(old) is type(new) and old == new):
+        return []  # Equal parts are compared in C, only the changed paths are walked
+    if type(old) is dict and type(new) is dict:
+        ops = [[[*path, key]] for key in sorted(old.keys() - new.keys())]
+        for key, value in new.items():
+            if key in old:
+                ops += diffState(old[key], value, (*path, key))
+            else:
+                ops.append([[*path, key], value])
+        return ops
+    if type(old) is list and type(new) is list and len(old) == len(new):
+        ops = []
+        for index, (oldValue, value) in enumerate(zip(old, new)):
+            ops += diffState(oldValue, value, (*path, index))
+        return ops
+    return [[list(path), new]]
+
+
+def applyOps(state, ops):
+    """
+    Applies operations from diffState to state.
+
+    Args:
+        state: The json-like value to change. Dictionaries and lists in it are changed in place.
+        ops (list): The operations.
+
+    Returns:
+        The new state (a different object only when an operation replaces the root).
+    """
+    for op in ops:
+        path = op[0]
+        if not path:
+            state = op[1]
+            continue
+        container = state
+        for key in path[:-1]:
+            container = container[key]
+        if len(op) == 1:
+            del container[path[-1]]
+        else:
+            container[path[-1]] = op[1]
+    return state
+
+
+def _replay(fileName):
+    # Returns (state, last record number, records after the snapshot, whether the journal ends with a
+    # torn record), or None without a snapshot
+    if not os.path.exists(fileName):
+        return None
+    with open(fileName, 'r') as file:
+        state = json.load(file)
+    seq = state.pop(SEQ_KEY, 0)
+    records = 0
+    torn = False
+    if os.path.exists(fileName + JOURNAL_SUFFIX):
+        with open(fileName + JOURNAL_SUFFIX, 'r') as journal:
+            for line in journal:
+                torn = not line.endswith('\n')
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn record
+                if record['seq'] <= seq:
+                    continue  # Already in the snapshot
+                state = applyOps(state, record['ops'])
+                seq = record['seq']
+                records += 1
+    return state, seq, records, torn
+
+
+def saveStamp(fileName):
+    """
+    Returns the stamp of a save: it changes whenever its snapshot or its journal is written.
+
+    Args:
+        fileName (str): The save file.
+
+    Returns:
+        list: The size and modification time (ns) of the snapshot, then of the journal (0 for a missing file).
+    """
+    stamp = []
+    for name in (fileName, fileName + JOURNAL_SUFFIX):
+        try:
+            stat = os.stat(name)
+            stamp += [stat.st_size, stat.st_mtime_ns]
+        except FileNotFoundError:
+            stamp += [0, 0]
+    return stamp
+
+
+def loadJournaled(fileName):
+    """
+    Loads a save: the snapshot in fileName with its journal replayed onto it.
+
+    Args:
+        fileName (str): The save file. Plain json saves without a journal load as they are.
+
+    Returns:
+        The saved state, or None if fileName does not exist.
+    """
+    replayed = _replay(fileName)
+    return None if replayed is None else replayed[0]
+
+
+class SaveJournal:
+    """Saves states to fileName by appending what changed to its journal. Thread-safe.
+
+    Attributes:
+        fileName (str): The save file (the snapshot).
+        syncEvery (int): Records appended between two fsyncs.
+        compactEvery (int): Records in the journal before it is folded into a new snapshot.
+        seq (int): Number of the last record.
+        records (int): Records in the journal after the snapshot.
+        compactions (int): How many snapshots were written.
+    """
+
+    def __init__(self, fileName, syncEvery=16, compactEvery=64):
+        self.fileName = fileName
+        self.syncEvery = syncEvery
+        self.compactEvery = compactEvery
+        self.compactions = 0
+        self._lock = threading.Lock()
+        self._journal = None
+        self._unsynced = 0
+        self._load()
+
+    def _load(self):
+        # (Re)read the saved state from the files, dropping anything kept from before
+        self._sync()
+        if self._journal is not None:
+            self._journal.close()  # It may be a journal file that was replaced since
+            self._journal = None
+        self._stamp = saveStamp(self.fileName)
+        replayed = _replay(self.fileName)
+        if replayed is None:
+            self._state, self.seq, self.records, self._broken = None, 0, 0, False
+        else:
+            # Records appended after a torn one would be glued to it, start over from a snapshot instead
+            self._state, self.seq, self.records, self._broken = replayed
+
+    def save(self, state):
+        """
+        Saves state, appending only what changed since the last save. Writes a snapshot instead
+        when there is none yet, when the journal is long, or after a failed append. If the files
+        were written by anything else since this journal last wrote them, it reloads them first.
+
+        Args:
+            state (dict): The json-like state. It is kept to compare the next save with, so it must not be changed afterwards.
+
+        Returns:
+            int: How many values changed (0 writes nothing).
+        """
+        with self._lock:
+            if saveStamp(self.fileName) != self._stamp:
+                self._load()
+            if self._state is None:  # No snapshot yet, or deleted since
+                self._compact(state)
+                return len(diffState({}, state))
+            ops = diffState(self._state, state)
+            if not ops:
+                return 0
+            if self._broken or self.records + 1 >= self.compactEvery:
+                self._compact(state)
+                return len(ops)
+
+            if self._journal is None:
+                self._journal = open(self.fileName + JOURNAL_SUFFIX, 'a')
+            try:
+                self._journal.write(json.dumps({'seq': self.seq + 1, 'ops': ops}, separators=(',', ':')) + '\n')
+                self._journal.flush()
+            except OSError:
+                self._broken = True  # The journal may end with a torn record, start over from a snapshot
+                raise
+            self.seq += 1
+            self.records += 1
+            self._state = state
+            self._stamp = saveStamp(self.fileName)
+            self._unsynced += 1
+            if self._unsynced >= self.syncEvery:
+                self._sync()
+            return len(ops)
+
+    def sync(self):
+        """Makes every appended record durable (fsync)."""
+        with self._lock:
+            self._sync()
+
+    def compact(self):
+        """Writes the current state as a new snapshot and empties the journal."""
+        with self._lock:
+            if saveStamp(self.fileName) != self._stamp:
+                self._load()
+            if self._state is not None:
+                self._compact(self._state)
+
+    def close(self):
+        """Syncs and closes the journal file. Saving again reopens it."""
+        with self._lock:
+            self._sync()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _sync(self):
+        if self._journal is not None and self._unsynced:
+            os.fsync(self._journal.fileno())
+        self._unsynced = 0
+
+    def _compact(self, state):
+        # The snapshot first: if the journal is not emptied, its records are older than SEQ_KEY and skipped
+        writeAtomic(self.fileName, json.dumps({**state, SEQ_KEY: self.seq}))
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.fileName + JOURNAL_SUFFIX):
+            writeAtomic(self.fileName + JOURNAL_SUFFIX, '')
+        self._state = state
+        self._stamp = saveStamp(self.fileName)
+        self.records = 0
+        self._unsynced = 0
+        self._broken = False
+        self.compactions += 1
+
+
+# The journals opened by openJournal, by absolute path, least recently used first
+_journals = OrderedDict()
+_journalsLock = threading.Lock()
+
+
+def openJournal(fileName):
+    """
+    Returns the SaveJournal of fileName, creating it on first use. Everything saving to the same
+    file gets the same journal, so their records never interleave. Only the MAX_OPEN_JOURNALS
+    most recently used journals are kept, the others are closed (saving to one reopens its file).
+
+    Args:
+        fileName (str): The save file.
+
+    Returns:
+        SaveJournal: The journal.
+    """
+    path = os.path.abspath(fileName)
+    with _journalsLock:
+        journal = _journals.pop(path, None)
+        if journal is None:
+            journal = SaveJournal(path)
+        _journals[path] = journal
+        while len(_journals) > MAX_OPEN_JOURNALS:
+            _journals.popitem(last=False)[1].close()
+    return journal
+
+
+if __name__ == '__main__':
+    import tempfile
+    import timeit
+
+    # Compare rewriting the whole save with appending what changed, for growing inventories
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"{'items':>8} {'full save (ms)':>15} {'journaled (ms)':>15} {'bytes / save':>13}")
+        for items in (3, 300, 30000):
+            state = {'itemInventory': [{'name': f'item {item}', 'type': 'weapon', 'currentDurability': 25}
+                                       for item in range(items)],
+                     'playerHealth': 100, 'playerGold': 10, 'equippiedItems': [], 'swordDurability': 25}
+            fullName = os.path.join(folder, f'full{items}.json')
+            journal = SaveJournal(os.path.join(folder, f'journaled{items}.json'))
+            journal.save(dict(state))
+
+            def fullSave():
+                state['swordDurability'] -= 1
+                writeAtomic(fullName, json.dumps(state))
+
+            def journaledSave():
+                # The game saves a fresh copy each turn (game.snapshotGame)
+                state['swordDurability'] -= 1
+                journal.save({**state, 'itemInventory': [dict(item) for item in state['itemInventory']]})
+
+            full = timeit.timeit(fullSave, number=20) / 20
+            before = os.path.getsize(journal.fileName + JOURNAL_SUFFIX) if os.path.exists(journal.fileName + JOURNAL_SUFFIX) else 0
+            journaled = timeit.timeit(journaledSave, number=20) / 20
+            journal.sync()
+            appended = (os.path.getsize(journal.fileName + JOURNAL_SUFFIX) - before) / 20
+            assert loadJournaled(journal.fileName) == state
+            print(f"{items:>8} {full * 1e3:>15.3f} {journaled * 1e3:>15.3f} {appended:>13.0f}")
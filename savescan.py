@@ -0,0 +1,338 @@
+"""
+Module Name: savescan
+
+Description:
+    Bulk scanner for the save files written by game.py, for offline admin and
+    leaderboard jobs. It finds every save under the given files and folders, json and
+    binary (see savecodec.py), loads each one as game.loadGame would (snapshot plus
+    journal, see savejournal.py, or the decoded binary save), and checks it against
+    the save schema. The checks cover the fields and their types, and
+    consistency between them, e.g. a broken sword that is still in equippiedItems.
+
+    Files are handed to a process pool in chunks. At most a few chunks per worker are
+    in flight at a time, so memory stays bounded however many files there are. Each
+    worker returns the aggregated statistics of its chunk (counts, gold and HP totals,
+    the leaderboards by gold and by HP) and one report line per file. The report lines
+    are written to a JSONL file as the chunks come back.
+
+Functions:
+    - validateSave(gameData):
+        Returns the schema problems of one save.
+    - scanFile(fileName):
+        Loads and validates one save file, returning its report line.
+    - scanSaves(paths, workers=None, chunkSize=256, top=10, report=None, progress=None):
+        Scans every save under paths across a process pool.
+
+Usage:
+    python savescan.py saves/ --report report.jsonl
+    python savescan.py Jit.json John.json Test.json --workers 1 --top 3 --json summary.json
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from multiprocessing import Pool
+
+from savecodec import BINARY_SUFFIX, MAGIC, decodeSave, isBinarySave
+from savejournal import JOURNAL_SUFFIX, loadJournaled
+
+# What game.main can put in a save
+MAX_HEALTH = 100
+ITEM_TYPES = ('weapon', 'healthBoost', 'potion')
+SWORD_NAME = 'swashbuckler sword'
+
+# Field name -> the types it may hold
+SAVE_SCHEMA = {
+    'itemInventory': (list,),
+    'playerHealth': (int,),
+    'playerGold': (int, float),
+    'equippiedItems': (list,),
+    'swordDurability': (int,),
+}
+
+
+def _hasType(value, types):
+    # True and False are ints to isinstance, but never valid save values
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def validateSave(gameData):
+    """
+    Checks one save against the save schema. The messages do not depend on the save, so they can be counted.
+
+    Parameters:
+        gameData: The loaded save.
+
+    Returns:
+        list: The problems found (empty for a valid save).
+    """
+    if not isinstance(gameData, dict):
+        return ['The save is not a json object.']
+
+    problems = []
+    for field, types in SAVE_SCHEMA.items():
+        if field not in gameData:
+            problems.append(f'Missing {field}.')
+        elif not _hasType(gameData[field], types):
+            problems.append(f'{field} has the wrong type.')
+    if problems:
+        return problems  # The checks below need every field
+
+    if gameData['playerHealth'] > MAX_HEALTH:
+        problems.append(f'playerHealth is above {MAX_HEALTH}.')
+    if gameData['playerGold'] < 0:
+        problems.append('playerGold is negative.')
+
+    names = set()
+    sword = None
+    for item in gameData['itemInventory']:
+        if not isinstance(item, dict) or not isinstance(item.get('name'), str):
+            problems.append('An inventory item has no name.')
+            continue
+        names.add(item['name'])
+        if item.get('type') not in ITEM_TYPES:
+            problems.append('An inventory item has an unknown type.')
+        if 'quantity' in item and (not _hasType(item['quantity'], (int,)) or item['quantity'] < 0):
+            problems.append('An inventory item has a bad quantity.')
+        if item['name'] == SWORD_NAME:
+            sword = item
+
+    equipped = gameData['equippiedItems']
+    if not all(isinstance(name, str) for name in equipped):
+        problems.append('equippiedItems holds something that is not an item name.')
+    elif not set(equipped) <= names:
+        problems.append('equippiedItems names an item that is not in itemInventory.')
+
+    # The sword only wears down, and game.main unequips it when it breaks
+    durability = gameData['swordDurability']
+    if SWORD_NAME in equipped and durability <= 0:
+        problems.append('The sword is equipped but swordDurability is 0 or less.')
+    if sword is not None and _hasType(sword.get('currentDurability'), (int,)) and durability > sword['currentDurability']:
+        problems.append("swordDurability is above the sword's currentDurability.")
+    return problems
+
+
+def scanFile(fileName):
+    """
+    Loads and validates one save file.
+
+    Parameters:
+        fileName (str): The save file (its journal is replayed too). Binary saves are recognised by their header.
+
+    Returns:
+        dict: The report line: 'file', 'valid', 'problems', 'size', and 'playerHealth' and
+            'playerGold' when the save could be read.
+    """
+    line = {'file': fileName, 'valid': False}
+    try:
+        line['size'] = os.path.getsize(fileName)
+        if os.path.exists(fileName + JOURNAL_SUFFIX):
+            line['size'] += os.path.getsize(fileName + JOURNAL_SUFFIX)
+        with open(fileName, 'rb') as file:
+            data = file.read(len(MAGIC))
+            binary = isBinarySave(data)
+            if binary:
+                data += file.read()
+        gameData = decodeSave(data) if binary else loadJournaled(fileName)
+    except (OSError, ValueError, LookupError, TypeError) as error:
+        line['problems'] = [f'Unreadable save: {error}']
+        line['unreadable'] = True
+        return line
+
+    line['problems'] = validateSave(gameData)
+    line['valid'] = not line['problems']
+    if isinstance(gameData, dict):
+        line['playerHealth'] = gameData.get('playerHealth')
+        line['playerGold'] = gameData.get('playerGold')
+    return line
+
+
+class ScanStats:
+    """Aggregated results of many scanned saves. Stats from different chunks are combined with merge()."""
+
+    def __init__(self, top=10):
+        self.top = top
+        self.files = 0
+        self.valid = 0
+        self.unreadable = 0
+        self.problems = Counter()
+        self.goldTotal = 0  # Totals and leaderboards only count valid saves
+        self.healthTotal = 0
+        self.topGold = []  # (gold, file) of the richest valid saves
+        self.topHealth = []  # (HP, file) of the healthiest valid saves
+
+    def record(self, line):
+        self.files += 1
+        if line.get('unreadable'):
+            self.unreadable += 1
+            return
+        self.problems.update(line['problems'])
+        if line['valid']:
+            self.valid += 1
+            self.goldTotal += line['playerGold']
+            self.healthTotal += line['playerHealth']
+            self.topGold = heapq.nlargest(self.top, self.topGold + [(line['playerGold'], line['file'])])
+            self.topHealth = heapq.nlargest(self.top, self.topHealth + [(line['playerHealth'], line['file'])])
+
+    def merge(self, other):
+        self.files += other.files
+        self.valid += other.valid
+        self.unreadable += other.unreadable
+        self.problems.update(other.problems)
+        self.goldTotal += other.goldTotal
+        self.healthTotal += other.healthTotal
+        self.topGold = heapq.nlargest(self.top, self.topGold + other.topGold)
+        self.topHealth = heapq.nlargest(self.top, self.topHealth + other.topHealth)
+
+    def report(self):
+        """Returns the aggregated results as a json friendly dictionary."""
+        valid = max(self.valid, 1)
+        return {
+            'files': self.files,
+            'valid': self.valid,
+            'invalid': self.files - self.valid - self.unreadable,
+            'unreadable': self.unreadable,
+            'problems': dict(self.problems.most_common()),
+            'meanGold': self.goldTotal / valid,
+            'meanHealth': self.healthTotal / valid,
+            'leaderboardGold': [{'file': fileName, 'playerGold': gold} for gold, fileName in self.topGold],
+            'leaderboardHealth': [{'file': fileName, 'playerHealth': health} for health, fileName in self.topHealth],
+        }
+
+
+def scanChunk(task):
+    """
+    Scans one chunk of save files. Runs inside the worker processes.
+
+    Parameters:
+        task (tuple): (list of file names, leaderboard size).
+
+    Returns:
+        tuple: The ScanStats of the chunk and its report lines.
+    """
+    fileNames, top = task
+    stats = ScanStats(top)
+    lines = []
+    for fileName in fileNames:
+        line = scanFile(fileName)
+        stats.record(line)
+        lines.append(line)
+    return stats, lines
+
+
+def findSaves(paths):
+    """
+    Yields every save file under paths, lazily.
+
+    Parameters:
+        paths (iterable): Save files, or folders searched recursively for *.json and *.sav files.
+
+    Returns:
+        generator: The save file names.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for folder, _, fileNames in os.walk(path):
+            for fileName in sorted(fileNames):
+                if fileName.endswith(('.json', BINARY_SUFFIX)) and not fileName.startswith('.'):
+                    yield os.path.join(folder, fileName)
+
+
+def scanSaves(paths, workers=None, chunkSize=256, top=10, report=None, progress=None):
+    """
+    Scans every save under paths across a process pool and aggregates the results.
+
+    Parameters:
+        paths (iterable): Save files and folders (see findSaves).
+        workers (int, optional): Worker processes. Defaults to None (one per core). 1 runs in this process.
+        chunkSize (int, optional): Files per chunk of work. Defaults to 256.
+        top (int, optional): Size of the leaderboards. Defaults to 10.
+        report (file, optional): Open text file that gets one json line per save, in the order the chunks finish.
+        progress (callable, optional): Called with the running ScanStats after every chunk.
+
+    Returns:
+        ScanStats: The aggregated results.
+    """
+    if chunkSize < 1 or top < 0:
+        raise ValueError('Chunks need at least one file and the leaderboards cannot be negative.')
+
+    files = findSaves(paths)
+    tasks = iter(lambda: (list(itertools.islice(files, chunkSize)), top), ([], top))
+    total = ScanStats(top)
+
+    def collect(result):
+        stats, lines = result
+        total.merge(stats)
+        if report is not None:
+            report.writelines(json.dumps(line) + '\n' for line in lines)
+        if progress:
+            progress(total)
+
+    if workers == 1:
+        for task in tasks:
+            collect(scanChunk(task))
+        return total
+
+    # Only a few chunks per worker are queued at a time, so file names and results never pile up
+    with Pool(workers) as pool:
+        inFlight = deque()
+        maxInFlight = 4 * (workers or os.cpu_count() or 1)
+        for task in tasks:
+            inFlight.append(pool.apply_async(scanChunk, (task,)))
+            if len(inFlight) >= maxInFlight:
+                collect(inFlight.popleft().get())
+        while inFlight:
+            collect(inFlight.popleft().get())
+    return total
+
+
+def main(argv=None):
+    """Command line entry point, see the module docstring for usage."""
+    parser = argparse.ArgumentParser(description='Validate many game.py save files and build leaderboards.')
+    parser.add_argument('paths', nargs='+', help='save files, or folders to search for *.json and *.sav saves')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--chunk-size', type=int, default=256, help='files per chunk of work')
+    parser.add_argument('--top', type=int, default=10, help='size of the gold and HP leaderboards')
+    parser.add_argument('--report', help='write one json line per save to this file')
+    parser.add_argument('--json', help='also write the aggregated results to this json file')
+    args = parser.parse_args(argv)
+
+    startTime = time.perf_counter()
+
+    def showProgress(stats):
+        print(f'{stats.files} saves  {stats.valid} valid  {stats.unreadable} unreadable', file=sys.stderr)
+
+    report = open(args.report, 'w') if args.report else None
+    try:
+        stats = scanSaves(args.paths, args.workers, args.chunk_size, args.top, report, progress=showProgress)
+    finally:
+        if report is not None:
+            report.close()
+    summary = stats.report()
+    summary['seconds'] = time.perf_counter() - startTime
+
+    print(f"Saves: {summary['files']}  Time: {summary['seconds']:.1f}s ({os.cpu_count()} cores)")
+    print(f"Valid: {summary['valid']}  Invalid: {summary['invalid']}  Unreadable: {summary['unreadable']}")
+    for problem, count in summary['problems'].items():
+        print(f'  {count}x {problem}')
+    print(f"Mean gold: {summary['meanGold']:.2f}  Mean HP: {summary['meanHealth']:.1f}")
+    print('Richest:', ', '.join(f"{entry['file']} ({entry['playerGold']})" for entry in summary['leaderboardGold']) or 'none')
+    print('Healthiest:', ', '.join(f"{entry['file']} ({entry['playerHealth']})" for entry in summary['leaderboardHealth']) or 'none')
+
+    if args.report:
+        print(f'Report saved to {args.report}.')
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(summary, file, indent=2)
+        print(f'Summary saved to {args.json}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Module Name: saveslots
+
+Description:
+    Named save slots for game.py, kept in one folder with a manifest next to them. The
+    manifest records every slot's name, save time, HP, gold and size, so listing the
+    saves reads one small file instead of parsing every save. A slot's full state is
+    only loaded when it is picked.
+
+    Each manifest entry also records the size and modification time of the slot's files
+    (its stamp). Listing compares the stamps with the folder (file metadata only) and
+    re-indexes just the slots that changed behind the manifest's back, e.g. a slot
+    written by the background autosave, or copied in by hand. A missing or unreadable
+    manifest is rebuilt the same way.
+
+Classes:
+    - SlotInfo(slot, savedAt, playerHealth, playerGold, size):
+        What the manifest knows about one slot.
+    - SaveSlots(folder='saves'):
+        The save slots in folder and their manifest.
+
+Examples:
+    >>> saveSlots = SaveSlots()
+    >>> saveSlots.save('John', gameData)
+    >>> [slot.slot for slot in saveSlots.list()]  # Newest first
+    ['John']
+    >>> gameData = saveSlots.load('John')
+    >>> saveSlots.delete('John')
+
+    Run this module to compare listing many slots with and without the manifest:
+        python saveslots.py
+"""
+
+import json
+import os
+from collections import namedtuple
+
+from autosave import writeAtomic
+from savejournal import JOURNAL_SUFFIX, loadJournaled, openJournal, saveStamp
+
+SAVE_FOLDER = 'saves'
+SAVE_SUFFIX = '.json'  # A slot is saved as its name + SAVE_SUFFIX (and its journal)
+MANIFEST_FILE = 'saves.manifest'
+MANIFEST_VERSION = 1
+
+# What the manifest knows about one slot. savedAt is the time of its last save (seconds since the epoch),
+# size the bytes of its files. playerHealth and playerGold are None when the save cannot be read.
+SlotInfo = namedtuple('SlotInfo', ['slot', 'savedAt', 'playerHealth', 'playerGold', 'size'])
+
+
+class SaveSlots:
+    """The save slots in a folder, listed from a manifest and loaded on demand.
+
+    Attributes:
+        folder (str): The save folder (created when needed).
+        reindexed (int): How many slots had to be parsed to update the manifest.
+    """
+
+    def __init__(self, folder=SAVE_FOLDER):
+        self.folder = folder
+        self.reindexed = 0
+
+    def path(self, slot):
+        """
+        Returns the save file of slot.
+
+        Args:
+            slot (str): The slot name.
+
+        Returns:
+            str: The path of the slot's snapshot (its journal is next to it).
+        """
+        if not slot or slot.startswith('.') or '/' in slot or '\\' in slot:
+            raise ValueError("A save slot name cannot be empty, start with '.' or contain '/' or '\\'.")
+        return os.path.join(self.folder, slot + SAVE_SUFFIX)
+
+    def save(self, slot, gameData):
+        """
+        Saves gameData to slot (through its journal, see savejournal.py) and updates the manifest.
+
+        Args:
+            slot (str): The slot name.
+            gameData (dict): The game state (see game.snapshotGame). It must not be changed afterwards.
+
+        Returns:
+            None
+        """
+        fileName = self.path(slot)
+        os.makedirs(self.folder, exist_ok=True)
+        journal = openJournal(fileName)
+        journal.save(gameData)
+        journal.sync()
+
+        slots = self._readManifest()
+        slots[slot] = self._entry(gameData, saveStamp(fileName))
+        self._writeManifest(slots)
+
+    def load(self, slot):
+        """
+        Loads the full state of slot.
+
+        Args:
+            slot (str): The slot name.
+
+        Returns:
+            dict: The game state, or None if there is no such slot.
+        """
+        return loadJournaled(self.path(slot))
+
+    def delete(self, slot):
+        """
+        Deletes slot (its snapshot and journal) and its manifest entry. Nothing happens if there is no such slot.
+
+        Args:
+            slot (str): The slot name.
+
+        Returns:
+            None
+        """
+        fileName = self.path(slot)
+        for name in (fileName, fileName + JOURNAL_SUFFIX):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+        slots = self._readManifest()
+        if slots.pop(slot, None) is not None:
+            self._writeManifest(slots)
+
+    def list(self):
+        """
+        Lists the slots from the manifest, first re-indexing any slot whose files changed since.
+
+        Returns:
+            list: A SlotInfo per slot, most recently saved first.
+        """
+        slots = self._readManifest()
+        stamps = self._stamps()
+        changed = False
+        for slot in list(slots):
+            if slot not in stamps:
+                del slots[slot]  # Deleted behind the manifest's back
+                changed = True
+        for slot, stamp in stamps.items():
+            entry = slots.get(slot)
+            if entry is None or entry['stamp'] != stamp:
+                try:
+                    gameData = loadJournaled(self.path(slot))
+                except (OSError, ValueError, LookupError, TypeError):
+                    gameData = None  # Unreadable save, still listed
+                slots[slot] = self._entry(gameData, stamp)
+                self.reindexed += 1
+                changed = True
+        if changed:
+            self._writeManifest(slots)
+
+        infos = [SlotInfo(slot, entry['savedAt'], entry['playerHealth'], entry['playerGold'], entry['size'])
+                 for slot, entry in slots.items()]
+        infos.sort(key=lambda info: info.savedAt, reverse=True)
+        return infos
+
+    def _stamps(self):
+        # The stamp (see savejournal.saveStamp) of every slot in the folder, from one scan of the folder
+        try:
+            entries = list(os.scandir(self.folder))
+        except FileNotFoundError:
+            return {}
+        stats = {entry.name: entry.stat() for entry in entries if entry.is_file()}
+        stamps = {}
+        for name, stat in stats.items():
+            if name.endswith(SAVE_SUFFIX) and not name.startswith('.'):
+                journal = stats.get(name + JOURNAL_SUFFIX)
+                stamps[name[:-len(SAVE_SUFFIX)]] = [stat.st_size, stat.st_mtime_ns,
+                                                    journal.st_size if journal else 0,
+                                                    journal.st_mtime_ns if journal else 0]
+        return stamps
+
+    def _entry(self, gameData, stamp):
+        gameData = gameData if isinstance(gameData, dict) else {}
+        return {'savedAt': max(stamp[1], stamp[3]) / 1e9,
+                'playerHealth': gameData.get('playerHealth'),
+                'playerGold': gameData.get('playerGold'),
+                'size': stamp[0] + stamp[2],
+                'stamp': stamp}
+
+    def _readManifest(self):
+        try:
+            with open(os.path.join(self.folder, MANIFEST_FILE), 'r') as file:
+                manifest = json.load(file)
+            if manifest['version'] == MANIFEST_VERSION:
+                return manifest['slots']
+        except (OSError, ValueError, LookupError, TypeError):
+            pass
+        return {}  # Missing, unreadable or outdated: every slot is re-indexed
+
+    def _writeManifest(self, slots):
+        os.makedirs(self.folder, exist_ok=True)
+        writeAtomic(os.path.join(self.folder, MANIFEST_FILE), json.dumps({'version': MANIFEST_VERSION, 'slots': slots}))
+
+
+if __name__ == '__main__':
+    import tempfile
+    import timeit
+
+    with tempfile.TemporaryDirectory() as folder:
+        saveSlots = SaveSlots(folder)
+        with open('Jit.json', 'r') as file:
+            gameData = json.load(file)
+        for slot in range(500):
+            saveSlots.save(f'slot {slot}', {**gameData, 'playerGold': slot})
+
+        manifest = timeit.timeit(saveSlots.list, number=20) / 20
+
+        def rebuild():
+            os.remove(os.path.join(folder, MANIFEST_FILE))
+            saveSlots.list()
+
+        rebuilt = timeit.timeit(rebuild, number=5) / 5
+        print(f"List 500 slots: {manifest * 1e3:.2f} ms from the manifest, {rebuilt * 1e3:.2f} ms parsing every save")
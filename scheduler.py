@@ -0,0 +1,228 @@
+"""
+Module Name: scheduler
+
+Description:
+    Timers for the game loop, counted in simulation ticks.
+
+    Scheduler is a heap of one-off callbacks (e.g. hiding a HUD message after 3
+    seconds). Each tick only pops the timers that are due, so its work follows the
+    number of due timers.
+
+    RowSchedule keeps the next tick of many entities (rows of a MonsterStore), for
+    per-monster move speeds. This is a trade-off. Up to SCAN_LIMIT rows, each tick
+    finds the due rows with one vectorized scan of every row's next tick. That is
+    O(population) per tick, but with a small constant, so it is the fastest way for
+    populations of that size. Above SCAN_LIMIT rows, the rows are filed into one
+    bucket per tick, and each tick only touches its due rows.
+
+    Per-monster cooldowns are a tick column of the MonsterStore (attack_ready),
+    compared with the current tick in one vectorized step.
+
+Classes:
+    - Scheduler():
+        Heap of timed callbacks, with cancelable timers.
+    - RowSchedule(scan_limit=SCAN_LIMIT):
+        When each row next acts: scanned up to scan_limit rows, bucketed by tick above.
+
+Examples:
+    >>> scheduler = Scheduler()
+    >>> timer = scheduler.call_later(30, hud.hide, 'encounter')
+    >>> scheduler.cancel(timer)
+    >>> scheduler.run_until(tick)  # Once per tick
+    >>> moves = RowSchedule()
+    >>> moves.schedule(rows, tick + intervals)
+    >>> due = moves.pop_due(tick)  # Once per tick, every tick
+
+    Run this module to compare scanning every row each tick with popping due rows from buckets:
+        python scheduler.py
+"""
+
+import heapq
+import itertools
+
+import numpy as np
+
+# Up to this many rows, scanning every row's next tick is at least as fast as the buckets. Per tick in
+# the benchmark below: 0.03 ms (scan) vs 0.06 ms (buckets) at 10k rows, about 0.1 ms each at 100k rows,
+# and 1.2 ms vs 0.6 ms at 1M rows
+SCAN_LIMIT = 1 << 17
+
+
+class Timer:
+    """A callback scheduled on a Scheduler. Cancel it with Scheduler.cancel."""
+
+    __slots__ = ('time', 'callback', 'args', 'cancelled')
+
+    def __init__(self, time, callback, args):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class Scheduler:
+    """Runs callbacks at given ticks, in order, from a heap.
+
+    Attributes:
+        now (int): The last tick run_until was called with.
+    """
+
+    def __init__(self):
+        self.now = 0
+        self._heap = []
+        self._sequence = itertools.count()  # Keeps timers due at the same tick in scheduling order
+
+    def __len__(self):
+        return len(self._heap)
+
+    def call_at(self, time, callback, *args):
+        """
+        Schedules callback(*args) to run at tick time.
+
+        Args:
+            time (int): The tick to run at. Ticks already past run on the next run_until.
+            callback (callable): What to call.
+            *args: Arguments for callback.
+
+        Returns:
+            Timer: The scheduled timer, to cancel it.
+        """
+        timer = Timer(time, callback, args)
+        heapq.heappush(self._heap, (time, next(self._sequence), timer))
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        """Schedules callback(*args) to run delay ticks after now, see call_at."""
+        return self.call_at(self.now + delay, callback, *args)
+
+    def cancel(self, timer):
+        """Stops timer from running (nothing happens if it already ran or is None)."""
+        if timer is not None:
+            timer.cancelled = True
+
+    def run_until(self, now):
+        """
+        Runs every timer due at or before tick now, earliest first.
+
+        Args:
+            now (int): The current tick.
+
+        Returns:
+            int: How many callbacks ran.
+        """
+        self.now = now
+        heap = self._heap
+        ran = 0
+        while heap and heap[0][0] <= now:
+            timer = heapq.heappop(heap)[2]
+            if not timer.cancelled:
+                timer.callback(*timer.args)
+                ran += 1
+        return ran
+
+
+class RowSchedule:
+    """The tick at which each row (e.g. a monster of a MonsterStore) acts next.
+
+    Every row is due at most once: scheduling a row again replaces its previous tick.
+    pop_due must be called for every tick, in order, or the rows due at skipped ticks
+    are never returned. While there are no more than scan_limit rows, pop_due scans the
+    ticks of every row. Past that, the rows are also filed in a bucket per tick and
+    pop_due only looks at the bucket of its tick.
+    """
+
+    def __init__(self, scan_limit=SCAN_LIMIT):
+        self.scan_limit = scan_limit
+        self._buckets = None  # Tick -> arrays of rows, once there are more than scan_limit rows
+        self._due = np.full(0, -1, dtype=np.int64)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._due >= 0))
+
+    def schedule(self, rows, ticks):
+        """
+        Schedules each row at its tick.
+
+        Args:
+            rows (numpy.ndarray): The rows to schedule.
+            ticks (array_like): The tick of each row (or one tick for all of them).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        ticks = np.broadcast_to(np.asarray(ticks, dtype=np.int64), rows.shape)
+        if rows.max() >= len(self._due):
+            grown = np.full(max(2 * len(self._due), rows.max() + 1), -1, dtype=np.int64)
+            grown[:len(self._due)] = self._due
+            self._due = grown
+        self._due[rows] = ticks
+
+        if self._buckets is None:
+            if len(self._due) <= self.scan_limit:
+                return
+            # Too many rows to scan: file every scheduled row from now on
+            self._buckets = {}
+            rows = np.flatnonzero(self._due >= 0)
+            ticks = self._due[rows]
+        order = np.argsort(ticks, kind='stable')
+        ticks = ticks[order]
+        splits = np.flatnonzero(ticks[1:] != ticks[:-1]) + 1
+        for tick, group in zip(ticks[np.concatenate(([0], splits))].tolist(), np.split(rows[order], splits)):
+            self._buckets.setdefault(tick, []).append(group)
+
+    def cancel(self, rows):
+        """Unschedules rows (e.g. removed monsters)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        self._due[rows[rows < len(self._due)]] = -1
+
+    def pop_due(self, tick):
+        """
+        Returns the rows due at tick, and unschedules them.
+
+        Args:
+            tick (int): The current tick.
+
+        Returns:
+            numpy.ndarray: The rows due, each once.
+        """
+        if self._buckets is None:
+            rows = np.flatnonzero(self._due == tick)
+            self._due[rows] = -1
+            return rows
+        groups = self._buckets.pop(tick, None)
+        if groups is None:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.concatenate(groups)
+        rows = rows[self._due[rows] == tick]  # Rows rescheduled since were filed under another tick too
+        # A row can be filed twice under this tick: sort and keep the first of each run (like np.unique,
+        # which takes a much slower hash path for integers in numpy 2)
+        rows = np.sort(rows)
+        rows = rows[np.diff(rows, prepend=-1) != 0]
+        self._due[rows] = -1
+        return rows
+
+
+if __name__ == '__main__':
+    import timeit
+
+    rng = np.random.default_rng(1)
+    print(f"{'monsters':>10} {'due per tick':>13} {'scan all (ms)':>14} {'buckets (ms)':>13} {'row schedule (ms)':>18}")
+    for count in (10000, 100000, 1000000):
+        # Mostly idle monsters, in a few speed classes: each acts every 64 to 1024 ticks
+        intervals = rng.choice([64, 128, 256, 512, 1024], size=count)
+        first_moves = rng.integers(0, intervals)
+        times = []
+        for scan_limit in (count, 0, SCAN_LIMIT):  # Always scan, always use buckets, and the default
+            schedule = RowSchedule(scan_limit)
+            schedule.schedule(np.arange(count), first_moves)
+            state = {'tick': 0, 'due': 0}
+
+            def pop_due():
+                tick = state['tick']
+                due = schedule.pop_due(tick)
+                schedule.schedule(due, tick + intervals[due])
+                state['tick'] += 1
+                state['due'] += len(due)
+
+            times.append(timeit.timeit(pop_due, number=256) / 256)
+        print(f"{count:>10} {state['due'] // 256:>13} {times[0] * 1e3:>14.3f} {times[1] * 1e3:>13.3f} {times[2] * 1e3:>18.3f}")
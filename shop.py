@@ -0,0 +1,152 @@
+"""
+Module Name: shop
+
+Description:
+    The item shop of the pygame game as a UI state of the game loop. Nothing blocks on
+    terminal input: the shop opens when the player steps onto it, reads the number keys
+    from the pygame events the loop already handles, and shows its catalog as HUD lines
+    (rendered once through the text cache, then only when a line changes), so monsters
+    keep moving and frames keep coming while the player shops.
+
+Classes:
+    - ShopMenu(inventory, hud, position=(10, 130), line_height=16):
+        The shop's open/closed state, key handling and HUD lines.
+
+Examples:
+    >>> shop_menu = ShopMenu(SHOP_INVENTORY, hud)
+    >>> shop_menu.update(player, player_pos.colliderect(shop_pos))  # Every frame
+    >>> shop_menu.handle_key(event.key, player)  # For every KEYDOWN event
+    True
+"""
+
+import pygame
+
+from gamefunctions import purchase_item, to_money
+
+# What the shop sells
+SHOP_INVENTORY = (
+    {'name': 'Swashbuckler Sword', 'type': 'weapon', 'price': 5.99},
+    {'name': 'Milkshake', 'type': 'healthBoost', 'price': 3.50},
+)
+
+# Number keys, top row and keypad, by the number they stand for
+_NUMBER_KEYS = {**{getattr(pygame, f'K_{number}'): number for number in range(10)},
+                **{getattr(pygame, f'K_KP{number}'): number for number in range(10)}}
+
+
+class ShopMenu:
+    """The item shop, opened while the player stands on it and driven by key events.
+
+    While open, number key n buys the n-th item and the key after the last item (or
+    Escape) leaves the shop. Other keys are left to the game (e.g. walking away, which
+    also closes the shop).
+
+    Attributes:
+        inventory (list): The items still for sale (dicts with 'name', 'type' and 'price').
+        is_open (bool): Whether the shop menu is shown.
+        message (str): The answer to the last choice, shown above the catalog.
+    """
+
+    def __init__(self, inventory, hud, position=(10, 130), line_height=16):
+        self.inventory = [dict(item) for item in inventory]
+        self.hud = hud
+        self.position = position
+        self.line_height = line_height
+        self.is_open = False
+        self.message = ''
+        self._inside = False
+        self._lines_shown = 0
+
+    def update(self, player, inside):
+        """
+        Opens the shop when the player steps onto it and closes it when they step off. Call every frame.
+
+        Args:
+            player (Player): The player.
+            inside (bool): Whether the player stands on the shop.
+
+        Returns:
+            None
+        """
+        if inside and not self._inside:
+            self.open(player)
+        elif not inside and self._inside:
+            self.close(player)
+        self._inside = inside
+
+    def open(self, player):
+        """Opens the shop menu."""
+        self.is_open = True
+        player.enter_shop()
+        self.message = "You have entered the shop."
+        self._show()
+
+    def close(self, player):
+        """Closes the shop menu."""
+        self.is_open = False
+        player.exit_shop()
+        for line in range(self._lines_shown):
+            self.hud.hide(f"shop {line}")
+        self._lines_shown = 0
+
+    def handle_key(self, key, player):
+        """
+        Handles a key press while the shop is open.
+
+        Args:
+            key (int): The pygame key code.
+            player (Player): The player.
+
+        Returns:
+            bool: Whether the shop used the key (False when closed or for keys it does not use).
+        """
+        if not self.is_open:
+            return False
+        exit_number = len(self.inventory) + 1
+        number = _NUMBER_KEYS.get(key)
+        if key == pygame.K_ESCAPE or number == exit_number:
+            self.close(player)
+        elif number is not None and 1 <= number <= len(self.inventory):
+            self.buy(number - 1, player)
+            self._show()
+        elif number is not None:
+            self.message = f"Invalid choice. Please press a number from 1 to {exit_number}."
+            self._show()
+        else:
+            return False
+        return True
+
+    def buy(self, index, player):
+        """
+        Buys inventory[index] for the player if they have enough gold, and sets message.
+
+        Args:
+            index (int): Position of the item in inventory.
+            player (Player): The player.
+
+        Returns:
+            bool: Whether the item was bought.
+        """
+        item = self.inventory[index]
+        try:
+            _, player.gold = purchase_item(to_money(item['price']), to_money(player.gold))  # Exact, 10 - 5.99 is 4.01
+        except ValueError:
+            self.message = f"Not enough gold to purchase {item['name']}."
+            return False
+        player.equipped_items.append(item['name'])
+        self.inventory.pop(index)  # Remove item from shop inventory
+        self.message = f"You purchased {item['name']}!"
+        return True
+
+    def _show(self):
+        # Only lines whose text changed are re-rendered by the HUD
+        lines = [self.message]
+        lines += [f"Press '{number}' to buy {item['name']} for {item['price']} gold."
+                  for number, item in enumerate(self.inventory, 1)]
+        lines.append(f"Press '{len(self.inventory) + 1}' to exit the shop.")
+        x, y = self.position
+        for line, text in enumerate(lines):
+            self.hud.set(f"shop {line}", text, (x, y + line * self.line_height))
+        for line in range(len(lines), self._lines_shown):
+            self.hud.hide(f"shop {line}")
+        self._lines_shown = len(lines)
@@ -0,0 +1,129 @@
+"""
+Module Name: spawntables
+
+Description:
+    Weighted random tables built with Vose's alias method. A table is built once in
+    O(n) and afterwards every draw costs O(1) no matter how many entries it has,
+    which keeps spawn and loot rolls cheap for very large bestiaries.
+
+Classes:
+    - AliasTable(items, weights):
+        A weighted table of items with single (draw) and bulk (draw_many) draws.
+
+Examples:
+    >>> table = AliasTable(['goblin', 'troll', 'George the Giant'], [10, 5, 1])
+    >>> table.draw()
+    'goblin'  # Output will vary
+    >>> table.draw_many(1000, rng=42)
+    array(['troll', 'goblin', ...])  # Output will vary
+"""
+
+import random
+
+import numpy as np
+
+
+class AliasTable:
+    """A weighted random table using the alias method.
+
+    Attributes:
+        items (tuple): The entries of the table.
+        weights (tuple): The weight of every entry, in the same order as items.
+    """
+
+    def __init__(self, items, weights):
+        items = tuple(items)
+        weights = tuple(float(weight) for weight in weights)
+
+        if not items:
+            raise ValueError("A weighted table needs at least one entry.")
+        if len(items) != len(weights):
+            raise ValueError("Every entry needs exactly one weight.")
+        if any(weight < 0 for weight in weights):
+            raise ValueError("Weights cannot be negative.")
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("At least one weight must be greater than zero.")
+
+        # Vose's alias method: scale the weights so the average is 1, then pair every
+        # under-full column with an over-full one that tops it up
+        count = len(items)
+        scaled = [weight * count / total for weight in weights]
+        probability = [1.0] * count
+        alias = list(range(count))
+        small = [index for index, weight in enumerate(scaled) if weight < 1.0]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1.0]
+
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # Anything left over is full up to rounding error
+        for index in small + large:
+            probability[index] = 1.0
+
+        self.items = items
+        self.weights = weights
+        self._probability = probability
+        self._alias = alias
+        self._probability_array = np.array(probability)
+        self._alias_array = np.array(alias, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.items)
+
+    def draw_index(self, rng=random):
+        """Draws the position of one entry in O(1).
+
+        Args:
+            rng (random.Random, optional): Random generator to draw with. Defaults to the random module.
+
+        Returns:
+            int: The position of the drawn entry in items.
+        """
+        column = rng.randrange(len(self._alias))
+        if rng.random() < self._probability[column]:
+            return column
+        return self._alias[column]
+
+    def draw(self, rng=random):
+        """Draws one entry in O(1) (see draw_index)."""
+        return self.items[self.draw_index(rng)]
+
+    def draw_many_indices(self, n, rng=None):
+        """Draws the positions of n entries at once.
+
+        Args:
+            n (int): How many entries to draw.
+            rng (numpy.random.Generator or int, optional): Random generator or seed to draw from. Defaults to None (fresh entropy).
+
+        Returns:
+            numpy.ndarray: The position in items of every drawn entry.
+        """
+        rng = np.random.default_rng(rng)
+        columns = rng.integers(0, len(self._alias_array), size=n)
+        keep = rng.random(n) < self._probability_array[columns]
+        return np.where(keep, columns, self._alias_array[columns])
+
+    def draw_many(self, n, rng=None):
+        """Draws n entries at once (see draw_many_indices).
+
+        Returns:
+            numpy.ndarray: The drawn entries.
+        """
+        return np.asarray(self.items)[self.draw_many_indices(n, rng)]
+
+
+if __name__ == '__main__':
+    from collections import Counter
+
+    table = AliasTable(['goblin', 'troll', 'George the Giant'], [10, 5, 1])
+    print('Single draws:', Counter(table.draw() for _ in range(16000)))
+    print('Bulk draws:', Counter(table.draw_many(16000, rng=42).tolist()))
@@ -0,0 +1,161 @@
+"""
+Module Name: spritebatch
+
+Description:
+    Batched sprite drawing for the grid game. All monster sprites are packed once into a
+    single atlas surface converted to the display's pixel format, so blits never have
+    to convert pixels, and every sprite of a frame is drawn with one Surface.blits call
+    from that one texture.
+
+    Sprites are exactly one grid cell in size, so a sprite with no transparent pixels
+    hides everything drawn before it in the same cell. Those hidden draws are skipped,
+    which keeps the number of blits close to the number of occupied cells even with
+    tens of thousands of monsters stacked on the grid.
+
+Classes:
+    - SpriteAtlas(images, size, fallback_color=(255, 0, 0)):
+        Packs sprites into one display-format texture.
+    - SpriteBatch(atlas, cell_size):
+        Draws many grid-aligned sprites from an atlas in one blits call.
+
+Examples:
+    >>> atlas = SpriteAtlas([goblin_image, troll_image, giant_image], 32)
+    >>> batch = SpriteBatch(atlas, 32)
+    >>> batch.draw(screen, monsters.type_id, monsters.x, monsters.y)
+
+    Run this module to benchmark batched drawing against one blit per monster:
+        python spritebatch.py
+"""
+
+import numpy as np
+import pygame
+
+
+class SpriteAtlas:
+    """Sprites packed side by side into one texture in the display's pixel format.
+
+    Attributes:
+        surface (pygame.Surface): The atlas texture.
+        regions (list): The area (pygame.Rect) of each sprite in the atlas, by sprite id.
+        opaque (numpy.ndarray): Whether each sprite covers its whole cell with no transparency.
+    """
+
+    def __init__(self, images, size, fallback_color=(255, 0, 0)):
+        """
+        Packs images into the atlas.
+
+        Args:
+            images (list): A pygame.Surface per sprite id, or None to draw a circle of fallback_color instead.
+            size (int): Width and height of every sprite (images are scaled to it).
+            fallback_color (tuple, optional): Color of the circle used for missing images. Defaults to red.
+        """
+        surface = pygame.Surface((max(len(images), 1) * size, size), pygame.SRCALPHA)
+        regions = []
+        for sprite_id, image in enumerate(images):
+            region = pygame.Rect(sprite_id * size, 0, size, size)
+            if image is None:
+                pygame.draw.circle(surface, fallback_color, region.center, size // 2)
+            else:
+                if image.get_size() != (size, size):
+                    image = pygame.transform.scale(image, (size, size))
+                surface.blit(image, region)
+            regions.append(region)
+
+        if pygame.display.get_surface():
+            surface = surface.convert_alpha()
+        alpha = pygame.surfarray.array_alpha(surface)
+        self.surface = surface
+        self.regions = regions
+        self.opaque = np.array([bool((alpha[region.left:region.right, :] == 255).all()) for region in regions])
+
+
+class SpriteBatch:
+    """Draws grid-aligned sprites from a SpriteAtlas with one Surface.blits call per frame."""
+
+    def __init__(self, atlas, cell_size):
+        self.atlas = atlas
+        self.cell_size = cell_size
+
+    def visible_draws(self, sprite_ids, cell_x, cell_y):
+        """
+        Returns which draws can be seen: the ones not covered by a later opaque sprite in the same cell.
+
+        Args:
+            sprite_ids (numpy.ndarray): The sprite of each draw, in draw order.
+            cell_x (numpy.ndarray): The x cell of each draw.
+            cell_y (numpy.ndarray): The y cell of each draw.
+
+        Returns:
+            numpy.ndarray: Positions (into the arguments) of the visible draws, grouped by cell and in draw order within a cell.
+        """
+        if len(sprite_ids) == 0:
+            return np.zeros(0, dtype=np.int64)
+        cells = cell_y.astype(np.int64) * (int(cell_x.max()) + 1) + cell_x
+        order = np.argsort(cells, kind='stable')
+        sorted_cells = cells[order]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_cells[1:] != sorted_cells[:-1])))
+
+        # Position of the last opaque draw of each cell (or the cell's first draw if none is opaque)
+        positions = np.arange(len(order))
+        opaque_positions = np.where(self.atlas.opaque[sprite_ids[order]], positions, -1)
+        last_opaque = np.maximum(np.maximum.reduceat(opaque_positions, starts), starts)
+        group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(order))))
+        return order[positions >= last_opaque[group]]
+
+    def draw(self, target, sprite_ids, cell_x, cell_y, offset=(0, 0)):
+        """
+        Draws a sprite in each given cell, in order, skipping draws that would be completely covered.
+
+        Args:
+            target (pygame.Surface): The surface to draw on.
+            sprite_ids (numpy.ndarray): The sprite of each draw, in draw order.
+            cell_x (numpy.ndarray): The x cell of each draw.
+            cell_y (numpy.ndarray): The y cell of each draw.
+            offset (tuple, optional): Pixel position of cell (0, 0) on target. Defaults to (0, 0).
+
+        Returns:
+            int: How many sprites were blitted.
+        """
+        visible = self.visible_draws(sprite_ids, cell_x, cell_y)
+        surface = self.atlas.surface
+        regions = self.atlas.regions
+        cell_size = self.cell_size
+        offset_x, offset_y = offset
+        target.blits([(surface, (x * cell_size + offset_x, y * cell_size + offset_y), regions[sprite_id])
+                      for sprite_id, x, y in zip(sprite_ids[visible].tolist(), cell_x[visible].tolist(), cell_y[visible].tolist())],
+                     doreturn=False)
+        return len(visible)
+
+
+if __name__ == '__main__':
+    import timeit
+
+    from bestiary import get_bestiary
+
+    GRID_SIZE = 10
+    CELL_SIZE = 32
+    screen = pygame.display.set_mode((GRID_SIZE * CELL_SIZE, GRID_SIZE * CELL_SIZE))
+    raw_images = [pygame.transform.scale(pygame.image.load(monster_type.image), (CELL_SIZE, CELL_SIZE)) if monster_type.image else None
+                  for monster_type in get_bestiary()]
+    batch = SpriteBatch(SpriteAtlas(raw_images, CELL_SIZE), CELL_SIZE)
+    rng = np.random.default_rng(1)
+
+    def blit_each(sprite_ids, cell_x, cell_y):
+        # The old way: one blit per monster from the unconverted images
+        for sprite_id, x, y in zip(sprite_ids.tolist(), cell_x.tolist(), cell_y.tolist()):
+            image = raw_images[sprite_id]
+            if image is not None:
+                screen.blit(image, (x * CELL_SIZE, y * CELL_SIZE))
+            else:
+                pygame.draw.circle(screen, (255, 0, 0), (x * CELL_SIZE + CELL_SIZE // 2, y * CELL_SIZE + CELL_SIZE // 2), CELL_SIZE // 2)
+
+    print(f"{'monsters':>10} {'blit each (ms)':>16} {'sprite batch (ms)':>18} {'blits issued':>13}")
+    for count in (100, 1000, 10000, 100000):
+        sprite_ids = rng.integers(0, len(raw_images), size=count)
+        cell_x = rng.integers(0, GRID_SIZE, size=count)
+        cell_y = rng.integers(0, GRID_SIZE, size=count)
+        repeats = max(1, 10000 // count)
+        each = timeit.timeit(lambda: blit_each(sprite_ids, cell_x, cell_y), number=repeats) / repeats
+        batched = timeit.timeit(lambda: batch.draw(screen, sprite_ids, cell_x, cell_y), number=repeats) / repeats
+        print(f'{count:>10} {each * 1e3:>16.2f} {batched * 1e3:>18.2f} {batch.draw(screen, sprite_ids, cell_x, cell_y):>13}')
+    pygame.quit()
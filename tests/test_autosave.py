@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+import autosave
+from autosave import AutoSaver, writeAtomic
+
+
+def test_writeAtomic_replaces_the_file(tmp_path):
+    fileName = tmp_path / 'save.json'
+    writeAtomic(str(fileName), 'old')
+    writeAtomic(str(fileName), b'new')
+    assert fileName.read_text() == 'new'
+    assert os.listdir(tmp_path) == ['save.json']
+
+
+def test_writeAtomic_crash_before_the_rename_keeps_the_old_file(tmp_path, monkeypatch):
+    fileName = tmp_path / 'save.json'
+    writeAtomic(str(fileName), 'old')
+
+    def crash(source, destination):
+        raise KeyboardInterrupt  # Anything, even what is not an Exception
+
+    monkeypatch.setattr(autosave.os, 'replace', crash)
+    with pytest.raises(KeyboardInterrupt):
+        writeAtomic(str(fileName), 'new')
+    assert fileName.read_text() == 'old'
+    assert os.listdir(tmp_path) == ['save.json']  # No temporary file left behind
+
+
+def test_autosaver_writes_the_newest_snapshot(tmp_path):
+    fileName = tmp_path / 'autosave.json'
+    autoSaver = AutoSaver(str(fileName), minInterval=60)
+    for turn in range(10):
+        autoSaver.update({'turn': turn})
+    autoSaver.close()
+    assert json.loads(fileName.read_text()) == {'turn': 9}
+    assert autoSaver.updates == 10 and 1 <= autoSaver.saves <= 10 and autoSaver.lastError is None
+    with pytest.raises(ValueError):
+        autoSaver.update({'turn': 10})
+
+
+def test_autosaver_goes_on_after_a_failed_save(tmp_path):
+    saved = []
+
+    def save(gameData):
+        if gameData['turn'] == 0:
+            raise LookupError('not an OSError')
+        saved.append(gameData)
+
+    autoSaver = AutoSaver(str(tmp_path / 'autosave.json'), minInterval=0, save=save)
+    autoSaver.update({'turn': 0})
+    autoSaver.flush()  # Must not wait forever for the failed write
+    assert isinstance(autoSaver.lastError, LookupError)
+    autoSaver.update({'turn': 1})
+    autoSaver.flush()
+    autoSaver.close()
+    assert saved == [{'turn': 1}] and autoSaver.saves == 1
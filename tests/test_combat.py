@@ -0,0 +1,60 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from combat import MONSTER_WINS, NO_WINNER, PLAYER_WINS, resolveFight, resolveFights
+
+
+def simulate(monsterHealth, monsterPower, playerHealth, playerAttackPower, maxRounds=None):
+    # The fight played out round by round: the player attacks first, the monster hits back if it survives
+    if monsterHealth <= 0:
+        return 0, playerHealth, monsterHealth, 0, 'player'
+    if playerHealth <= 0:
+        return 0, playerHealth, monsterHealth, 0, 'monster'
+    rounds = damageTaken = 0
+    while maxRounds is None or rounds < maxRounds:
+        rounds += 1
+        monsterHealth -= playerAttackPower
+        if monsterHealth <= 0:
+            return rounds, playerHealth, monsterHealth, damageTaken, 'player'
+        playerHealth -= monsterPower
+        damageTaken += monsterPower
+        if playerHealth <= 0:
+            return rounds, playerHealth, monsterHealth, damageTaken, 'monster'
+    return rounds, playerHealth, monsterHealth, damageTaken, None
+
+
+FIGHTS = list(itertools.product([-5, 0, 1, 14, 30, 1200], [0, 1, 7, 120], [-3, 0, 1, 25, 100], [0, 1, 10, 33]))
+
+
+def unwinnable(fight):
+    # Both alive and neither can hurt the other: the fight never ends without a round limit
+    monsterHealth, monsterPower, playerHealth, playerAttackPower = fight
+    return monsterHealth > 0 and playerHealth > 0 and monsterPower == 0 and playerAttackPower == 0
+
+
+@pytest.mark.parametrize('maxRounds', [None, 1, 3, 50])
+def test_resolve_fight_matches_the_simulation(maxRounds):
+    for fight in FIGHTS:
+        if maxRounds is None and unwinnable(fight):
+            with pytest.raises(ValueError):
+                resolveFight(*fight)
+            continue
+        assert tuple(resolveFight(*fight, maxRounds=maxRounds)) == simulate(*fight, maxRounds), fight
+
+
+@pytest.mark.parametrize('maxRounds', [None, 3])
+def test_resolve_fights_matches_resolve_fight(maxRounds):
+    fights = [fight for fight in FIGHTS if not unwinnable(fight)]
+    result = resolveFights(*np.array(fights).T, maxRounds=maxRounds)
+    winners = {'player': PLAYER_WINS, 'monster': MONSTER_WINS, None: NO_WINNER}
+    for index, fight in enumerate(fights):
+        single = resolveFight(*fight, maxRounds=maxRounds)
+        assert (result.rounds[index], result.playerHealth[index], result.monsterHealth[index],
+                result.damageTaken[index], result.winner[index]) == (*single[:4], winners[single.winner]), fight
+
+
+def test_unwinnable_fight_without_a_limit_has_no_winner_in_bulk():
+    result = resolveFights([10], [0], [10], [0])
+    assert result.winner[0] == NO_WINNER and result.rounds[0] == 0
@@ -0,0 +1,73 @@
+import numpy as np
+
+from encounters import ENTER, EXIT, STAY, EncounterTracker, EventQueue
+from monsterstore import MonsterStore
+
+
+def make_store(cells):
+    # A store with one monster standing on each of cells
+    store = MonsterStore(8, 32, np.random.default_rng(0))
+    rows = store.add(len(cells))
+    store.x[rows] = [x for x, _ in cells]
+    store.y[rows] = [y for _, y in cells]
+    return store, rows
+
+
+def events(queue):
+    # The queued events as (kind, sorted rows), in order
+    handled = []
+    handler = lambda event: handled.append((event.kind, sorted(event.rows.tolist())))
+    queue.process({ENTER: handler, STAY: handler, EXIT: handler})
+    return handled
+
+
+def test_enter_stay_exit_sequence():
+    store, rows = make_store([(1, 1), (1, 1), (2, 1), (5, 5)])
+    queue = EventQueue()
+    tracker = EncounterTracker(store, queue)
+
+    tracker.move_player((1, 1))
+    assert events(queue) == [(ENTER, [rows[0], rows[1]])]
+
+    store.x[rows[2]] = 1  # Steps onto the player
+    tracker.monsters_moved(rows[[0, 2, 3]])
+    assert events(queue) == [(ENTER, [rows[2]]), (STAY, [rows[0]])]
+
+    store.y[rows[0]] = 2  # Steps off the player
+    tracker.monsters_moved(rows[[0]])
+    assert events(queue) == [(EXIT, [rows[0]])]
+    assert sorted(tracker.touching.tolist()) == [rows[1], rows[2]]
+
+    tracker.move_player((1, 2))  # Leaves the two behind, finds the one that stepped off
+    assert events(queue) == [(EXIT, [rows[1], rows[2]]), (ENTER, [rows[0]])]
+
+    store.remove(rows[[0]])  # Removed monsters exit
+    tracker.monsters_moved(rows[[0]])
+    assert events(queue) == [(EXIT, [rows[0]])]
+    assert len(tracker.touching) == 0
+
+    tracker.move_player((1, 2))  # Same cell: nothing happens
+    tracker.monsters_moved(rows[[3]])  # Moved far from the player: nothing happens
+    assert events(queue) == []
+
+
+def test_touching_follows_random_moves():
+    rng = np.random.default_rng(4)
+    store = MonsterStore(6, 32, rng)
+    store.add(60)
+    queue = EventQueue()
+    tracker = EncounterTracker(store, queue)
+    for step in range(300):
+        if step % 7 == 0:
+            tracker.move_player((int(rng.integers(6)), int(rng.integers(6))))
+        moving = rng.choice(store.live(), size=10, replace=False)
+        if step % 5 == 0:
+            store.remove(moving[:2])
+        if step % 11 == 0:
+            moving = np.union1d(moving, store.add(3))  # Added monsters can reuse the removed rows
+        store.move_all(moving)
+        tracker.monsters_moved(moving)
+        live = store.live()
+        on_player = live[(store.x[live] == tracker.cell[0]) & (store.y[live] == tracker.cell[1])]
+        assert sorted(tracker.touching.tolist()) == on_player.tolist()
+        events(queue)
@@ -0,0 +1,54 @@
+from collections import deque
+
+import numpy as np
+
+from flowfield import UNREACHED, FlowField
+from worldmap import FLOOR, WorldMap
+
+
+def bfs(world, area, cell):
+    # Plain breadth-first search over the window, the reference distances
+    open_cells = world.tiles(area) == FLOOR
+    distances = np.full(open_cells.shape, UNREACHED, dtype=np.int64)
+    start = (cell[1] - area.top, cell[0] - area.left)
+    if not open_cells[start]:
+        return distances
+    distances[start] = 0
+    queue = deque([start])
+    while queue:
+        y, x = queue.popleft()
+        for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+            if 0 <= ny < area.height and 0 <= nx < area.width and open_cells[ny, nx] and distances[ny, nx] == UNREACHED:
+                distances[ny, nx] = distances[y, x] + 1
+                queue.append((ny, nx))
+    return distances
+
+
+def test_one_cell_moves_match_a_fresh_search():
+    world = WorldMap(400, 400, seed=3, rock_density=0.2)
+    field = FlowField(world, radius=8)
+    rng = np.random.default_rng(2)
+    cell = world.open_cell_near((200, 200))
+    field.update(cell)
+    for _ in range(150):
+        dx, dy = [(0, -1), (0, 1), (-1, 0), (1, 0)][rng.integers(4)]
+        if not world.is_blocked((cell[0] + dx, cell[1] + dy)):
+            cell = (cell[0] + dx, cell[1] + dy)
+        field.update(cell)
+        assert np.array_equal(field.distances(), bfs(world, field.area, cell))
+    assert field.increments > 50 and field.rebuilds > 1
+
+
+def test_next_steps_walk_down_the_distances():
+    world = WorldMap(200, 200, seed=1, rock_density=0.1)
+    field = FlowField(world, radius=16)
+    target = world.open_cell_near((100, 100))
+    field.update(target)
+    x = np.array([target[0], target[0] + 5, target[0] + 100, target[0] - 10])
+    y = np.array([target[1], target[1] - 3, target[1], target[1] + 10])
+    dx, dy, following = field.next_steps(x, y)
+    assert following[0] and dx[0] == 0 and dy[0] == 0
+    assert not following[2] and dx[2] == 0 and dy[2] == 0
+    for index in np.flatnonzero(following[1:]) + 1:
+        here = field.distance((x[index], y[index]))
+        assert field.distance((x[index] + dx[index], y[index] + dy[index])) == here - 1
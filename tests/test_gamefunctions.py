@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from gamefunctions import (CART_BAD_PRICE, CART_BAD_QUANTITY, CART_NOT_ENOUGH_MONEY, CART_OK, CART_UNKNOWN_ITEM,
+                           checkout_cart, checkout_orders, purchase_item, to_cents, to_money)
+
+
+def test_money_is_exact():
+    assert to_money(5.99) == Decimal('5.99')
+    assert to_cents('4.01') == 401
+    with pytest.raises(ValueError):
+        to_cents('0.001')
+    _, leftover = purchase_item(to_money(5.99), to_money(10))
+    assert leftover == Decimal('4.01')
+
+
+def test_checkout_cart_reports_each_failed_line_and_goes_on():
+    catalog = {'Sword': 5.99, 'Shield': 8, 'Cursed': 'abc', 'Void': None, 'Free': 0, 'Milkshake': 1.5}
+    cart = [('Sword', 1), ('Dragon', 1), ('Cursed', 1), ('Void', 1), ('Free', 1), ('Milkshake', 1.5),
+            ('Milkshake', '2'), ('Milkshake', 0), ('Shield', 1), ('Milkshake', np.int64(2))]
+    checkout = checkout_cart(cart, catalog, 10)
+
+    assert [line.purchased for line in checkout.lines] == [1, 0, 0, 0, 0, 0, 0, 0, 0, 2]
+    errors = [line.error for line in checkout.lines]
+    assert errors[0] is None and errors[-1] is None
+    assert errors[1] == 'Unknown item: Dragon.'
+    assert errors[2] == "Bad price or quantity: 'abc' x 1."
+    assert errors[3] == 'Bad price or quantity: None x 1.'
+    assert errors[4] == 'Item price must be greater than zero.'
+    assert errors[5] == 'Bad price or quantity: 1.5 x 1.5.'
+    assert errors[6] == "Bad price or quantity: 1.5 x '2'."
+    assert errors[7] == 'Quantity to purchase must be at least 1.'
+    assert errors[8] == 'You cannot purchase more than 0 items with the available money.'
+    assert checkout.total == Decimal('8.99')
+    assert checkout.leftover == Decimal('1.01')
+    assert all(isinstance(line.cost, Decimal) for line in checkout.lines)
+
+
+def test_checkout_cart_refuses_negative_money():
+    with pytest.raises(ValueError):
+        checkout_cart([('Sword', 1)], {'Sword': 1}, -1)
+
+
+def test_checkout_orders_matches_checkout_cart():
+    rng = np.random.default_rng(5)
+    prices = [0, 150, 599, 1000]
+    names = ['free', 'milkshake', 'sword', 'shield']
+    catalog = {name: to_money(cents) / 100 for name, cents in zip(names, prices)}
+    orders, lines = 200, 4
+    order_ids = np.repeat(np.arange(orders), lines)
+    item_ids = rng.integers(0, len(prices) + 1, size=orders * lines)  # The last id is an unknown item
+    quantities = rng.integers(0, 4, size=orders * lines)
+    money = rng.integers(0, 3000, size=orders)
+    result = checkout_orders(order_ids, item_ids, quantities, prices, money)
+
+    prefixes = {'Unknown item': CART_UNKNOWN_ITEM, 'Item price': CART_BAD_PRICE, 'Quantity to': CART_BAD_QUANTITY,
+                'You cannot': CART_NOT_ENOUGH_MONEY}
+
+    def code(error):
+        return CART_OK if error is None else next(value for key, value in prefixes.items() if error.startswith(key))
+
+    for order in range(orders):
+        at = slice(order * lines, (order + 1) * lines)
+        cart = [(names[item] if item < len(names) else 'dragon', int(quantity))
+                for item, quantity in zip(item_ids[at], quantities[at])]
+        checkout = checkout_cart(cart, catalog, to_money(int(money[order])) / 100)
+        assert [line.purchased for line in checkout.lines] == result.purchased[at].tolist()
+        assert [to_cents(line.cost) for line in checkout.lines] == result.costs[at].tolist()
+        assert [code(line.error) for line in checkout.lines] == result.errors[at].tolist()
+        assert to_cents(checkout.leftover) == result.leftover[order]
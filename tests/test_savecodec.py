@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from savecodec import SaveReader, binaryToJson, decodeSave, encodeSave, isBinarySave, jsonToBinary
+from savejournal import JOURNAL_SUFFIX, SEQ_KEY, loadJournaled, openJournal
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load(name):
+    with open(os.path.join(REPO, name)) as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize('name', ['Jit.json', 'John.json', 'Test.json'])
+def test_encode_decode_round_trip(name):
+    gameData = load(name)
+    data = encodeSave(gameData)
+    assert isBinarySave(data)
+    assert decodeSave(data) == gameData
+    assert len(data) < len(json.dumps(gameData))
+
+
+def test_unknown_items_fields_and_keys_survive():
+    gameData = {**load('Jit.json'), 'playerGold': 12.75, 'extra': {'zone': 'bridge'}}
+    gameData['itemInventory'].append({'name': 'lute', 'type': 'music', 'tune': [1, 2, 3]})
+    gameData['itemInventory'][0]['shiny'] = True
+    gameData['equippiedItems'].append('lute')
+    assert decodeSave(encodeSave(gameData)) == gameData
+
+
+def test_truncated_save_raises_value_error():
+    data = encodeSave(load('Jit.json'))
+    with pytest.raises(ValueError):
+        decodeSave(data[:len(data) - 5])
+    assert not isBinarySave(b'{"playerHealth": 1}')
+
+
+def test_json_to_binary_to_json_round_trip(tmp_path):
+    # The json side is journaled: the conversion must see the last save, not the snapshot
+    jsonFile, binaryFile, copyFile = (str(tmp_path / name) for name in ('save.json', 'save.sav', 'copy.json'))
+    journal = openJournal(jsonFile)
+    journal.save({**load('Jit.json'), 'playerHealth': 75})
+    journal.save({**load('Jit.json'), 'playerHealth': 50})
+    journal.sync()
+
+    jsonToBinary(jsonFile, binaryFile)
+    with SaveReader(binaryFile) as save:
+        assert save.playerHealth == 50
+        assert save.playerGold == 10
+        decoded = save.decode()
+    assert SEQ_KEY not in decoded
+    assert decoded == loadJournaled(jsonFile)
+
+    # Converting back over a save whose journal holds records of its own does not replay them
+    other = openJournal(copyFile)
+    for health in (1, 2, 3):
+        other.save({**load('John.json'), 'playerHealth': health})
+    other.sync()
+    binaryToJson(binaryFile, copyFile)
+    assert loadJournaled(copyFile) == decoded
+    assert os.path.getsize(copyFile + JOURNAL_SUFFIX) == 0
+
+
+def test_json_to_binary_without_a_save_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        jsonToBinary(str(tmp_path / 'nothing.json'), str(tmp_path / 'nothing.sav'))
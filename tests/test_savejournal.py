@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+from savejournal import JOURNAL_SUFFIX, SEQ_KEY, SaveJournal, applyOps, diffState, loadJournaled, openJournal
+
+
+def state(health, items=3):
+    return {'itemInventory': [{'name': f'item {item}', 'quantity': item} for item in range(items)],
+            'playerHealth': health, 'playerGold': 10, 'equippiedItems': [], 'swordDurability': 25}
+
+
+def test_diff_and_apply_round_trip():
+    old = {'a': 1, 'b': [1, 2, {'c': 3}], 'gone': True, 'list': [1]}
+    new = {'a': 1, 'b': [1, 5, {'c': 4, 'd': None}], 'list': [1, 2], 'new': 'x'}
+    ops = diffState(old, new)
+    assert applyOps(json.loads(json.dumps(old)), ops) == new
+    assert diffState(new, new) == []
+
+
+def test_journal_replays_onto_the_snapshot(tmp_path):
+    fileName = str(tmp_path / 'save.json')
+    journal = SaveJournal(fileName, syncEvery=1, compactEvery=100)
+    for health in (100, 90, 75, 50):
+        journal.save(state(health))
+    journal.close()
+    assert os.path.getsize(fileName + JOURNAL_SUFFIX) > 0  # Three records after the first snapshot
+    assert loadJournaled(fileName) == state(50)
+    with open(fileName) as file:
+        assert json.load(file)['playerHealth'] == 100
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    fileName = str(tmp_path / 'save.json')
+    journal = SaveJournal(fileName, syncEvery=1, compactEvery=100)
+    journal.save(state(100))
+    journal.save(state(90))
+    journal.close()
+    with open(fileName + JOURNAL_SUFFIX, 'a') as file:
+        file.write('{"seq": 3, "ops": [[["playerHea')  # A crash in the middle of an append
+    assert loadJournaled(fileName) == state(90)
+
+    # The next save starts over from a snapshot instead of appending after the torn record
+    journal = SaveJournal(fileName, syncEvery=1, compactEvery=100)
+    journal.save(state(80))
+    journal.close()
+    assert loadJournaled(fileName) == state(80)
+    assert journal.compactions == 1
+
+
+def test_records_older_than_the_snapshot_are_skipped(tmp_path):
+    # A crash after a compaction wrote the snapshot but before it emptied the journal
+    fileName = str(tmp_path / 'save.json')
+    journal = SaveJournal(fileName, syncEvery=1, compactEvery=100)
+    journal.save(state(100))
+    journal.save(state(90))
+    journal.close()
+    with open(fileName + JOURNAL_SUFFIX) as file:
+        records = file.read()
+    journal.compact()
+    with open(fileName + JOURNAL_SUFFIX, 'w') as file:
+        file.write(records)
+    with open(fileName) as file:
+        assert json.load(file)[SEQ_KEY] == 1
+    assert loadJournaled(fileName) == state(90)
+
+
+def test_compaction_empties_the_journal(tmp_path):
+    fileName = str(tmp_path / 'save.json')
+    journal = SaveJournal(fileName, syncEvery=1, compactEvery=4)
+    for health in range(100, 90, -1):
+        journal.save(state(health))
+        assert loadJournaled(fileName) == state(health)
+    assert journal.compactions == 3
+    assert journal.records < 4
+
+
+def test_files_changed_behind_the_journal_are_reloaded(tmp_path):
+    fileName = str(tmp_path / 'save.json')
+    journal = SaveJournal(fileName, syncEvery=1, compactEvery=100)
+    journal.save(state(100))
+    journal.save(state(90))
+    with open(fileName, 'w') as file:  # E.g. another save copied over it
+        json.dump(state(40, items=5), file)
+    os.remove(fileName + JOURNAL_SUFFIX)
+    journal.save(state(30, items=5))
+    assert loadJournaled(fileName) == state(30, items=5)
+
+
+def test_open_journal_shares_and_bounds_the_journals(tmp_path, monkeypatch):
+    monkeypatch.setattr('savejournal.MAX_OPEN_JOURNALS', 2)
+    first = openJournal(str(tmp_path / 'a.json'))
+    assert openJournal(str(tmp_path / 'a.json')) is first
+    openJournal(str(tmp_path / 'b.json'))
+    openJournal(str(tmp_path / 'c.json'))
+    assert openJournal(str(tmp_path / 'a.json')) is not first  # Closed and dropped as least recently used
+
+
+def test_missing_save_loads_as_none_and_a_broken_one_raises(tmp_path):
+    assert loadJournaled(str(tmp_path / 'nothing.json')) is None
+    with open(tmp_path / 'bad.json', 'w') as file:
+        file.write('{')
+    with pytest.raises(ValueError):
+        loadJournaled(str(tmp_path / 'bad.json'))
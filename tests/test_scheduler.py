@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from scheduler import RowSchedule, Scheduler
+
+
+@pytest.mark.parametrize('scan_limit', [1 << 20, 0, 300], ids=['scan', 'buckets', 'switching'])
+def test_row_schedule_pops_what_is_due(scan_limit):
+    rng = np.random.default_rng(2)
+    schedule = RowSchedule(scan_limit)
+    expected = {}  # Row -> tick it is due at
+    count = 16
+    for tick in range(400):
+        # Grow the rows (past scan_limit in the switching case), reschedule and cancel some
+        new = np.arange(count, count + int(rng.integers(0, 4)))
+        count += len(new)
+        rows = np.concatenate([new, rng.integers(0, count, size=5)])
+        ticks = tick + rng.integers(0, 20, size=len(rows))
+        schedule.schedule(rows, ticks)
+        expected.update(zip(rows.tolist(), ticks.tolist()))  # The last tick of a row scheduled twice wins
+        cancelled = rng.integers(0, count, size=2)
+        schedule.cancel(cancelled)
+        for row in cancelled.tolist():
+            expected.pop(row, None)
+
+        due = schedule.pop_due(tick)
+        assert due.tolist() == sorted(row for row, at in expected.items() if at == tick)
+        expected = {row: at for row, at in expected.items() if at != tick}
+        assert len(schedule) == len(expected)
+    assert (schedule._buckets is None) == (scan_limit > count)
+
+
+def test_row_scheduled_twice_at_the_same_tick_is_popped_once():
+    for scan_limit in (1 << 20, 0):
+        schedule = RowSchedule(scan_limit)
+        schedule.schedule([3, 5], 7)
+        schedule.schedule([3], 7)
+        assert schedule.pop_due(7).tolist() == [3, 5]
+        assert len(schedule.pop_due(7)) == 0
+
+
+def test_scheduler_runs_due_callbacks_in_order():
+    scheduler = Scheduler()
+    ran = []
+    scheduler.call_at(5, ran.append, 'b')
+    scheduler.call_at(2, ran.append, 'a')
+    scheduler.call_at(5, ran.append, 'c')  # Same tick: scheduling order
+    cancelled = scheduler.call_later(3, ran.append, 'never')
+    scheduler.cancel(cancelled)
+    scheduler.cancel(None)
+    assert scheduler.run_until(4) == 1
+    assert scheduler.run_until(10) == 2
+    assert ran == ['a', 'b', 'c']
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from spatialgrid import CellIndex
+
+
+def brute_nearby(x, y, indexed, cell, radius):
+    # Every indexed row within radius cells of cell, found by looking at all of them
+    rows = np.flatnonzero(indexed)
+    near = (np.abs(x[rows] - cell[0]) <= radius) & (np.abs(y[rows] - cell[1]) <= radius)
+    return rows[near].tolist()
+
+
+@pytest.mark.parametrize('size, count', [(4, 50), (30, 2000), (300, 20000)])
+def test_index_matches_a_brute_force_search(size, count):
+    rng = np.random.default_rng(size)
+    x = rng.integers(0, size, count)
+    y = rng.integers(0, size, count)
+    indexed = np.zeros(count, dtype=bool)
+    index = CellIndex(size, size)
+
+    for step in range(40):
+        # Moves of every size, some rows more than once in a row, and removals
+        moving = rng.choice(count, size=int(rng.integers(1, count // 2)), replace=False)
+        x[moving] = np.clip(x[moving] + rng.integers(-1, 2, len(moving)), 0, size - 1)
+        y[moving] = np.clip(y[moving] + rng.integers(-1, 2, len(moving)), 0, size - 1)
+        index.move(moving, x[moving], y[moving])
+        indexed[moving] = True
+        leaving = rng.choice(count, size=count // 20, replace=False)
+        index.remove(leaving)
+        indexed[leaving] = False
+
+        assert len(index) == np.count_nonzero(indexed)
+        for _ in range(5):
+            cell = (int(rng.integers(size)), int(rng.integers(size)))
+            assert sorted(index.occupants(cell).tolist()) == brute_nearby(x, y, indexed, cell, 0)
+            assert index.count(cell) == len(brute_nearby(x, y, indexed, cell, 0))
+            assert sorted(index.nearby(cell, 2).tolist()) == brute_nearby(x, y, indexed, cell, 2)
+
+
+def test_cells_outside_the_grid_are_empty():
+    index = CellIndex(5, 5)
+    index.move(np.arange(3), [0, 4, 4], [0, 4, 0])
+    assert len(index.occupants((-1, 0))) == 0
+    assert len(index.occupants((5, 5))) == 0
+    assert sorted(index.nearby((4, 4), 1).tolist()) == [1]
@@ -0,0 +1,34 @@
+import random
+
+import numpy as np
+import pytest
+
+from spawntables import AliasTable
+
+
+def test_draw_many_follows_the_weights():
+    weights = [10, 5, 1, 0, 4]
+    table = AliasTable(['a', 'b', 'c', 'd', 'e'], weights)
+    counts = np.bincount(table.draw_many_indices(200000, rng=1), minlength=len(weights))
+    expected = np.array(weights) / sum(weights)
+    assert counts[3] == 0  # A zero weight is never drawn
+    assert np.allclose(counts / counts.sum(), expected, atol=0.005)
+
+
+def test_draw_follows_the_weights():
+    table = AliasTable(['goblin', 'troll', 'George the Giant'], [10, 5, 1])
+    rng = random.Random(3)
+    draws = [table.draw(rng) for _ in range(64000)]
+    for item, weight in zip(table.items, table.weights):
+        assert draws.count(item) / len(draws) == pytest.approx(weight / 16, abs=0.01)
+
+
+def test_single_entry_is_always_drawn():
+    table = AliasTable(['only'], [3])
+    assert set(table.draw_many(100, rng=0).tolist()) == {'only'}
+
+
+@pytest.mark.parametrize('items, weights', [([], []), (['a'], [1, 2]), (['a', 'b'], [1, -1]), (['a'], [0])])
+def test_bad_tables_are_refused(items, weights):
+    with pytest.raises(ValueError):
+        AliasTable(items, weights)
@@ -0,0 +1,120 @@
+"""
+Module Name: textcache
+
+Description:
+    Caches rendered text so that font rasterization only happens when a string is new.
+    TextCache keeps the most recently used text surfaces keyed by (string, font, color)
+    and evicts the least recently used once it is full. Hud keeps one named line per
+    piece of on-screen information and only asks the cache for a new surface when the
+    line's text changes.
+
+Classes:
+    - TextCache(max_entries=256):
+        LRU cache of rendered text surfaces.
+    - Hud(cache, font, color):
+        Named HUD lines that are re-rendered only when their text changes.
+
+Examples:
+    >>> cache = TextCache()
+    >>> surface = cache.render('Health: 100', font, (0, 0, 0))  # Rasterized
+    >>> surface = cache.render('Health: 100', font, (0, 0, 0))  # Cached
+    >>> hud = Hud(cache, font, (0, 0, 0))
+    >>> hud.set('health', 'Health: 90', (10, 40))
+    >>> hud.draw(renderer)
+"""
+
+from collections import OrderedDict
+
+
+class TextCache:
+    """Least recently used cache of rendered text surfaces.
+
+    Attributes:
+        max_entries (int): How many surfaces are kept before the least recently used is evicted.
+        hits (int): How many renders were served from the cache.
+        misses (int): How many renders had to rasterize the text.
+    """
+
+    def __init__(self, max_entries=256):
+        if max_entries < 1:
+            raise ValueError("The text cache needs room for at least one entry.")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def render(self, text, font, color, antialias=True):
+        """
+        Returns text rendered with font and color, rasterizing it only if it is not cached.
+
+        Args:
+            text (str): The text to render.
+            font (pygame.font.Font): The font to render with.
+            color (tuple): The text color.
+            antialias (bool, optional): Whether to antialias the text. Defaults to True.
+
+        Returns:
+            pygame.Surface: The rendered text. It is shared, so do not draw on it.
+        """
+        key = (text, font, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Drops every cached surface."""
+        self._surfaces.clear()
+
+
+class Hud:
+    """Named lines of HUD text, each re-rendered only when its text changes."""
+
+    def __init__(self, cache, font, color):
+        self.cache = cache
+        self.font = font
+        self.color = color
+        self._lines = {}  # name -> [text, position, surface]
+
+    def set(self, name, text, position):
+        """
+        Shows text at position as the line called name.
+
+        Args:
+            name (str): Which line this is (e.g. 'health').
+            text (str): What the line says.
+            position (tuple): The (x, y) position of the line.
+
+        Returns:
+            None
+        """
+        line = self._lines.get(name)
+        if line is None or line[0] != text:
+            self._lines[name] = [text, position, self.cache.render(text, self.font, self.color)]
+        else:
+            line[1] = position
+
+    def hide(self, name):
+        """Stops showing the line called name (nothing happens if it is not shown)."""
+        self._lines.pop(name, None)
+
+    def draw(self, renderer):
+        """Queues every shown line on a rendering.DirtyRenderer."""
+        for text, position, surface in self._lines.values():
+            renderer.draw_text(text, surface, position)
+
+    def blit(self, target):
+        """Draws every shown line straight onto target, for loops that redraw the whole frame."""
+        for text, position, surface in self._lines.values():
+            target.blit(surface, position)
@@ -0,0 +1,184 @@
+"""
+Module Name: worldmap
+
+Description:
+    A world map much larger than the screen, split into square chunks of cells. Every
+    cell is either open floor or rock (blocked). Rock is off by default (rock_density
+    0). Tiles are not stored: each one is a deterministic hash of its cell and the map
+    seed. So a 10000 x 10000 map costs no memory, a chunk is generated on demand, and
+    the blocked test runs vectorized over any set of cells (e.g. every monster's next
+    step).
+
+    Camera follows the player and tells the game which part of the world, in pixels,
+    cells and chunks, is on the screen. Only that part is drawn.
+
+Classes:
+    - WorldMap(width, height, chunk_size=16, seed=0, rock_density=0):
+        The tiles of the world, with blocked(), chunk() and tiles().
+    - Camera(width, height, cell_size, world):
+        The screen's window on the world, following a target.
+
+Examples:
+    >>> world = WorldMap(10000, 10000, seed=7, rock_density=0.06)
+    >>> world.is_blocked((12, 40))
+    False  # Output will vary with the seed
+    >>> world.chunk(0, 2).shape
+    (16, 16)
+    >>> camera = Camera(320, 320, 32, world)
+    >>> camera.follow(player_rect)
+    True
+    >>> camera.cell_area()
+    <rect(0, 35, 10, 10)>
+"""
+
+import numpy as np
+import pygame
+
+# Tile types
+FLOOR = 0
+ROCK = 1
+
+
+def _mix(values):
+    # splitmix64 finalizer, mixes every input bit into every output bit
+    values ^= values >> np.uint64(30)
+    values *= np.uint64(0xBF58476D1CE4E5B9)
+    values ^= values >> np.uint64(27)
+    values *= np.uint64(0x94D049BB133111EB)
+    values ^= values >> np.uint64(31)
+    return values
+
+
+class WorldMap:
+    """The tiles of a width x height cell world, generated on demand chunk by chunk.
+
+    Cells outside the world count as rock, so anything that checks blocked() before
+    moving also stays inside the world.
+
+    Attributes:
+        width (int): Width of the world in cells.
+        height (int): Height of the world in cells.
+        chunk_size (int): Width and height of a chunk in cells.
+        seed (int): Seed the tiles are generated from.
+        rock_density (float): Fraction of cells that are rock (0 by default: all floor).
+    """
+
+    def __init__(self, width, height, chunk_size=16, seed=0, rock_density=0):
+        if not 0 <= rock_density < 1:
+            raise ValueError('The rock density must be at least 0 and below 1.')
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.rock_density = rock_density
+        self._seed_hash = _mix(np.array([seed], dtype=np.uint64))[0]
+        self._rock_threshold = np.uint64(int(rock_density * 2 ** 53)) << np.uint64(11)
+
+    @property
+    def chunks_x(self):
+        """How many chunks the world is wide."""
+        return -(-self.width // self.chunk_size)
+
+    @property
+    def chunks_y(self):
+        """How many chunks the world is high."""
+        return -(-self.height // self.chunk_size)
+
+    def blocked(self, x, y):
+        """
+        Returns whether each cell is rock (or outside the world).
+
+        Args:
+            x (array_like): The x cell of each cell to check.
+            y (array_like): The y cell of each cell to check.
+
+        Returns:
+            numpy.ndarray: Boolean array, True where the cell cannot be entered.
+        """
+        x = np.asarray(x, dtype=np.int64)
+        y = np.asarray(y, dtype=np.int64)
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        with np.errstate(over='ignore'):
+            cells = (y * self.width + x).astype(np.uint64) ^ self._seed_hash
+            rock = _mix(cells) < self._rock_threshold
+        return rock | ~inside
+
+    def is_blocked(self, cell):
+        """Returns whether one (x, y) cell is rock or outside the world."""
+        return bool(self.blocked(cell[0], cell[1]))
+
+    def tiles(self, area):
+        """
+        Returns the tiles of an area of cells, outside cells as ROCK.
+
+        Args:
+            area (pygame.Rect): The area, in cells.
+
+        Returns:
+            numpy.ndarray: uint8 array of shape (area.height, area.width), indexed [y, x] from the area's top left.
+        """
+        y, x = np.mgrid[area.top:area.bottom, area.left:area.right]
+        return self.blocked(x, y).astype(np.uint8)
+
+    def chunk(self, chunk_x, chunk_y):
+        """Returns the tiles of one chunk as a (chunk_size, chunk_size) uint8 array indexed [y, x]."""
+        size = self.chunk_size
+        return self.tiles(pygame.Rect(chunk_x * size, chunk_y * size, size, size))
+
+    def chunks_in(self, area):
+        """Returns the (chunk_x, chunk_y) of every chunk overlapping area (a pygame.Rect in cells)."""
+        size = self.chunk_size
+        return [(chunk_x, chunk_y)
+                for chunk_y in range(max(area.top, 0) // size, min(area.bottom - 1, self.height - 1) // size + 1)
+                for chunk_x in range(max(area.left, 0) // size, min(area.right - 1, self.width - 1) // size + 1)]
+
+    def open_cell_near(self, cell):
+        """Returns the open cell closest to cell, searching outwards in growing squares."""
+        x, y = cell
+        for radius in range(max(self.width, self.height)):
+            area = pygame.Rect(x - radius, y - radius, 2 * radius + 1, 2 * radius + 1)
+            open_y, open_x = np.nonzero(self.tiles(area) == FLOOR)
+            if len(open_x):
+                closest = np.argmin(np.abs(open_x - radius) + np.abs(open_y - radius))
+                return area.left + int(open_x[closest]), area.top + int(open_y[closest])
+        raise ValueError('The world has no open cell.')
+
+
+class Camera:
+    """The part of the world shown on the screen, kept aligned to whole cells.
+
+    Attributes:
+        rect (pygame.Rect): The visible area of the world, in world pixels.
+        cell_size (int): Size of a grid cell in pixels.
+    """
+
+    def __init__(self, width, height, cell_size, world):
+        self.cell_size = cell_size
+        self.world = world
+        self.rect = pygame.Rect(0, 0, width, height)
+
+    def follow(self, target):
+        """
+        Centers the camera on target (a pygame.Rect in world pixels), without showing past the world's edges.
+
+        Returns:
+            bool: Whether the camera moved.
+        """
+        cell_size = self.cell_size
+        columns, rows = self.rect.width // cell_size, self.rect.height // cell_size
+        left = min(max(target.centerx // cell_size - columns // 2, 0), max(self.world.width - columns, 0))
+        top = min(max(target.centery // cell_size - rows // 2, 0), max(self.world.height - rows, 0))
+        if (left * cell_size, top * cell_size) == self.rect.topleft:
+            return False
+        self.rect.topleft = (left * cell_size, top * cell_size)
+        return True
+
+    def cell_area(self):
+        """Returns the visible area in cells (a pygame.Rect), including partly visible cells."""
+        cell_size = self.cell_size
+        return pygame.Rect(self.rect.left // cell_size, self.rect.top // cell_size,
+                           -(-self.rect.width // cell_size), -(-self.rect.height // cell_size))
+
+    def to_screen(self, rect):
+        """Returns rect (in world pixels) moved to screen pixels."""
+        return rect.move(-self.rect.left, -self.rect.top)